@@ -5,13 +5,49 @@ from bpy.props import BoolProperty, IntProperty, FloatProperty, PointerProperty,
 import functools
 from uuid import uuid4
 
-from . ops import initialize_default_collections, link_to_collection, unlink_from_collection, clone_object, delete_object
+from . ops import initialize_default_collections, link_to_collection, unlink_from_collection, clone_objects, shallow_clone_object, can_share_data, delete_object
 
 from . draw import copy_offscreen_to_image, PREVIEW_COLLECTIONS
 from . utils.utils import random_color, change_viewport_shading
 from . sockets import init_node_sockets, object_poll
-from . handlers import get_rendering_flag
-from . utils.node_utils import get_active_node_group
+from . handlers import get_rendering_flag, is_processing_locked
+from . utils.node_utils import get_active_node_group, update_object_index
+from . cache import calc_cache_key, lookup_cache_entry, store_cache_entry, restore_cache_entry, clear_node_cache, \
+    count_cache_hit, count_cache_miss, get_node_cache_stats
+from . disk_cache import read_disk_entry, write_disk_entry
+from . parse import expression_context
+from . throttle import defer_update, is_interactive_pass, mark_interactive, get_interactive_options
+from . jobs import submit_job, cancel_job
+from . node_tree import next_nodes, mark_dirty, count_clone, count_reused_objects
+from . profiler import profile_scope, record_mesh_counts, record_buffer_counts, record_session_skips, get_profile, is_profiling
+from . mesh_buffer import buffers_from_objects, get_node_buffers, set_node_buffers, clear_node_buffers
+from . pool import acquire_mesh, release_object, recycle_outputs, clear_node_pool
+from . session import begin_operator_session, end_operator_session, get_node_session, get_session_kind, set_node_session, \
+    take_node_session, flush_node_session, discard_node_session, free_payload, has_stale_outputs, retain_input, has_retained_input, get_retained_input, \
+    discard_retained_input
+
+
+# tree setting enabling each kind of session
+SESSION_SETTINGS = {
+    'BMESH': 'use_bmesh_sessions',
+    'MODIFIER': 'use_modifier_fusion',
+}
+
+
+def delete_objects_by_name(object_names=[]):
+    for names in object_names:
+        [delete_object(bpy.data.objects.get(name)) for name in names if name in bpy.data.objects]
+
+
+def commit_async_result(node_tree_name, node_name, clone_names, finish_args, result):
+    node_tree = bpy.data.node_groups.get(node_tree_name)
+    node = node_tree.nodes.get(node_name) if node_tree else None
+    if node is None or any(name not in bpy.data.objects for names in clone_names for name in names):
+        delete_objects_by_name(clone_names)
+        return
+
+    op_clone_inputs = [[bpy.data.objects[name] for name in names] for names in clone_names]
+    node.finish_async(result, op_clone_inputs, *finish_args)
 
 
 def update_active_node(node_tree_name, node_name):
@@ -47,6 +83,7 @@ class BaseNode:
 
     is_active : BoolProperty(default=False, update=lambda self, context: self._update())
     is_processing : BoolProperty(default=False)
+    is_computing : BoolProperty(default=False)
     it_displays : BoolProperty(default=False)
 
     path_to_node : bpy.props.StringProperty(name='path_to_node', default='')
@@ -116,6 +153,13 @@ class BaseNode:
             for output_object in output_objects:
                 delete_object(output_object)
 
+        clear_node_cache(self)
+        clear_node_buffers(self)
+        clear_node_pool(self)
+        discard_node_session(self)
+        discard_retained_input(self)
+        cancel_job(self)
+
         if inputstream_socket and outputstream_socket and inputstream_socket.links and outputstream_socket.links:
             from_socket = inputstream_socket.links[0].from_socket
             to_socket = outputstream_socket.links[0].to_socket
@@ -141,6 +185,10 @@ class BaseNode:
         else:
             self.needs_display = False
 
+        # dirty nodes and display changes invalidate their downstream
+        if self.needs_processing or self.needs_display != self.it_displays:
+            mark_dirty(self)
+
         # force node tree update
         self.needs_update = True
         self.get_node_tree().update()
@@ -158,11 +206,15 @@ class BaseNode:
         self._update()
 
 
-    # update on socket changes
-    def update_from_socket(self, socket, context=None):
+    # update on socket changes, value drags are coalesced by the throttle timer
+    def update_from_socket(self, socket, context=None, deferred=False):
+        if socket.bl_idname == 'InputStreamSocket' and not socket.is_linked:
+            update_object_index(self)
         if self.is_processing:
             return
         self.needs_processing = True
+        if deferred and not is_processing_locked() and defer_update(self):
+            return
         self._update()
 
 
@@ -206,6 +258,7 @@ class BaseNode:
             self.update_from_socket(link.from_socket)
         elif self.name == link.to_node.name:
             # output node
+            update_object_index(self)
             self.update_from_socket(link.to_socket)
             self.get_node_tree().nodes.active = self
 
@@ -292,6 +345,9 @@ class BaseNode:
             coll_item.name = item.name
             coll_item.type = item.type
 
+        if socket.bl_idname == 'InputStreamSocket':
+            update_object_index(self)
+
 
     def is_input_node(self):
         inputstream_socket = self.get_first_inputstream_socket()
@@ -303,6 +359,17 @@ class BaseNode:
         return outputstream_socket and (not outputstream_socket.is_linked)
 
 
+    def is_pull_sink(self):
+        # sinks pull their upstream in lazy evaluation
+        if self.is_active or self.always_display:
+            return True
+        for output in self.outputs:
+            for link in output.links:
+                if link.to_node.bl_idname == 'NodeGroupOutput':
+                    return True
+        return False
+
+
     def get_options_from_inputs(self, sockets=[]):
         options = {}
         for socket in sockets:
@@ -321,58 +388,456 @@ class BaseNode:
         return False
 
 
+    def get_expression_context(self):
+        # scene values read by the expressions, None when they depend on the context or random numbers
+        expressions = [socket.other.prop if socket.is_linked else socket.prop for socket in self.inputs if socket.bl_idname == 'ExpressionSocket']
+        return expression_context(expressions, bpy.context.scene)
+
+
+    def is_cacheable(self):
+        # interactive results never go to the cache
+        return self.get_node_tree().use_cache and not is_interactive_pass(self.get_node_tree())
+
+
+    def get_cache_key(self, op_inputs=[], options={}, chain_source=None):
+        # inputs of a chain node are stale meshes, the key of their source stands in for them
+        context = self.get_expression_context() if self.is_cacheable() else None
+        if context is None:
+            return None
+        if chain_source is None:
+            return calc_cache_key(self, op_inputs, options, context)
+        source_key = chain_source.get_output_cache_key()
+        return calc_cache_key(self, op_inputs[1:], options, context, source_key) if source_key else None
+
+
+    def get_output_cache_key(self):
+        keys = set(obj.get('_pn_cache_key_') for obj in self.get_items_from_stream_socket(self.get_first_outputstream_socket()) if obj)
+        return keys.pop() if len(keys) == 1 else None
+
+
+    def owns_cached_outputs(self, output_objects, cache_key):
+        if not output_objects:
+            return False
+        return all(self.owns_object(obj) and obj.get('_pn_cache_key_') == cache_key for obj in output_objects)
+
+
+    def can_run_async(self):
+        return self.get_node_tree().execution_mode != 'SYNC' and not get_rendering_flag()
+
+
+    def get_writes(self, definition={}, options={}):
+        # what the operator mutates on its inputs, anything undeclared is treated as geometry
+        writes = definition.get('writes', 'GEOMETRY')
+        for name, option_writes in definition.get('writes_when', {}).items():
+            if options.get(name):
+                writes = option_writes
+        return writes
+
+
+    def clone_inputs(self, op_inputs=[], writes='GEOMETRY'):
+        # copy-on-write, meshes are shared unless the operator changes mesh data
+        op_clone_inputs = []
+        full_clones = []
+        for op_input in op_inputs:
+            input_clones = []
+            for obj in op_input:
+                name = 'CLONE_' + obj.name.replace('OUT_', '')
+                if writes != 'GEOMETRY' and can_share_data(obj):
+                    input_clones.append(shallow_clone_object(obj, name=name, copy_data=(writes == 'ATTRIBUTES')))
+                    count_clone(self.get_node_tree(), shared=True)
+                else:
+                    # filled below, all full clones of the node are evaluated together
+                    full_clones.append((input_clones, len(input_clones), obj, name))
+                    input_clones.append(None)
+            op_clone_inputs.append(input_clones)
+
+        clones = clone_objects([obj for (input_clones, index, obj, name) in full_clones], [name for (input_clones, index, obj, name) in full_clones])
+        for (input_clones, index, obj, name), clone in zip(full_clones, clones):
+            input_clones[index] = clone
+            count_clone(self.get_node_tree())
+        return op_clone_inputs
+
+
+    def get_input_buffers(self, sockets=[]):
+        # upstream buffers are shared as is, objects are read into new buffers
+        op_buffers = []
+        for socket in sockets:
+            other = socket.other if socket.is_linked else None
+            buffers = get_node_buffers(other.node) if other and isinstance(other.node, BaseNode) else None
+            if buffers is None:
+                buffers = buffers_from_objects(self.get_items_from_stream_socket(socket))
+            if buffers is None:
+                return None
+            op_buffers.append(buffers)
+        return op_buffers
+
+
+    def materialize_upstream(self, sockets=[], session_source=None):
+        # upstream buffers and open bmeshes become meshes, except the session handed to this node
+        for socket in sockets:
+            other = socket.other if socket.is_linked else None
+            if other and isinstance(other.node, BaseNode):
+                other.node.materialize_buffers()
+                if other.node != session_source:
+                    flush_node_session(other.node)
+
+
+    def get_session_source(self, sockets=[], definition={}):
+        # upstream chain node that left its bmesh or modifier stack open for this node
+        if definition.get('session') is None or not sockets or not sockets[0].is_linked:
+            return None
+        link = sockets[0].links[0]
+        source = link.from_node
+        if isinstance(source, BaseNode) and get_node_session(source) and get_session_kind(source) == definition['session'] and len(link.from_socket.links) == 1:
+            return source
+        return None
+
+
+    def get_retained_source(self, sockets=[], definition={}):
+        # upstream chain node whose bmesh this node took before, its outputs are stale but this node kept a copy
+        if definition.get('session') != 'BMESH' or not sockets or not sockets[0].is_linked:
+            return None
+        source = sockets[0].links[0].from_node
+        return source if isinstance(source, BaseNode) and has_retained_input(self, source) else None
+
+
+    def take_chain_input(self, session_source=None, retained_source=None, definition={}):
+        # payloads of the upstream chain node, a copy stays with this node so it can run again without its source
+        if session_source is None:
+            return get_retained_input(self, retained_source) or []
+        entries = take_node_session(session_source) or []
+        if definition['session'] == 'BMESH':
+            retain_input(self, session_source, entries)
+        return entries
+
+
+    def can_keep_session(self, definition={}):
+        # the live session goes to the only consumer, displayed and shared outputs need the mesh
+        kind = definition.get('session')
+        if kind is None or not getattr(self.get_node_tree(), SESSION_SETTINGS[kind]):
+            return False
+        if self.needs_display or self.always_display:
+            return False
+        outputstream_socket = self.get_first_outputstream_socket()
+        if outputstream_socket is None or len(outputstream_socket.links) != 1:
+            return False
+        link = outputstream_socket.links[0]
+        consumer = link.to_node
+        return isinstance(consumer, BaseNode) and consumer.get_definition().get('session') == kind and link.to_socket == consumer.get_first_inputstream_socket()
+
+
+    def get_definition(self):
+        # overloaded by the registered node classes
+        return {}
+
+
     def process(self, MODULE=None, OPSCOPE=None):
         self.needs_processing = False
         self.is_processing = True
 
+        # inputs changed again, results of a running job are stale
+        cancel_job(self)
+        self.is_computing = False
+        # outputs of a chain node are stale meshes, a matching key says nothing about them
+        outputs_valid = get_node_session(self) is None and not has_stale_outputs(self)
+        discard_node_session(self)
+
         # process node
         inputstream_sockets = self.get_inputstream_sockets()
         outputstream_socket = self.get_first_outputstream_socket()
 
-        op_inputs = []
-        for inputstream_socket in inputstream_sockets:
-            input_objects = self.get_items_from_stream_socket(inputstream_socket)
-            op_inputs.append(input_objects)
-
-        # clone inputs
-        op_clone_inputs = []
-        for op_input in op_inputs:
-            input_clones = [clone_object(obj, name='CLONE_' + obj.name.replace('OUT_', '')) for obj in op_input]
-            op_clone_inputs.append(input_clones)
-
         options = self.get_options_from_inputs(self.inputs)
         options['ops_type'] = self.ops_type
 
-        OPS_PROP_DEF = MODULE['definition']
-        (objects, preview_data) = OPSCOPE[OPS_PROP_DEF[self.ops_type]['command']](*op_clone_inputs, options=options)
+        definition = MODULE['definition'][self.ops_type]
+        interactive = is_interactive_pass(self.get_node_tree())
+        if interactive:
+            options = get_interactive_options(options, definition)
+            mark_interactive(self)
+
+        # array based operators skip the datablock round trip
+        if self.process_buffers(inputstream_sockets, options, definition, OPSCOPE):
+            self.is_processing = False
+            return
 
+        # object based operators read datablocks
+        (session_source, retained_source) = self.get_chain_sources(inputstream_sockets, definition)
+        op_inputs = [self.get_items_from_stream_socket(inputstream_socket) for inputstream_socket in inputstream_sockets]
         output_objects = self.get_items_from_stream_socket(outputstream_socket)
-        keep_output_objects = [obj for obj in output_objects if obj and not self.owns_object(obj)]
-        [delete_object(obj) for obj in output_objects if obj and self.owns_object(obj)]
 
-        for obj in objects:
-            obj['_pn_node_tag_'] = self.id
-            obj.name = obj.name.replace('CLONE_', 'OUT_')
-            obj.color = self.output_color
-            # shade_smooth_operator([obj])
+        (cache_key, cache_entry) = self.lookup_cache(op_inputs, options, session_source or retained_source)
+        if cache_key and outputs_valid and self.owns_cached_outputs(output_objects, cache_key):
+            # same inputs and options as the last run, keep the current outputs
+            count_cache_hit(self)
+            self.is_processing = False
+            return
+
+        disk_entry = self.lookup_disk_entry(cache_key) if not cache_entry else None
+        if cache_entry or disk_entry:
+            self.restore_cached_result(cache_entry, disk_entry, cache_key, interactive)
+        else:
+            if cache_key:
+                count_cache_miss(self)
+            self.run_operator(op_inputs, options, cache_key, interactive, (session_source, retained_source), definition, OPSCOPE)
+
+        self.is_processing = False
+
+
+    def process_buffers(self, sockets, options, definition, OPSCOPE):
+        # False when the operator or one of the inputs has no buffers
+        buffer_command = definition.get('buffer_command')
+        op_buffers = self.get_input_buffers(sockets) if buffer_command and self.get_node_tree().use_mesh_buffers else None
+        if op_buffers is None:
+            return False
+        with profile_scope('operator', self.get_node_tree().name, self.name, {'ops_type': self.ops_type, 'buffers': True}):
+            (buffers, preview_data) = OPSCOPE[buffer_command](*op_buffers, options=options)
+        self.finish_buffer_process(buffers)
+        return True
 
-        # delete clones
-        for op_clone_input in op_clone_inputs:
-            [delete_object(obj) for obj in op_clone_input if obj and not self.owns_object(obj)]
 
-        outputstream_keep_items = [obj.name for obj in keep_output_objects]
-        self.set_items_to_stream_socket(outputstream_socket, outputstream_keep_items + objects)
+    def get_chain_sources(self, sockets, definition):
+        # the live session of the upstream chain node or, when it is gone, the copy this node kept
+        session_source = self.get_session_source(sockets, definition)
+        retained_source = self.get_retained_source(sockets, definition) if session_source is None else None
+        self.materialize_upstream(sockets, session_source)
+        clear_node_buffers(self)
+        return (session_source, retained_source)
 
-        if not get_rendering_flag() and self.get_node_tree().show_preview and len(objects) > 0:
-            prev_obj = objects[0]
-            self.preview_name = copy_offscreen_to_image(obj_preview_name='PREVIEW_' + prev_obj.name, obj=prev_obj, preview_data=preview_data)
+
+    def lookup_cache(self, op_inputs, options, chain_source):
+        with profile_scope('cache', self.get_node_tree().name, self.name):
+            cache_key = self.get_cache_key(op_inputs, options, chain_source)
+            return (cache_key, lookup_cache_entry(self.get_node_tree(), cache_key))
+
+
+    def lookup_disk_entry(self, cache_key):
+        if not cache_key or not self.get_node_tree().use_disk_cache:
+            return None
+        with profile_scope('cache', self.get_node_tree().name, self.name):
+            return read_disk_entry(self.get_node_tree(), cache_key)
+
+
+    def restore_cached_result(self, cache_entry, disk_entry, cache_key, interactive):
+        count_cache_hit(self)
+        if cache_entry:
+            objects = restore_cache_entry(cache_entry)
+            self.finish_process(objects, cache_entry['preview_data'], [], cache_key, interactive)
         else:
-            self.preview_name = ''
+            (objects, preview_data) = disk_entry
+            store_cache_entry(self, cache_key, objects, preview_data)
+            self.finish_process(objects, preview_data, [], cache_key, interactive)
+
+
+    def clone_op_inputs(self, op_inputs, options, chain_sources, definition):
+        # returns the clones and the chain payloads primed for them by clone name
+        (session_source, retained_source) = chain_sources
+        with profile_scope('clone', self.get_node_tree().name, self.name):
+            writes = self.get_writes(definition, options)
+            if not (session_source or retained_source):
+                return (self.clone_inputs(op_inputs, writes), {})
+
+            # the geometry comes with the live session or its copy, the clone only carries the object
+            op_clone_inputs = self.clone_inputs(op_inputs[:1], 'NOTHING') + self.clone_inputs(op_inputs[1:], writes)
+            session = dict(self.take_chain_input(session_source, retained_source, definition))
+            primed = {clone.name: (clone, session.pop(obj.name)) for obj, clone in zip(op_inputs[0], op_clone_inputs[0]) if obj.name in session}
+            [free_payload(payload) for payload in session.values()]
+            return (op_clone_inputs, primed)
+
+
+    def dispatch_async(self, op_clone_inputs, options, cache_key, interactive, definition, OPSCOPE):
+        # False when the operator has to run here
+        async_def = definition.get('async')
+        if not async_def or not self.can_run_async():
+            return False
+        # extract buffers here, the kernel runs on a worker thread
+        with profile_scope('operator', self.get_node_tree().name, self.name, {'stage': 'prepare'}):
+            payload = OPSCOPE[async_def['prepare']](*op_clone_inputs, options=options)
+        if payload is None:
+            return False
+        self.begin_async(payload, op_clone_inputs, options, cache_key, interactive, async_def, OPSCOPE)
+        return True
+
+
+    def run_operator(self, op_inputs, options, cache_key, interactive, chain_sources, definition, OPSCOPE):
+        (op_clone_inputs, primed) = self.clone_op_inputs(op_inputs, options, chain_sources, definition)
+        if self.dispatch_async(op_clone_inputs, options, cache_key, interactive, definition, OPSCOPE):
+            return
+
+        tree_name = self.get_node_tree().name
+        begin_operator_session(self.can_keep_session(definition), primed)
+        try:
+            with profile_scope('operator', tree_name, self.name, {'ops_type': self.ops_type}):
+                (objects, preview_data) = OPSCOPE[definition['command']](*op_clone_inputs, options=options)
+        finally:
+            (stashed, skipped) = end_operator_session()
+        record_session_skips(tree_name, self.name, skipped)
+
+        if stashed:
+            self.keep_stashed_session(objects, preview_data, op_clone_inputs, cache_key, stashed, definition)
+        else:
+            self.store_result(objects, preview_data, cache_key)
+            self.finish_process(objects, preview_data, op_clone_inputs, cache_key, interactive)
+
+
+    def keep_stashed_session(self, objects, preview_data, op_clone_inputs, cache_key, stashed, definition):
+        # outputs stay stale until the chain ends, keep them out of the caches and the preview,
+        # the key on the outputs only seeds the key of the consumer
+        payloads = [stashed.pop(obj.name, None) for obj in objects]
+        [free_payload(payload) for payload in stashed.values()]
+        objects = self.finish_process(objects, preview_data, op_clone_inputs, cache_key, True)
+        set_node_session(self, [(obj.name, payload) for obj, payload in zip(objects, payloads) if payload is not None], definition['session'])
+
+
+    def begin_async(self, payload, op_clone_inputs, options, cache_key, interactive, async_def, OPSCOPE):
+        # keep the last valid outputs until the job lands
+        clone_names = [[obj.name for obj in clones] for clones in op_clone_inputs]
+        finish_args = (options, cache_key, interactive, OPSCOPE[async_def['commit']])
+        on_commit = functools.partial(commit_async_result, self.get_node_tree().name, self.name, clone_names, finish_args)
+        on_cancel = functools.partial(delete_objects_by_name, clone_names)
+        submit_job(self, OPSCOPE[async_def['kernel']], payload, on_commit, on_cancel)
+        self.is_computing = True
+
+
+    def finish_async(self, result, op_clone_inputs, options, cache_key, interactive, commit):
+        self.is_processing = True
+        self.is_computing = False
+
+        with profile_scope('operator', self.get_node_tree().name, self.name, {'stage': 'commit'}):
+            (objects, preview_data) = commit(*op_clone_inputs, results=result, options=options)
+        self.store_result(objects, preview_data, cache_key)
+        self.finish_process(objects, preview_data, op_clone_inputs, cache_key, interactive)
 
         self.is_processing = False
 
+        # downstream nodes waited for this result
+        for next_node in next_nodes(self):
+            next_node.needs_processing = True
+            mark_dirty(next_node)
+        self._update()
+
+
+    def store_result(self, objects, preview_data, cache_key):
+        store_cache_entry(self, cache_key, objects, preview_data)
+        if cache_key and self.get_node_tree().use_disk_cache:
+            write_disk_entry(self.get_node_tree(), cache_key, objects, preview_data)
+
+
+    def finish_process(self, objects, preview_data, op_clone_inputs, cache_key, interactive):
+        tree_name = self.get_node_tree().name
+        outputstream_socket = self.get_first_outputstream_socket()
+
+        with profile_scope('cleanup', tree_name, self.name):
+            output_objects = self.get_items_from_stream_socket(outputstream_socket)
+
+            keep_output_objects = [obj for obj in output_objects if obj and not self.owns_object(obj)]
+            previous_objects = [obj for obj in output_objects if obj and self.owns_object(obj)]
+
+            for obj in objects:
+                obj['_pn_node_tag_'] = self.id
+
+            # delete clones
+            for op_clone_input in op_clone_inputs:
+                [delete_object(obj) for obj in op_clone_input if obj and not self.owns_object(obj)]
+
+            # previous outputs keep their identity, only the meshes are swapped
+            objects = recycle_outputs(self, previous_objects, objects)
+            count_reused_objects(self.get_node_tree(), len([obj for obj in objects if obj in previous_objects]))
+
+            for obj in objects:
+                obj.name = obj.name.replace('CLONE_', 'OUT_')
+                obj.color = self.output_color
+                if cache_key:
+                    obj['_pn_cache_key_'] = cache_key
+                elif '_pn_cache_key_' in obj:
+                    del obj['_pn_cache_key_']
+                # shade_smooth_operator([obj])
+
+            outputstream_keep_items = [obj.name for obj in keep_output_objects]
+            self.set_items_to_stream_socket(outputstream_socket, outputstream_keep_items + objects)
+
+        record_mesh_counts(tree_name, self.name, objects)
+
+        # keep the last full quality preview while dragging
+        with profile_scope('preview', tree_name, self.name):
+            if not interactive and not get_rendering_flag() and self.get_node_tree().show_preview and len(objects) > 0:
+                prev_obj = objects[0]
+                self.preview_name = copy_offscreen_to_image(obj_preview_name='PREVIEW_' + prev_obj.name, obj=prev_obj, preview_data=preview_data)
+            elif not interactive:
+                self.preview_name = ''
+
+        return objects
+
+
+    def finish_buffer_process(self, buffers=[]):
+        tree_name = self.get_node_tree().name
+        outputstream_socket = self.get_first_outputstream_socket()
+
+        with profile_scope('cleanup', tree_name, self.name):
+            output_objects = self.get_items_from_stream_socket(outputstream_socket)
+            keep_output_objects = [obj for obj in output_objects if obj and not self.owns_object(obj)]
+            previous_objects = [obj for obj in output_objects if obj and self.owns_object(obj)]
+            set_node_buffers(self, buffers)
+
+            if previous_objects and len(previous_objects) == len(buffers) and all(obj.type == 'MESH' and len(obj.modifiers) == 0 for obj in previous_objects):
+                # materialized before, refill the same objects in place
+                for obj, buffer in zip(previous_objects, buffers):
+                    self.refill_object(obj, buffer)
+                count_reused_objects(self.get_node_tree(), len(previous_objects))
+            else:
+                # meshes of the last run are stale, they are rebuilt only when needed
+                [release_object(self, obj) for obj in previous_objects]
+                self.set_items_to_stream_socket(outputstream_socket, keep_output_objects)
+
+        # group outputs read objects straight from the socket
+        if any(link.to_node.bl_idname == 'NodeGroupOutput' for link in outputstream_socket.links):
+            self.materialize_buffers()
+
+        record_buffer_counts(tree_name, self.name, buffers)
+        self.preview_name = ''
+
+
+    def materialize_buffers(self):
+        # build meshes from the buffers for display and object based consumers
+        buffers = get_node_buffers(self)
+        if buffers is None:
+            return
+
+        outputstream_socket = self.get_first_outputstream_socket()
+        output_objects = self.get_items_from_stream_socket(outputstream_socket)
+        if any(self.owns_object(obj) for obj in output_objects):
+            return
+
+        with profile_scope('cleanup', self.get_node_tree().name, self.name, {'stage': 'materialize'}):
+            objects = []
+            for buffer in buffers:
+                obj = buffer.to_object('OUT_' + buffer.name.replace('OUT_', ''), acquire_mesh(self))
+                obj['_pn_node_tag_'] = self.id
+                obj.color = self.output_color
+                objects.append(obj)
+            self.set_items_to_stream_socket(outputstream_socket, output_objects + objects)
+
+
+    def refill_object(self, obj, buffer):
+        mesh = obj.data
+        if mesh.users == 1:
+            mesh.clear_geometry()
+            mesh.materials.clear()
+            buffer.fill_mesh(mesh)
+        else:
+            # shared with another object, move to a mesh of our own
+            obj.data = buffer.fill_mesh(acquire_mesh(self))
+        obj.matrix_basis = buffer.matrix.tolist()
+
 
     def display(self, display_flag=False):
+        if display_flag or self.always_display:
+            self.materialize_buffers()
+            flush_node_session(self)
+            if has_stale_outputs(self):
+                # the chain took the bmesh, evaluate again to get real meshes
+                self.needs_processing = True
+                self._update()
+
         inputstream_socket = self.get_first_inputstream_socket()
         outputstream_socket = self.get_first_outputstream_socket()
         input_objects = self.get_items_from_stream_socket(inputstream_socket)
@@ -411,6 +876,14 @@ class BaseNode:
     def draw_buttons(self, context, layout):
         layout.separator()
 
+        if self.is_computing:
+            layout.label(text='Computing...', icon='SORTTIME')
+
+        tree_name = self.get_node_tree().name
+        if is_profiling(tree_name) and self.name in get_profile(tree_name)['nodes']:
+            stats = get_profile(tree_name)['nodes'][self.name]
+            layout.label(text='{:.1f} ms'.format(stats['process'] * 1000), icon='TIME')
+
         global PREVIEW_COLLECTIONS
 
         preview_name = self.preview_name
@@ -429,6 +902,10 @@ class BaseNode:
     def draw_buttons_ext(self, context, layout):
         layout.separator()
 
+        if self.is_cacheable():
+            stats = get_node_cache_stats(self)
+            layout.label(text='Cache hits: ' + str(stats['hits']) + '  misses: ' + str(stats['misses']))
+
 
     # Explicit user label overrides this, but here we can define a label dynamically
     def draw_label(self):
@@ -0,0 +1,317 @@
+# Headless PowerTree benchmark, the addon has to be enabled in the blender profile
+#
+#   blender -b scene.blend --python powernodes/benchmark.py -- --runs 5 --output result.json
+#   blender -b scene.blend --python powernodes/benchmark.py -- --runs 5 --baseline baseline.json --threshold 0.15
+#   blender -b --python powernodes/benchmark.py -- --runs 3 --expressions 300
+#   blender -b --python powernodes/benchmark.py -- --runs 3 --csg 48
+#
+# The exit code is 1 when a regression against the baseline is found.
+
+import bpy
+import bmesh
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+
+
+def find_addon_module(name):
+    # this file runs as a standalone script, reach the loaded addon through sys.modules
+    for module_name, module in sys.modules.items():
+        if module_name.endswith('powernodes.' + name):
+            return module
+    raise RuntimeError('Power Nodes addon is not enabled, module ' + name + ' not found')
+
+
+def parse_args(argv=[]):
+    argv = argv[argv.index('--') + 1:] if '--' in argv else []
+
+    parser = argparse.ArgumentParser(prog='benchmark.py', description='Evaluate every PowerTree of the loaded file and report timings')
+    parser.add_argument('--runs', type=int, default=5, help='full evaluations per tree')
+    parser.add_argument('--trees', nargs='*', default=[], help='only benchmark these trees')
+    parser.add_argument('--frames', action='store_true', help='sweep the scene frame range after the runs')
+    parser.add_argument('--frame-step', type=int, default=1, help='frame step of the sweep')
+    parser.add_argument('--use-cache', action='store_true', help='keep the node result cache enabled')
+    parser.add_argument('--output', default='', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--baseline', default='', help='compare against a stored JSON report')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown treated as regression')
+    parser.add_argument('--min-delta', type=float, default=0.001, help='absolute slowdown in seconds below which changes are ignored')
+    parser.add_argument('--expressions', type=int, default=0, help='time the expression presets on a grid with this many segments per side')
+    parser.add_argument('--csg', type=int, default=0, help='time both CSG engines on two overlapping spheres with this many segments')
+    return parser.parse_args(argv)
+
+
+def summarize(values=[]):
+    if not values:
+        return {'mean': 0.0, 'median': 0.0, 'min': 0.0, 'max': 0.0}
+    return {'mean': statistics.mean(values), 'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+
+
+# element domain of the expression presets, taken from the hint in their label
+PRESET_DOMAINS = {'Any': 'VERT', 'Vert': 'VERT', 'Edge': 'EDGE', 'Face': 'FACE'}
+
+
+def benchmark_expressions(args):
+    # per element cost of every preset, once through the per element path and once the way operators run it
+    parse = find_addon_module('parse')
+    sockets = find_addon_module('sockets')
+
+    me = bpy.data.meshes.new('pn_expression_benchmark')
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=args.expressions, y_segments=args.expressions, size=1.0)
+    bm.to_mesh(me)
+    obj = bpy.data.objects.new(me.name, me)
+
+    report = {}
+    try:
+        for expression, label, description in sorted(sockets.EXPRESSION_PRESETS):
+            domain = PRESET_DOMAINS[label[label.rfind('(') + 1:-1].split('/')[0]]
+            elements = getattr(bm, {'VERT': 'verts', 'EDGE': 'edges', 'FACE': 'faces'}[domain])
+            expression = expression or 'True'
+            timings = {}
+            for name, evaluate_func in [('per_element', parse.evaluate_expression_per_element), ('foreach', parse.evaluate_expression_foreach)]:
+                samples = []
+                for run in range(max(1, args.runs)):
+                    start = time.perf_counter()
+                    evaluate_func(elements, expression, obj, me, bm, domain)
+                    samples.append(time.perf_counter() - start)
+                timings[name + '_ns'] = min(samples) / len(elements) * 1e9
+            report[expression] = dict(timings, domain=domain, elements=len(elements))
+    finally:
+        bm.free()
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(me)
+
+    return report
+
+
+def csg_operand(segments, offset):
+    me = bpy.data.meshes.new('pn_csg_benchmark')
+    bm = bmesh.new()
+    size = {'radius' if bpy.app.version >= (3, 0, 0) else 'diameter': 1.0}
+    bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=segments // 2, **size)
+    bmesh.ops.translate(bm, vec=offset, verts=bm.verts)
+    bm.to_mesh(me)
+    bm.free()
+    return me
+
+
+def benchmark_csg(args):
+    # CSG engines alone, without the mesh conversion and the clean up of the operator
+    power = find_addon_module('operators.power')
+
+    target = csg_operand(args.csg, (0.0, 0.0, 0.0))
+    cutter = csg_operand(args.csg, (0.7, 0.3, 0.2))
+    report = {}
+    try:
+        (a_triangles, a_shared) = power.mesh_to_csg_triangles(target)
+        (b_triangles, b_shared) = power.mesh_to_csg_triangles(cutter, len(target.polygons))
+        engines = [
+            ('jitclass', power.bool_csg_mesh, power.csg_polygons_from_triangles, len),
+            ('soa', power.bool_csg_soa, power.csg_soa_from_triangles, lambda result: len(result[2])),
+        ]
+        for operation_type in ['DIFFERENCE', 'UNION', 'INTERSECT']:
+            timings = {'triangles': len(a_triangles) + len(b_triangles)}
+            for name, bool_func, load_func, count_func in engines:
+                a_polygons = load_func(a_triangles, a_shared)
+                b_polygons = load_func(b_triangles, b_shared)
+                # first call loads or compiles the engine
+                result = bool_func(a_polygons, b_polygons, operation_type)
+                samples = []
+                for run in range(max(1, args.runs)):
+                    start = time.perf_counter()
+                    result = bool_func(a_polygons, b_polygons, operation_type)
+                    samples.append(time.perf_counter() - start)
+                timings[name] = min(samples)
+                timings[name + '_polygons'] = count_func(result)
+            timings['speedup'] = timings['jitclass'] / timings['soa'] if timings['soa'] > 0 else 0.0
+            report[operation_type] = timings
+    finally:
+        bpy.data.meshes.remove(target)
+        bpy.data.meshes.remove(cutter)
+
+    return report
+
+
+def force_processing(node_tree):
+    for node in node_tree.nodes:
+        if hasattr(node, 'needs_processing'):
+            node.needs_processing = True
+    node_tree.rebuild_dirty_set()
+
+
+def evaluate(node_tree):
+    start = time.perf_counter()
+    node_tree.needs_update = True
+    node_tree.process()
+    return time.perf_counter() - start
+
+
+def output_sizes(node_tree):
+    sizes = {}
+    for node in node_tree.nodes:
+        if not hasattr(node, 'get_first_outputstream_socket'):
+            continue
+        objects = node.get_items_from_stream_socket(node.get_first_outputstream_socket())
+        meshes = [obj.data for obj in objects if obj.type == 'MESH']
+        sizes[node.name] = {'verts': sum(len(mesh.vertices) for mesh in meshes), 'faces': sum(len(mesh.polygons) for mesh in meshes)}
+    return sizes
+
+
+def benchmark_tree(node_tree, args, profiler):
+    runs = []
+    node_samples = {}
+    for run in range(args.runs):
+        force_processing(node_tree)
+        runs.append(evaluate(node_tree))
+
+        profile = profiler.get_profile(node_tree.name)
+        for node_name, stats in profile['nodes'].items():
+            if stats['evaluation'] == profile['evaluation']:
+                node_samples.setdefault(node_name, []).append(dict(stats))
+
+    sizes = output_sizes(node_tree)
+
+    nodes = {}
+    operators = {}
+    for node_name, samples in node_samples.items():
+        node = node_tree.nodes.get(node_name)
+        operator_key = (node.bl_idname + ':' + node.ops_type) if node else node_name
+        node_report = summarize([sample['process'] for sample in samples])
+        node_report['operator'] = operator_key
+        node_report['phases'] = {phase: statistics.mean(sample[phase] for sample in samples) for phase in profiler.PHASES}
+        node_report.update(sizes.get(node_name, {'verts': 0, 'faces': 0}))
+        nodes[node_name] = node_report
+
+        operator_report = operators.setdefault(operator_key, {'nodes': 0, 'mean': 0.0})
+        operator_report['nodes'] += 1
+        operator_report['mean'] += node_report['mean']
+
+    report = {'runs': runs, 'wall': summarize(runs), 'nodes': nodes, 'operators': operators}
+
+    if args.frames:
+        scene = bpy.context.scene
+        frames = {}
+        for frame in range(scene.frame_start, scene.frame_end + 1, max(1, args.frame_step)):
+            scene.frame_set(frame)
+            frames[str(frame)] = evaluate(node_tree)
+        scene.frame_set(scene.frame_start)
+        report['frames'] = frames
+        report['frames_wall'] = summarize(list(frames.values()))
+
+    return report
+
+
+def run_benchmark(args):
+    profiler = find_addon_module('profiler')
+    handlers = find_addon_module('handlers')
+    node_utils = find_addon_module('utils.node_utils')
+
+    node_trees = [node_tree for node_tree in node_utils.node_trees() if not args.trees or node_tree.name in args.trees]
+
+    report = {
+        'file': bpy.data.filepath,
+        'blender': bpy.app.version_string,
+        'runs': args.runs,
+        'trees': {},
+    }
+
+    # keep the depsgraph handler from evaluating trees behind our back
+    handlers.lock_processing()
+    tracemalloc.start()
+    try:
+        for node_tree in node_trees:
+            settings = {name: getattr(node_tree, name) for name in ['use_profiler', 'use_cache', 'show_preview', 'execution_mode']}
+            node_tree.use_profiler = True
+            node_tree.use_cache = args.use_cache
+            node_tree.show_preview = False
+            if node_tree.execution_mode == 'ASYNC':
+                # there is no timer loop in background mode to commit the jobs
+                node_tree.execution_mode = 'SYNC'
+
+            report['trees'][node_tree.name] = benchmark_tree(node_tree, args, profiler)
+            report['trees'][node_tree.name]['execution_mode'] = node_tree.execution_mode
+
+            for name, value in settings.items():
+                setattr(node_tree, name, value)
+    finally:
+        (current, peak) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        handlers.unlock_processing()
+
+    report['peak_python_memory'] = peak
+    if args.expressions > 0:
+        report['expressions'] = benchmark_expressions(args)
+    if args.csg > 0:
+        report['csg'] = benchmark_csg(args)
+    report['caches'] = profiler.get_cache_stats()
+    return report
+
+
+def is_slower(current, reference, threshold=0.1, min_delta=0.0):
+    return current > reference * (1.0 + threshold) and current - reference > min_delta
+
+
+def regression(path, reference, current):
+    return {'path': path, 'baseline': reference, 'current': current, 'ratio': current / reference if reference > 0 else float('inf')}
+
+
+def compare_trees(report, baseline, threshold=0.1, min_delta=0.001):
+    # tree wall times and the node medians of each tree
+    timings = []
+    for tree_name, tree_baseline in baseline.get('trees', {}).items():
+        tree_report = report['trees'].get(tree_name)
+        if tree_report is None:
+            continue
+        timings.append((tree_name, tree_report['wall']['median'], tree_baseline['wall']['median']))
+        timings += [(tree_name + '/' + node_name, tree_report['nodes'][node_name]['median'], node_baseline['median'])
+                    for node_name, node_baseline in tree_baseline.get('nodes', {}).items() if node_name in tree_report['nodes']]
+    return [regression(path, reference, current) for (path, current, reference) in timings if is_slower(current, reference, threshold, min_delta)]
+
+
+def compare_expressions(report, baseline, threshold=0.1):
+    # per element times in ns, the absolute threshold does not apply
+    expressions = report.get('expressions', {})
+    return [regression('expression/' + expression, expression_baseline['per_element_ns'] / 1e9, expressions[expression]['per_element_ns'] / 1e9)
+            for expression, expression_baseline in baseline.get('expressions', {}).items()
+            if expression in expressions and is_slower(expressions[expression]['per_element_ns'], expression_baseline['per_element_ns'], threshold)]
+
+
+def compare_csg(report, baseline, threshold=0.1, min_delta=0.001):
+    csg = report.get('csg', {})
+    return [regression('csg/' + operation_type, csg_baseline['soa'], csg[operation_type]['soa'])
+            for operation_type, csg_baseline in baseline.get('csg', {}).items()
+            if operation_type in csg and is_slower(csg[operation_type]['soa'], csg_baseline['soa'], threshold, min_delta)]
+
+
+def compare_reports(report, baseline, threshold=0.1, min_delta=0.001):
+    return compare_trees(report, baseline, threshold, min_delta) + compare_expressions(report, baseline, threshold) + compare_csg(report, baseline, threshold, min_delta)
+
+
+def main(argv=[]):
+    args = parse_args(argv)
+    report = run_benchmark(args)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_reports(report, baseline, args.threshold, args.min_delta)
+        report['regressions'] = regressions
+        for regression in regressions:
+            print('REGRESSION {}: {:.3g} ms -> {:.3g} ms ({:.0%})'.format(regression['path'], regression['baseline'] * 1000, regression['current'] * 1000, regression['ratio'] - 1.0))
+        exit_code = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
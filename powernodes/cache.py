@@ -0,0 +1,283 @@
+import bpy
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+
+# per node tree LRU of operator results, keyed by the content hash of the node inputs
+RESULT_CACHE = {}
+
+# per node tree hit/miss counters, keyed by node name
+CACHE_STATS = {}
+
+CACHE_PREFIX = '.pn_cache_'
+
+ATTRIBUTE_LAYOUT = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'BOOLEAN': ('value', 1, np.bool_),
+    'FLOAT2': ('vector', 2, np.float32),
+}
+
+
+def get_tree_cache(ng=None):
+    if ng.name not in RESULT_CACHE:
+        RESULT_CACHE[ng.name] = OrderedDict()
+    return RESULT_CACHE[ng.name]
+
+
+def get_node_cache_stats(node):
+    tree_stats = CACHE_STATS.setdefault(node.id_data.name, {})
+    return tree_stats.setdefault(node.name, {'hits': 0, 'misses': 0})
+
+
+def get_tree_cache_stats(ng=None):
+    tree_stats = CACHE_STATS.get(ng.name, {}) if ng else {}
+    cache = RESULT_CACHE.get(ng.name, {}) if ng else {}
+    return {
+        'hits': sum(stats['hits'] for stats in tree_stats.values()),
+        'misses': sum(stats['misses'] for stats in tree_stats.values()),
+        'entries': len(cache),
+        'size': sum(entry['size'] for entry in cache.values()),
+    }
+
+
+def count_cache_hit(node):
+    get_node_cache_stats(node)['hits'] += 1
+
+
+def count_cache_miss(node):
+    get_node_cache_stats(node)['misses'] += 1
+
+
+def hash_array(hasher, collection, attr, size, components=1, dtype=np.float32):
+    buffer = np.empty(size * components, dtype=dtype)
+    collection.foreach_get(attr, buffer)
+    hasher.update(buffer.tobytes())
+
+
+def hash_matrix(hasher, matrix):
+    hasher.update(np.array(matrix, dtype=np.float32).tobytes())
+
+
+def hash_mesh(hasher, mesh):
+    hasher.update(repr((len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons))).encode())
+    hash_array(hasher, mesh.vertices, 'co', len(mesh.vertices), 3)
+    hash_array(hasher, mesh.edges, 'vertices', len(mesh.edges), 2, np.int32)
+    hash_array(hasher, mesh.loops, 'vertex_index', len(mesh.loops), 1, np.int32)
+    hash_array(hasher, mesh.polygons, 'loop_start', len(mesh.polygons), 1, np.int32)
+    hash_array(hasher, mesh.polygons, 'material_index', len(mesh.polygons), 1, np.int32)
+    hash_array(hasher, mesh.polygons, 'use_smooth', len(mesh.polygons), 1, np.bool_)
+
+    for attribute in getattr(mesh, 'attributes', []):
+        if attribute.data_type not in ATTRIBUTE_LAYOUT:
+            return False
+        (attr, components, dtype) = ATTRIBUTE_LAYOUT[attribute.data_type]
+        hasher.update((attribute.name + attribute.domain + attribute.data_type).encode())
+        hash_array(hasher, attribute.data, attr, len(attribute.data), components, dtype)
+
+    for uv_layer in mesh.uv_layers:
+        hasher.update(uv_layer.name.encode())
+        hash_array(hasher, uv_layer.data, 'uv', len(uv_layer.data), 2)
+
+    for color_layer in mesh.vertex_colors:
+        hasher.update(color_layer.name.encode())
+        hash_array(hasher, color_layer.data, 'color', len(color_layer.data), 4)
+
+    hasher.update(repr([material.name if material else None for material in mesh.materials]).encode())
+    return True
+
+
+def hash_struct(hasher, struct, visited):
+    # hash all plain rna properties, follow object pointers
+    for prop in struct.bl_rna.properties:
+        if prop.identifier == 'rna_type' or prop.type == 'COLLECTION':
+            continue
+        value = getattr(struct, prop.identifier, None)
+        if prop.type == 'POINTER':
+            if isinstance(value, bpy.types.Object):
+                if not hash_object(hasher, value, visited):
+                    return False
+            elif isinstance(value, bpy.types.ID):
+                hasher.update(value.name.encode())
+            continue
+        if getattr(prop, 'is_array', False):
+            value = tuple(value)
+        hasher.update(repr(value).encode())
+    return True
+
+
+def hash_object(hasher, obj, visited=None):
+    visited = visited if visited is not None else set()
+    if obj.name in visited:
+        return True
+    visited.add(obj.name)
+
+    if obj.type != 'MESH' or obj.data.shape_keys:
+        return False
+
+    hasher.update(obj.name.encode())
+    hash_matrix(hasher, obj.matrix_world)
+    hash_matrix(hasher, obj.matrix_basis)
+    hash_matrix(hasher, obj.matrix_parent_inverse)
+
+    if not hash_mesh(hasher, obj.data):
+        return False
+
+    if len(obj.vertex_groups) > 0:
+        hasher.update(repr([group.name for group in obj.vertex_groups]).encode())
+        hasher.update(repr([(elem.group, elem.weight) for vert in obj.data.vertices for elem in vert.groups]).encode())
+
+    for modifier in obj.modifiers:
+        if not hash_struct(hasher, modifier, visited):
+            return False
+
+    return True
+
+
+def hash_option(hasher, value, visited):
+    if isinstance(value, bpy.types.Object):
+        return hash_object(hasher, value, visited)
+    if isinstance(value, bpy.types.ID):
+        hasher.update(value.name.encode())
+    elif isinstance(value, (str, int, float, bool)) or value is None:
+        hasher.update(repr(value).encode())
+    else:
+        try:
+            hasher.update(repr(tuple(value)).encode())
+        except TypeError:
+            return False
+    return True
+
+
+def calc_cache_key(node, op_inputs=[], options={}, context={}, source_key=None):
+    # context holds the scene values the node expressions read, e.g. the frame
+    # source_key stands for the first input when it is the stale output of an upstream chain node
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(node.bl_idname.encode())
+    if source_key is not None:
+        hasher.update(('<' + source_key).encode())
+
+    visited = set()
+    for op_input in op_inputs:
+        hasher.update(b'|')
+        for obj in op_input:
+            if not hash_object(hasher, obj, visited):
+                return None
+
+    for name in sorted(options.keys()):
+        hasher.update(name.encode())
+        if not hash_option(hasher, options[name], visited):
+            return None
+
+    for name in sorted(context.keys()):
+        hasher.update(('$' + name + repr(context[name])).encode())
+
+    return hasher.hexdigest()
+
+
+def estimate_mesh_size(mesh):
+    return len(mesh.vertices) * 32 + len(mesh.edges) * 16 + len(mesh.loops) * 16 + len(mesh.polygons) * 24
+
+
+def delete_cache_entry(entry):
+    for name in entry['objects']:
+        obj = bpy.data.objects.get(name)
+        if obj:
+            mesh = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+            if mesh and mesh.users == 0:
+                bpy.data.meshes.remove(mesh)
+
+
+def evict_cache_entries(ng=None, budget=0):
+    cache = get_tree_cache(ng)
+    size = sum(entry['size'] for entry in cache.values())
+    while cache and size > budget:
+        (key, entry) = cache.popitem(last=False)
+        size -= entry['size']
+        delete_cache_entry(entry)
+
+
+def lookup_cache_entry(ng=None, key=None):
+    if key is None:
+        return None
+    cache = get_tree_cache(ng)
+    entry = cache.get(key)
+    if entry is None:
+        return None
+
+    # stored objects are gone after undo or reload
+    if any(name not in bpy.data.objects for name in entry['objects']):
+        del cache[key]
+        delete_cache_entry(entry)
+        return None
+
+    cache.move_to_end(key)
+    return entry
+
+
+def store_cache_entry(node, key=None, objects=[], preview_data=None):
+    ng = node.id_data
+    if key is None or any(obj.type != 'MESH' for obj in objects):
+        return
+
+    budget = ng.cache_budget * 1024 * 1024
+    size = sum(estimate_mesh_size(obj.data) for obj in objects)
+    if size > budget:
+        return
+
+    cache = get_tree_cache(ng)
+    if key in cache:
+        delete_cache_entry(cache.pop(key))
+
+    evict_cache_entries(ng, budget - size)
+
+    stored_objects = []
+    for index, obj in enumerate(objects):
+        stored_obj = obj.copy()
+        stored_obj.data = obj.data.copy()
+        stored_obj.name = CACHE_PREFIX + key[:12] + '_' + str(index)
+        stored_obj['_pn_cache_key_'] = key
+        stored_objects.append(stored_obj.name)
+
+    cache[key] = {
+        'node': node.id,
+        'names': [obj.name for obj in objects],
+        'objects': stored_objects,
+        'preview_data': preview_data,
+        'size': size,
+    }
+
+
+def restore_cache_entry(entry):
+    objects = []
+    for name, stored_name in zip(entry['names'], entry['objects']):
+        stored_obj = bpy.data.objects[stored_name]
+        obj = stored_obj.copy()
+        obj.data = stored_obj.data.copy()
+        obj.name = name
+        objects.append(obj)
+    return objects
+
+
+def clear_node_cache(node):
+    cache = RESULT_CACHE.get(node.id_data.name, {})
+    for key in [key for key, entry in cache.items() if entry['node'] == node.id]:
+        delete_cache_entry(cache.pop(key))
+    CACHE_STATS.get(node.id_data.name, {}).pop(node.name, None)
+
+
+def clear_tree_cache(ng=None):
+    for entry in RESULT_CACHE.pop(ng.name, {}).values():
+        delete_cache_entry(entry)
+    CACHE_STATS.pop(ng.name, None)
+
+
+def clear_all_caches():
+    # called after load, stored objects are not saved with the file
+    RESULT_CACHE.clear()
+    CACHE_STATS.clear()
@@ -0,0 +1,227 @@
+import bpy
+import os
+import json
+import shutil
+import numpy as np
+from mathutils import Matrix
+
+from . cache import ATTRIBUTE_LAYOUT
+
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def get_cache_directory(ng=None):
+    directory = bpy.path.abspath(ng.cache_directory) if ng and ng.cache_directory else ''
+    if not directory:
+        directory = bpy.utils.user_resource('DATAFILES', path='power_nodes_cache', create=True)
+    return directory
+
+
+def get_entry_directory(ng=None, key=None):
+    return os.path.join(get_cache_directory(ng), key)
+
+
+def read_array(collection, attr, size, components=1, dtype=np.float32):
+    buffer = np.empty(size * components, dtype=dtype)
+    collection.foreach_get(attr, buffer)
+    return buffer
+
+
+def save_array(directory, file_name, array):
+    np.save(os.path.join(directory, file_name + '.npy'), array, allow_pickle=False)
+
+
+def load_array(directory, file_name):
+    # memory mapped, buffers are copied only when handed over to the mesh
+    return np.load(os.path.join(directory, file_name + '.npy'), mmap_mode='r', allow_pickle=False)
+
+
+def save_mesh(directory, prefix, mesh):
+    save_array(directory, prefix + 'co', read_array(mesh.vertices, 'co', len(mesh.vertices), 3))
+    save_array(directory, prefix + 'edges', read_array(mesh.edges, 'vertices', len(mesh.edges), 2, np.int32))
+    save_array(directory, prefix + 'loops', read_array(mesh.loops, 'vertex_index', len(mesh.loops), 1, np.int32))
+    save_array(directory, prefix + 'loop_edges', read_array(mesh.loops, 'edge_index', len(mesh.loops), 1, np.int32))
+    save_array(directory, prefix + 'loop_start', read_array(mesh.polygons, 'loop_start', len(mesh.polygons), 1, np.int32))
+    save_array(directory, prefix + 'loop_total', read_array(mesh.polygons, 'loop_total', len(mesh.polygons), 1, np.int32))
+    save_array(directory, prefix + 'material_index', read_array(mesh.polygons, 'material_index', len(mesh.polygons), 1, np.int32))
+    save_array(directory, prefix + 'use_smooth', read_array(mesh.polygons, 'use_smooth', len(mesh.polygons), 1, np.bool_))
+
+    attributes = []
+    for index, attribute in enumerate(getattr(mesh, 'attributes', [])):
+        if attribute.data_type not in ATTRIBUTE_LAYOUT:
+            continue
+        (attr, components, dtype) = ATTRIBUTE_LAYOUT[attribute.data_type]
+        save_array(directory, prefix + 'attr_' + str(index), read_array(attribute.data, attr, len(attribute.data), components, dtype))
+        attributes.append({'name': attribute.name, 'domain': attribute.domain, 'data_type': attribute.data_type, 'file': prefix + 'attr_' + str(index)})
+
+    uv_layers = []
+    for index, uv_layer in enumerate(mesh.uv_layers):
+        save_array(directory, prefix + 'uv_' + str(index), read_array(uv_layer.data, 'uv', len(uv_layer.data), 2))
+        uv_layers.append({'name': uv_layer.name, 'file': prefix + 'uv_' + str(index)})
+
+    return {
+        'attributes': attributes,
+        'uv_layers': uv_layers,
+        'materials': [material.name if material else None for material in mesh.materials],
+        'use_auto_smooth': getattr(mesh, 'use_auto_smooth', False),
+        'auto_smooth_angle': getattr(mesh, 'auto_smooth_angle', 0.0),
+    }
+
+
+def load_mesh(directory, prefix, mesh_desc, name='EMPTY_MESH'):
+    mesh = bpy.data.meshes.new(name)
+
+    co = load_array(directory, prefix + 'co')
+    edges = load_array(directory, prefix + 'edges')
+    loops = load_array(directory, prefix + 'loops')
+    loop_start = load_array(directory, prefix + 'loop_start')
+
+    mesh.vertices.add(len(co) // 3)
+    mesh.vertices.foreach_set('co', co)
+    mesh.edges.add(len(edges) // 2)
+    mesh.edges.foreach_set('vertices', edges)
+    mesh.loops.add(len(loops))
+    mesh.loops.foreach_set('vertex_index', loops)
+    # entries written before loop edges were stored get their edges rebuilt
+    has_loop_edges = os.path.isfile(os.path.join(directory, prefix + 'loop_edges.npy'))
+    if has_loop_edges:
+        mesh.loops.foreach_set('edge_index', load_array(directory, prefix + 'loop_edges'))
+    mesh.polygons.add(len(loop_start))
+    mesh.polygons.foreach_set('loop_start', loop_start)
+    mesh.polygons.foreach_set('loop_total', load_array(directory, prefix + 'loop_total'))
+    mesh.polygons.foreach_set('material_index', load_array(directory, prefix + 'material_index'))
+    mesh.polygons.foreach_set('use_smooth', load_array(directory, prefix + 'use_smooth'))
+
+    for attribute_desc in mesh_desc['attributes']:
+        attribute = mesh.attributes.get(attribute_desc['name'])
+        if attribute is None:
+            attribute = mesh.attributes.new(attribute_desc['name'], attribute_desc['data_type'], attribute_desc['domain'])
+        (attr, components, dtype) = ATTRIBUTE_LAYOUT[attribute_desc['data_type']]
+        attribute.data.foreach_set(attr, load_array(directory, attribute_desc['file']))
+
+    for uv_desc in mesh_desc['uv_layers']:
+        uv_layer = mesh.uv_layers.new(name=uv_desc['name'])
+        uv_layer.data.foreach_set('uv', load_array(directory, uv_desc['file']))
+
+    for material_name in mesh_desc['materials']:
+        mesh.materials.append(bpy.data.materials.get(material_name) if material_name else None)
+
+    if hasattr(mesh, 'use_auto_smooth'):
+        mesh.use_auto_smooth = mesh_desc['use_auto_smooth']
+        mesh.auto_smooth_angle = mesh_desc['auto_smooth_angle']
+
+    mesh.update(calc_edges=not has_loop_edges)
+    return mesh
+
+
+def write_disk_entry(ng=None, key=None, objects=[], preview_data=None):
+    directory = get_entry_directory(ng, key)
+    if os.path.isdir(directory):
+        return
+
+    # write to a temporary folder first so a crash never leaves a partial entry behind
+    tmp_directory = directory + '.tmp'
+    try:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+
+        manifest = {'key': key, 'objects': []}
+        for index, obj in enumerate(objects):
+            prefix = str(index) + '_'
+            manifest['objects'].append({
+                'name': obj.name,
+                'matrix_basis': [list(row) for row in obj.matrix_basis],
+                'mesh': save_mesh(tmp_directory, prefix, obj.data),
+            })
+
+        if preview_data:
+            for index, data in enumerate(preview_data):
+                save_array(tmp_directory, 'preview_' + str(index), np.asarray(data, dtype=np.float32))
+            manifest['preview_data'] = len(preview_data)
+
+        with open(os.path.join(tmp_directory, MANIFEST_NAME), 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        os.replace(tmp_directory, directory)
+    except Exception as e:
+        print('Failed to write disk cache entry: ', str(e))
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+
+    evict_disk_entries(ng, ng.disk_cache_budget * 1024 * 1024 if ng else 0)
+
+
+def read_disk_entry(ng=None, key=None):
+    if key is None:
+        return None
+
+    directory = get_entry_directory(ng, key)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        return None
+
+    # the manifest time orders entries for eviction, touch it on every hit
+    try:
+        os.utime(manifest_path)
+    except OSError:
+        pass
+
+    objects = []
+    try:
+        with open(manifest_path, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+
+        for index, obj_desc in enumerate(manifest['objects']):
+            mesh = load_mesh(directory, str(index) + '_', obj_desc['mesh'])
+            obj = bpy.data.objects.new(obj_desc['name'], mesh)
+            obj.matrix_basis = Matrix(obj_desc['matrix_basis'])
+            objects.append(obj)
+
+        preview_data = None
+        if 'preview_data' in manifest:
+            preview_data = [np.array(load_array(directory, 'preview_' + str(index))) for index in range(manifest['preview_data'])]
+    except Exception as e:
+        print('Failed to read disk cache entry: ', str(e))
+        for obj in objects:
+            mesh = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+            bpy.data.meshes.remove(mesh)
+        return None
+
+    return (objects, preview_data)
+
+
+def get_entry_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def evict_disk_entries(ng=None, budget=0):
+    # least recently used entries go first until the cache fits the budget, 0 keeps everything
+    directory = get_cache_directory(ng)
+    if budget <= 0 or not os.path.isdir(directory):
+        return
+
+    entries = []
+    for name in os.listdir(directory):
+        manifest_path = os.path.join(directory, name, MANIFEST_NAME)
+        if os.path.isfile(manifest_path):
+            path = os.path.join(directory, name)
+            entries.append((os.path.getmtime(manifest_path), get_entry_size(path), path))
+
+    total = sum(size for (mtime, size, path) in entries)
+    for (mtime, size, path) in sorted(entries):
+        if total <= budget:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def clear_disk_cache(ng=None):
+    directory = get_cache_directory(ng)
+    if not os.path.isdir(directory):
+        return
+
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isfile(os.path.join(path, MANIFEST_NAME)) or name.endswith('.tmp'):
+            shutil.rmtree(path, ignore_errors=True)
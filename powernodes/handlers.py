@@ -1,14 +1,18 @@
 import sys, time, traceback
 import bpy
 from bpy.app.handlers import persistent
-from mathutils import Vector, Matrix
+from mathutils import Vector
 
 import functools
 import queue
 
-from . utils.node_utils import node_trees, socket_for_object, node_for_object
+from . utils.node_utils import node_trees, socket_for_object, nodes_for_object, moved_objects, invalidate_object_index
 from . utils.utils import get_last_operation
 from . ops import initialize_default_collections, unlink_from_collection
+from . cache import clear_all_caches
+from . mesh_buffer import clear_all_buffers
+from . pool import clear_all_pools
+from . session import clear_all_sessions
 
 # import cProfile
 # profiler = cProfile.Profile()
@@ -104,23 +108,16 @@ def set_rendering_flag(flag):
 
 
 def check_for_updates(ctx, edg, node_group):
-    for update in edg.updates:
-        if not isinstance(update.id, bpy.types.Object):
-            continue
-
-        update_loc = False
-        if '_pn_matrix_world_' not in update.id.original:
-            update.id.original['_pn_matrix_world_'] = update.id.original.matrix_world.copy()
-        else:
-            if update.is_updated_transform and (Matrix(update.id.original['_pn_matrix_world_']) != update.id.original.matrix_world):
-                update.id.original['_pn_matrix_world_'] = update.id.original.matrix_world.copy()
-                update_loc = True
+    updates = [update for update in edg.updates if isinstance(update.id, bpy.types.Object)]
 
+    transformed = [update.id.original for update in updates if update.is_updated_transform]
+    moved = moved_objects(transformed, node_group)
+
+    for update in updates:
+        update_loc = update.id.original.as_pointer() in moved
         if update.is_updated_geometry or update_loc: # or update.is_updated_transform:
-            if isinstance(update.id, bpy.types.Object):
-                node = node_for_object(update.id.original, node_group)
-                if node:
-                    node.update_from_edg(ctx, edg)
+            for node in nodes_for_object(update.id.original, node_group):
+                node.update_from_edg(ctx, edg)
 
 
 @persistent
@@ -184,10 +181,20 @@ def load_update_handler_post(scene):
     # add default collections if they don't exist
     # initialize_default_collections()
 
+    clear_all_caches()
+    clear_all_buffers()
+    clear_all_pools()
+    clear_all_sessions()
+    invalidate_object_index()
+
+    # nodes with matching input keys hydrate their outputs from the disk cache when processed
     for node_group in node_trees():
         for node in node_group.nodes:
             if node.bl_idname not in ['NodeGroupInput', 'NodeGroupOutput']:
                 node.needs_processing = True
+                if hasattr(node, 'is_computing'):
+                    node.is_computing = False
+        node_group.rebuild_dirty_set()
 
 
 @persistent
@@ -208,7 +215,10 @@ def undo_update_handler_pre(scene):
 
 @persistent
 def undo_update_handler_post(scene):
-    pass
+    # undo reallocates datablocks, object pointers are stale
+    invalidate_object_index()
+    for node_group in node_trees():
+        node_group.rebuild_dirty_set()
 
 
 @persistent
@@ -218,6 +228,9 @@ def redo_update_handler_pre(scene):
 
 @persistent
 def redo_update_handler_post(scene):
+    invalidate_object_index()
+    for node_group in node_trees():
+        node_group.rebuild_dirty_set()
     # fix crash in redo
     bpy.context.view_layer.update()
 
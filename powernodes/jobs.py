@@ -0,0 +1,155 @@
+import bpy
+import os
+import time
+from bpy.app.handlers import persistent
+from concurrent.futures import ThreadPoolExecutor
+
+from . handlers import is_processing_locked, lock_processing, unlock_processing
+from . profiler import profile_scope
+
+
+# shared worker pool, kernels must not touch bpy data
+EXECUTOR = None
+
+# in-flight jobs keyed by (node tree name, node id)
+JOBS = {}
+
+# job generation per node, a newer submit makes older results stale
+GENERATIONS = {}
+
+POLL_INTERVAL = 0.05
+
+
+def get_executor():
+    global EXECUTOR
+    if EXECUTOR is None:
+        EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix='power_nodes')
+    return EXECUTOR
+
+
+def job_key(node):
+    return (node.id_data.name, node.id)
+
+
+def run_kernel(kernel, payload, tree_name='', node_name=''):
+    start = time.perf_counter()
+    with profile_scope('kernel', tree_name, node_name):
+        result = kernel(payload)
+    return (result, time.perf_counter() - start)
+
+
+def submit_job(node, kernel, payload, on_commit, on_cancel=None):
+    key = job_key(node)
+    cancel_job(node)
+
+    generation = GENERATIONS.get(key, 0) + 1
+    GENERATIONS[key] = generation
+
+    JOBS[key] = {
+        'generation': generation,
+        'future': get_executor().submit(run_kernel, kernel, payload, node.id_data.name, node.name),
+        'on_commit': on_commit,
+        'on_cancel': on_cancel,
+        'submitted': time.perf_counter(),
+    }
+
+    if not bpy.app.timers.is_registered(poll_jobs):
+        bpy.app.timers.register(poll_jobs, first_interval=POLL_INTERVAL)
+
+    return generation
+
+
+def cancel_job(node):
+    job = JOBS.pop(job_key(node), None)
+    if job is None:
+        return False
+
+    # a running kernel can't be interrupted, its result is dropped when it lands
+    job['future'].cancel()
+    GENERATIONS[job_key(node)] = job['generation'] + 1
+    if job['on_cancel']:
+        job['on_cancel']()
+    return True
+
+
+def cancel_all_jobs():
+    for key, job in list(JOBS.items()):
+        job['future'].cancel()
+        if job['on_cancel']:
+            job['on_cancel']()
+    JOBS.clear()
+    GENERATIONS.clear()
+
+
+def is_job_pending(node):
+    return job_key(node) in JOBS
+
+
+def has_pending_jobs(ng=None):
+    return any(key[0] == ng.name for key in JOBS.keys())
+
+
+def wait_for_jobs(nodes=[]):
+    # barrier for one scheduler level, commits in the given order
+    jobs = [(job_key(node), JOBS.pop(job_key(node))) for node in nodes if job_key(node) in JOBS]
+    if not jobs:
+        return (0.0, 0.0)
+
+    start = min(job['submitted'] for key, job in jobs)
+    for key, job in jobs:
+        job['future'].exception()
+    wall_time = time.perf_counter() - start
+
+    kernel_time = 0.0
+    for key, job in jobs:
+        kernel_time += commit_job(key, job) or 0.0
+
+    return (kernel_time, wall_time)
+
+
+def commit_job(key, job):
+    try:
+        (result, kernel_time) = job['future'].result()
+    except Exception as e:
+        print('Failed to run async job: ', str(e))
+        if job['on_cancel']:
+            job['on_cancel']()
+        return None
+
+    if GENERATIONS.get(key) != job['generation']:
+        return None
+
+    job['on_commit'](result)
+    return kernel_time
+
+
+def poll_jobs():
+    if is_processing_locked():
+        return POLL_INTERVAL
+
+    done = [(key, job) for key, job in JOBS.items() if job['future'].done()]
+    if done:
+        lock_processing()
+        for key, job in done:
+            JOBS.pop(key, None)
+            try:
+                commit_job(key, job)
+            except Exception as e:
+                print('Failed to commit async job: ', str(e))
+        unlock_processing()
+
+    return POLL_INTERVAL if JOBS else None
+
+
+@persistent
+def cancel_jobs_handler_pre(scene):
+    cancel_all_jobs()
+
+
+def register():
+    bpy.app.handlers.load_pre.append(cancel_jobs_handler_pre)
+
+
+def unregister():
+    bpy.app.handlers.load_pre.remove(cancel_jobs_handler_pre)
+    cancel_all_jobs()
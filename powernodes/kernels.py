@@ -0,0 +1,730 @@
+import bpy
+import os
+import re
+import ast
+import hashlib
+import importlib.util
+import numpy as np
+
+from . cache import ATTRIBUTE_LAYOUT
+from . disk_cache import read_array
+from . vectorize import is_synced, read_mesh_attribute, token_pattern, CONSTANTS, MESH_COLLECTIONS, NotVectorizable
+
+
+# compiled kernels by key, None marks expressions the translator or numba rejected
+KERNELS = {}
+
+# below this many elements a first compilation costs more than the per element path
+KERNEL_MIN_ELEMENTS = 10000
+
+KERNEL_DOMAINS = {'POINT': 'VERT', 'EDGE': 'EDGE', 'POLYGON': 'FACE', 'CORNER': 'LOOP'}
+
+# element fields and their kind per domain
+FIELDS = {
+    'VERT': {'co': 'VEC3', 'normal': 'VEC3', 'index': 'INT', 'select': 'BOOL', 'hide': 'BOOL', 'is_boundary': 'BOOL', 'is_wire': 'BOOL'},
+    'EDGE': {'index': 'INT', 'select': 'BOOL', 'hide': 'BOOL', 'seam': 'BOOL', 'is_boundary': 'BOOL', 'is_wire': 'BOOL', 'is_manifold': 'BOOL', 'length': 'FLOAT'},
+    'FACE': {'index': 'INT', 'normal': 'VEC3', 'center': 'VEC3', 'area': 'FLOAT', 'perimeter': 'FLOAT', 'select': 'BOOL', 'hide': 'BOOL', 'material_index': 'INT', 'smooth': 'BOOL'},
+    'LOOP': {'index': 'INT', 'is_convex': 'BOOL'},
+}
+
+# element methods answered by precomputed fields
+METHODS = {'calc_area': 'area', 'calc_perimeter': 'perimeter', 'calc_length': 'length', 'calc_center_median': 'center'}
+
+# single element references, domain of the referenced element
+REFERENCES = {'VERT': {}, 'EDGE': {}, 'FACE': {}, 'LOOP': {'vert': 'VERT', 'edge': 'EDGE', 'face': 'FACE'}}
+
+# element sequences stored as CSR adjacency, domain of the items
+SEQUENCES = {
+    'VERT': {'link_edges': 'EDGE', 'link_faces': 'FACE', 'link_loops': 'LOOP'},
+    'EDGE': {'verts': 'VERT', 'link_faces': 'FACE', 'link_loops': 'LOOP'},
+    'FACE': {'verts': 'VERT', 'edges': 'EDGE', 'loops': 'LOOP'},
+    'LOOP': {},
+}
+
+GLOBAL_KINDS = {'FRAME': 'INT', 'FSTART': 'INT', 'FEND': 'INT', 'FPS': 'INT', 'FPS_BASE': 'FLOAT', 'LEN': 'INT', 'LOC': 'VEC3', 'ROT': 'VEC3', 'SCA': 'VEC3'}
+
+# math functions numba compiles, result kind None keeps the argument kind
+FUNCTIONS = {
+    'sqrt': 'FLOAT', 'exp': 'FLOAT', 'log': 'FLOAT', 'log2': 'FLOAT', 'log10': 'FLOAT',
+    'sin': 'FLOAT', 'cos': 'FLOAT', 'tan': 'FLOAT', 'asin': 'FLOAT', 'acos': 'FLOAT', 'atan': 'FLOAT', 'atan2': 'FLOAT',
+    'sinh': 'FLOAT', 'cosh': 'FLOAT', 'tanh': 'FLOAT', 'hypot': 'FLOAT', 'fmod': 'FLOAT', 'copysign': 'FLOAT', 'fabs': 'FLOAT',
+    'radians': 'FLOAT', 'degrees': 'FLOAT', 'pow': 'FLOAT',
+    'floor': 'INT', 'ceil': 'INT', 'trunc': 'INT',
+    'isnan': 'BOOL', 'isinf': 'BOOL', 'isfinite': 'BOOL',
+}
+
+BUILTIN_KINDS = {'round': 'INT', 'int': 'INT', 'float': 'FLOAT', 'bool': 'BOOL', 'abs': None}
+
+OUTPUT_DTYPES = {'BOOL': 'np.bool_', 'INT': 'np.int64', 'FLOAT': 'np.float64'}
+
+BINARY_OPS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/', ast.FloorDiv: '//', ast.Mod: '%', ast.Pow: '**'}
+
+COMPARE_OPS = {ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>='}
+
+KERNEL_TEMPLATE = '''# generated from a power nodes expression, safe to delete
+import math
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, nogil=True)
+def _vlength(v):
+    s = 0.0
+    for k in range(v.shape[0]):
+        s += v[k] * v[k]
+    return math.sqrt(s)
+
+
+@njit(cache=True, parallel=True)
+def kernel(n, {args}):
+    out = np.empty({shape}, dtype={dtype})
+    for i in prange(n):
+{body}
+    return out
+'''
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def is_vector(kind):
+    return kind.startswith('VEC')
+
+
+def promote(left, right):
+    if is_vector(left) or is_vector(right):
+        raise NotCompilable('vector arithmetic')
+    if 'FLOAT' in [left, right]:
+        return 'FLOAT'
+    return 'INT' if 'INT' in [left, right] or left != right else left
+
+
+def indent(lines=[]):
+    return ['    ' + line for line in lines]
+
+
+class Translator:
+    """ Translates a $-expression into the statements and result of one prange iteration """
+
+    def __init__(self, domain, attribute_kinds={}):
+        self.domain = domain
+        self.attribute_kinds = attribute_kinds
+        # array and scalar arguments of the kernel, keyed by array key
+        self.arguments = {}
+        self.counter = 0
+
+
+    def argument(self, key):
+        if key not in self.arguments:
+            self.arguments[key] = 'a' + str(len(self.arguments)) + '_' + re.sub(r'\W', '_', key)
+        return self.arguments[key]
+
+
+    def fresh(self, prefix):
+        self.counter += 1
+        return prefix + str(self.counter)
+
+
+    def element_attribute(self, domain, index, name):
+        # field, reference or sequence of an element, returns (lines, src, kind)
+        if name in FIELDS[domain]:
+            return ([], self.argument(domain + '.' + name) + '[' + index + ']', FIELDS[domain][name])
+        if name in REFERENCES[domain]:
+            return ([], None, ('ELEM', REFERENCES[domain][name], self.argument(domain + '.' + name) + '[' + index + ']'))
+        if name in SEQUENCES[domain]:
+            return ([], None, ('SEQ', SEQUENCES[domain][name], self.argument(domain + '.' + name + '.offsets'), self.argument(domain + '.' + name + '.indices'), index))
+        raise NotCompilable(name)
+
+
+    def token(self, name):
+        if name == 'self':
+            return ([], None, ('ELEM', self.domain, 'i'))
+        if name == 'IDX':
+            return ([], 'i', 'INT')
+        if name in GLOBAL_KINDS:
+            return ([], self.argument(name), GLOBAL_KINDS[name])
+        if name in FIELDS[self.domain] or name in SEQUENCES[self.domain] or name in REFERENCES[self.domain]:
+            return self.element_attribute(self.domain, 'i', name)
+        if name in self.attribute_kinds:
+            return ([], self.argument('ATTR.' + name) + '[i]', self.attribute_kinds[name])
+        raise NotCompilable(name)
+
+
+    def value(self, node, env={}):
+        (lines, src, kind) = self.translate(node, env)
+        if src is None:
+            raise NotCompilable('element used as value')
+        return (lines, src, kind)
+
+
+    def sequence(self, node, env={}):
+        (lines, src, kind) = self.translate(node, env)
+        if not isinstance(kind, tuple) or kind[0] != 'SEQ':
+            raise NotCompilable('not a sequence')
+        return (lines, kind)
+
+
+    def loop_header(self, sequence, item):
+        (tag, domain, offsets, indices, index) = sequence
+        iterator = self.fresh('_j')
+        return ([
+            'for ' + iterator + ' in range(' + offsets + '[' + index + '], ' + offsets + '[' + index + ' + 1]):',
+            '    ' + item + ' = ' + indices + '[' + iterator + ']',
+        ], domain)
+
+
+    def translate(self, node, env={}):
+        """ Returns (statements, expression source, kind), kind is BOOL, INT, FLOAT, VECn or an element/sequence tuple """
+        name = type(node).__name__
+        # python 3.7 parses numbers and booleans into Num and NameConstant
+        name = 'Constant' if name in ['Num', 'NameConstant'] else name
+        if not hasattr(self, 'translate_' + name):
+            raise NotCompilable(name)
+        return getattr(self, 'translate_' + name)(node, env)
+
+
+    def translate_Constant(self, node, env={}):
+        value = node.value if hasattr(node, 'value') else node.n
+        if isinstance(value, bool):
+            return ([], repr(value), 'BOOL')
+        if isinstance(value, int):
+            return ([], repr(value), 'INT')
+        if isinstance(value, float):
+            return ([], repr(value), 'FLOAT')
+        raise NotCompilable('constant')
+
+
+    def translate_Name(self, node, env={}):
+        if node.id in env:
+            return env[node.id]
+        if node.id.startswith('_F_') and node.id.endswith('_'):
+            return self.token(node.id[3:-1])
+        if node.id in CONSTANTS:
+            return ([], repr(float(CONSTANTS[node.id])), 'FLOAT')
+        raise NotCompilable(node.id)
+
+
+    def translate_Attribute(self, node, env={}):
+        (lines, src, kind) = self.translate(node.value, env)
+        if isinstance(kind, tuple) and kind[0] == 'ELEM':
+            (attr_lines, attr_src, attr_kind) = self.element_attribute(kind[1], kind[2], node.attr)
+            return (lines + attr_lines, attr_src, attr_kind)
+        if isinstance(kind, str) and is_vector(kind):
+            if node.attr in ['x', 'y', 'z', 'w'] and 'xyzw'.index(node.attr) < int(kind[3:]):
+                return (lines, '(' + src + ')[' + str('xyzw'.index(node.attr)) + ']', 'FLOAT')
+            if node.attr == 'length':
+                return (lines, '_vlength(' + src + ')', 'FLOAT')
+        raise NotCompilable(node.attr)
+
+
+    def translate_Subscript(self, node, env={}):
+        (lines, src, kind) = self.value(node.value, env)
+        (index_lines, index_src, index_kind) = self.value(node.slice.value if type(node.slice).__name__ == 'Index' else node.slice, env)
+        if not is_vector(kind) or index_kind != 'INT':
+            raise NotCompilable('subscript')
+        return (lines + index_lines, '(' + src + ')[' + index_src + ']', 'FLOAT')
+
+
+    def translate_UnaryOp(self, node, env={}):
+        (lines, src, kind) = self.value(node.operand, env)
+        if isinstance(node.op, ast.Not):
+            if is_vector(kind):
+                raise NotCompilable('not')
+            return (lines, '(not ' + src + ')', 'BOOL')
+        if isinstance(node.op, (ast.USub, ast.UAdd)):
+            op = '-' if isinstance(node.op, ast.USub) else '+'
+            return (lines, '(' + op + src + ')', 'INT' if kind == 'BOOL' else kind)
+        raise NotCompilable('unary')
+
+
+    def translate_BinOp(self, node, env={}):
+        (left_lines, left, left_kind) = self.value(node.left, env)
+        (right_lines, right, right_kind) = self.value(node.right, env)
+        if type(node.op) not in BINARY_OPS:
+            raise NotCompilable('operator')
+        lines = left_lines + right_lines
+        src = '(' + left + ' ' + BINARY_OPS[type(node.op)] + ' ' + right + ')'
+        # mirror mathutils, vectors only add up and scale
+        if is_vector(left_kind) and left_kind == right_kind and isinstance(node.op, (ast.Add, ast.Sub)):
+            return (lines, src, left_kind)
+        if is_vector(left_kind) != is_vector(right_kind) and isinstance(node.op, ast.Mult):
+            return (lines, src, left_kind if is_vector(left_kind) else right_kind)
+        if is_vector(left_kind) and not is_vector(right_kind) and isinstance(node.op, ast.Div):
+            return (lines, src, left_kind)
+        kind = promote(left_kind, right_kind)
+        if isinstance(node.op, ast.Div):
+            kind = 'FLOAT'
+        return (lines, src, kind)
+
+
+    def translate_BoolOp(self, node, env={}):
+        values = [self.value(value, env) for value in node.values]
+        kinds = set(kind for (lines, src, kind) in values)
+        if len(kinds) != 1 or any(is_vector(kind) for kind in kinds):
+            raise NotCompilable('mixed boolean operands')
+        op = ' and ' if isinstance(node.op, ast.And) else ' or '
+        return ([line for (lines, src, kind) in values for line in lines], '(' + op.join(src for (lines, src, kind) in values) + ')', kinds.pop())
+
+
+    def translate_Compare(self, node, env={}):
+        operands = [self.value(operand, env) for operand in [node.left] + node.comparators]
+        if any(is_vector(kind) for (lines, src, kind) in operands) or any(type(op) not in COMPARE_OPS for op in node.ops):
+            raise NotCompilable('compare')
+        src = operands[0][1]
+        for op, (lines, operand, kind) in zip(node.ops, operands[1:]):
+            src += ' ' + COMPARE_OPS[type(op)] + ' ' + operand
+        return ([line for (lines, src_, kind) in operands for line in lines], '(' + src + ')', 'BOOL')
+
+
+    def translate_IfExp(self, node, env={}):
+        (test_lines, test, test_kind) = self.value(node.test, env)
+        (body_lines, body, body_kind) = self.value(node.body, env)
+        (orelse_lines, orelse, orelse_kind) = self.value(node.orelse, env)
+        if body_kind != orelse_kind:
+            raise NotCompilable('mixed branches')
+        return (test_lines + body_lines + orelse_lines, '(' + body + ' if ' + test + ' else ' + orelse + ')', body_kind)
+
+
+    def translate_Call(self, node, env={}):
+        return self.call(node, env)
+
+
+    def call(self, node, env={}):
+        if node.keywords:
+            raise NotCompilable('keywords')
+
+        if isinstance(node.func, ast.Attribute):
+            # element methods backed by fields, calc_area() and friends
+            (lines, src, kind) = self.translate(node.func.value, env)
+            if isinstance(kind, tuple) and kind[0] == 'ELEM' and node.func.attr in METHODS and not node.args:
+                (attr_lines, attr_src, attr_kind) = self.element_attribute(kind[1], kind[2], METHODS[node.func.attr])
+                return (lines + attr_lines, attr_src, attr_kind)
+            raise NotCompilable(node.func.attr)
+
+        if not isinstance(node.func, ast.Name):
+            raise NotCompilable('call')
+        name = node.func.id
+
+        if name == 'len' and len(node.args) == 1:
+            (lines, (tag, domain, offsets, indices, index)) = self.sequence(node.args[0], env)
+            return (lines, '(' + offsets + '[' + index + ' + 1] - ' + offsets + '[' + index + '])', 'INT')
+
+        if name == 'reduce' and len(node.args) == 3:
+            return self.reduce(node.args[0], node.args[1], node.args[2], env)
+
+        if name in ['sum', 'any', 'all'] and len(node.args) == 1 and isinstance(node.args[0], ast.GeneratorExp):
+            return self.generator(name, node.args[0], env)
+
+        return self.function(name, node.args, env)
+
+
+    def function(self, name, nodes, env={}):
+        # math functions and builtins over scalar arguments
+        args = [self.value(arg, env) for arg in nodes]
+        lines = [line for (arg_lines, src, kind) in args for line in arg_lines]
+        kinds = [kind for (arg_lines, src, kind) in args]
+        sources = ', '.join(src for (arg_lines, src, kind) in args)
+        if any(is_vector(kind) for kind in kinds):
+            raise NotCompilable(name)
+
+        if name in FUNCTIONS:
+            return (lines, 'math.' + name + '(' + sources + ')', FUNCTIONS[name])
+        if name in ['min', 'max'] and len(args) >= 2:
+            kind = kinds[0]
+            for other in kinds[1:]:
+                kind = promote(kind, other)
+            return (lines, name + '(' + sources + ')', kind)
+        if name in BUILTIN_KINDS and len(args) == 1:
+            return (lines, name + '(' + sources + ')', BUILTIN_KINDS[name] or kinds[0])
+        raise NotCompilable(name)
+
+
+    def reduce(self, function, sequence, initial, env={}):
+        if not isinstance(function, ast.Lambda) or len(function.args.args) != 2:
+            raise NotCompilable('reduce')
+        (sequence_lines, sequence_kind) = self.sequence(sequence, env)
+        (initial_lines, initial_src, initial_kind) = self.value(initial, env)
+
+        accumulator = self.fresh('_acc')
+        item = self.fresh('_e')
+        (header, domain) = self.loop_header(sequence_kind, item)
+        (acc_name, item_name) = [arg.arg for arg in function.args.args]
+        body_env = dict(env)
+        body_env[acc_name] = ([], accumulator, initial_kind)
+        body_env[item_name] = ([], None, ('ELEM', domain, item))
+        (body_lines, body_src, body_kind) = self.value(function.body, body_env)
+
+        if body_kind != initial_kind:
+            # numba unifies int and float accumulators, anything else is ambiguous
+            kind = promote(initial_kind, body_kind)
+            if kind != body_kind:
+                raise NotCompilable('reduce kinds')
+            initial_src = ('float(' if kind == 'FLOAT' else 'int(') + initial_src + ')'
+            (body_lines, body_src, body_kind) = self.value(function.body, dict(body_env, **{acc_name: ([], accumulator, kind)}))
+
+        lines = sequence_lines + initial_lines + [accumulator + ' = ' + initial_src] + header + indent(body_lines + [accumulator + ' = ' + body_src])
+        return (lines, accumulator, body_kind)
+
+
+    def generator(self, name, node, env={}):
+        if len(node.generators) != 1 or not isinstance(node.generators[0].target, ast.Name):
+            raise NotCompilable('generator')
+        comprehension = node.generators[0]
+        (sequence_lines, sequence_kind) = self.sequence(comprehension.iter, env)
+
+        result = self.fresh('_r')
+        item = self.fresh('_e')
+        (header, domain) = self.loop_header(sequence_kind, item)
+        body_env = dict(env)
+        body_env[comprehension.target.id] = ([], None, ('ELEM', domain, item))
+
+        conditions = [self.value(condition, body_env) for condition in comprehension.ifs]
+        (element_lines, element_src, element_kind) = self.value(node.elt, body_env)
+        if is_vector(element_kind):
+            raise NotCompilable(name)
+
+        if name == 'sum':
+            kind = 'FLOAT' if element_kind == 'FLOAT' else 'INT'
+            initial = '0.0' if kind == 'FLOAT' else '0'
+            step = [result + ' += ' + element_src]
+        elif name == 'any':
+            (kind, initial) = ('BOOL', 'False')
+            step = ['if ' + element_src + ':', '    ' + result + ' = True', '    break']
+        else:
+            (kind, initial) = ('BOOL', 'True')
+            step = ['if not ' + element_src + ':', '    ' + result + ' = False', '    break']
+
+        body = element_lines + step
+        for (condition_lines, condition_src, condition_kind) in reversed(conditions):
+            body = condition_lines + ['if ' + condition_src + ':'] + indent(body)
+
+        lines = sequence_lines + [result + ' = ' + initial] + header + indent(body)
+        return (lines, result, kind)
+
+
+# arrays read straight from the mesh, (collection, property, components, dtype)
+MESH_READS = {
+    'edges': ('edges', 'vertices', 2, np.int32),
+    'loop_vert': ('loops', 'vertex_index', 1, np.int32),
+    'loop_edge': ('loops', 'edge_index', 1, np.int32),
+    'loop_total': ('polygons', 'loop_total', 1, np.int32),
+    'loop_start': ('polygons', 'loop_start', 1, np.int32),
+    'VERT.co': ('vertices', 'co', 3, np.float32),
+    'VERT.normal': ('vertices', 'normal', 3, np.float32),
+    'VERT.select': ('vertices', 'select', 1, np.bool_),
+    'VERT.hide': ('vertices', 'hide', 1, np.bool_),
+    'EDGE.select': ('edges', 'select', 1, np.bool_),
+    'EDGE.hide': ('edges', 'hide', 1, np.bool_),
+    'EDGE.seam': ('edges', 'use_seam', 1, np.bool_),
+    'FACE.normal': ('polygons', 'normal', 3, np.float32),
+    'FACE.center': ('polygons', 'center', 3, np.float32),
+    'FACE.area': ('polygons', 'area', 1, np.float32),
+    'FACE.select': ('polygons', 'select', 1, np.bool_),
+    'FACE.hide': ('polygons', 'hide', 1, np.bool_),
+    'FACE.smooth': ('polygons', 'use_smooth', 1, np.bool_),
+    'FACE.material_index': ('polygons', 'material_index', 1, np.int32),
+}
+
+# derived arrays and the MeshTopology method building them, some methods build several keys at once
+TOPOLOGY_BUILDERS = {
+    'VERT.index': 'build_index',
+    'EDGE.index': 'build_index',
+    'FACE.index': 'build_index',
+    'LOOP.index': 'build_index',
+    'edge_faces': 'build_edge_faces',
+    'face_of_corner': 'build_corners',
+    'loop_face': 'build_corners',
+    'loop_next': 'build_corners',
+    'loop_prev': 'build_corners',
+    'EDGE.is_boundary': 'build_edge_flag',
+    'EDGE.is_wire': 'build_edge_flag',
+    'EDGE.is_manifold': 'build_edge_flag',
+    'EDGE.length': 'build_edge_length',
+    'VERT.is_boundary': 'build_vert_boundary',
+    'VERT.is_wire': 'build_vert_wire',
+    'FACE.perimeter': 'build_face_perimeter',
+    'LOOP.is_convex': 'build_loop_convex',
+    'LOOP.vert': 'build_loop_reference',
+    'LOOP.edge': 'build_loop_reference',
+    'LOOP.face': 'build_loop_reference',
+    'FACE.loops.offsets': 'build_face_loops',
+    'FACE.loops.indices': 'build_face_loops',
+    'FACE.verts.offsets': 'build_face_offsets',
+    'FACE.edges.offsets': 'build_face_offsets',
+    'FACE.verts.indices': 'build_face_indices',
+    'FACE.edges.indices': 'build_face_indices',
+    'EDGE.verts.offsets': 'build_edge_verts',
+    'EDGE.verts.indices': 'build_edge_verts',
+    'VERT.link_edges.offsets': 'build_links',
+    'VERT.link_edges.indices': 'build_links',
+    'VERT.link_faces.offsets': 'build_links',
+    'VERT.link_faces.indices': 'build_links',
+    'VERT.link_loops.offsets': 'build_links',
+    'VERT.link_loops.indices': 'build_links',
+    'EDGE.link_faces.offsets': 'build_links',
+    'EDGE.link_faces.indices': 'build_links',
+    'EDGE.link_loops.offsets': 'build_links',
+    'EDGE.link_loops.indices': 'build_links',
+}
+
+
+def csr(keys, values, count):
+    # group values by key, offsets[k]:offsets[k + 1] spans the items of key k
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=count), out=offsets[1:])
+    return (offsets, np.ascontiguousarray(values[order], dtype=np.int64))
+
+
+class MeshTopology:
+    """ Flat arrays and CSR adjacency of a mesh, each one built on first use """
+
+    def __init__(self, me):
+        self.me = me
+        self.arrays = {}
+
+
+    def __getitem__(self, key):
+        if key not in self.arrays:
+            self.build(key)
+        return self.arrays[key]
+
+
+    def read(self, collection, attr, components=1, dtype=np.float32):
+        items = getattr(self.me, collection)
+        data = read_array(items, attr, len(items), components, dtype)
+        data = data.reshape(-1, components) if components > 1 else data
+        return data.astype(np.float64) if dtype == np.float32 else data.astype(np.int64) if dtype == np.int32 else data
+
+
+    def build(self, key):
+        if key in MESH_READS:
+            self.arrays[key] = self.read(*MESH_READS[key])
+        elif key in TOPOLOGY_BUILDERS:
+            getattr(self, TOPOLOGY_BUILDERS[key])(key)
+        else:
+            raise NotCompilable(key)
+
+
+    def build_index(self, key):
+        domain = key.split('.', 1)[0]
+        self.arrays[key] = np.arange(len(getattr(self.me, {'VERT': 'vertices', 'EDGE': 'edges', 'FACE': 'polygons', 'LOOP': 'loops'}[domain])), dtype=np.int64)
+
+
+    def build_edge_faces(self, key):
+        self.arrays[key] = np.bincount(self['loop_edge'], minlength=len(self.me.edges))
+
+
+    def build_corners(self, key):
+        # corners in face order, corner j belongs to face face_of_corner[j]
+        total = self['loop_total']
+        (offsets, indices) = (self['FACE.loops.offsets'], self['FACE.loops.indices'])
+        face_of_corner = np.repeat(np.arange(len(total)), total)
+        position = np.arange(len(indices)) - offsets[face_of_corner]
+        loop_face = np.empty(len(indices), dtype=np.int64)
+        loop_face[indices] = face_of_corner
+        loop_next = np.empty(len(indices), dtype=np.int64)
+        loop_next[indices] = indices[offsets[face_of_corner] + (position + 1) % total[face_of_corner]]
+        loop_prev = np.empty(len(indices), dtype=np.int64)
+        loop_prev[indices] = indices[offsets[face_of_corner] + (position - 1) % total[face_of_corner]]
+        self.arrays.update({'face_of_corner': face_of_corner, 'loop_face': loop_face, 'loop_next': loop_next, 'loop_prev': loop_prev})
+
+
+    def build_edge_flag(self, key):
+        # boundary edges have one face, wire edges none and manifold edges two
+        self.arrays[key] = self['edge_faces'] == {'EDGE.is_boundary': 1, 'EDGE.is_wire': 0, 'EDGE.is_manifold': 2}[key]
+
+
+    def build_edge_length(self, key):
+        co = self['VERT.co']
+        edges = self['edges']
+        self.arrays[key] = np.linalg.norm(co[edges[:, 1]] - co[edges[:, 0]], axis=1)
+
+
+    def build_vert_boundary(self, key):
+        self.arrays[key] = np.bincount(self['edges'][self['EDGE.is_boundary']].ravel(), minlength=len(self.me.vertices)) > 0
+
+
+    def build_vert_wire(self, key):
+        edge_count = np.bincount(self['edges'].ravel(), minlength=len(self.me.vertices))
+        wire_count = np.bincount(self['edges'][self['EDGE.is_wire']].ravel(), minlength=len(self.me.vertices))
+        self.arrays[key] = (edge_count > 0) & (wire_count == edge_count)
+
+
+    def build_face_perimeter(self, key):
+        self.arrays[key] = np.bincount(self['loop_face'], weights=self['EDGE.length'][self['loop_edge']], minlength=len(self.me.polygons))
+
+
+    def build_loop_convex(self, key):
+        # same test as BM_loop_is_convex
+        co = self['VERT.co']
+        loop_vert = self['loop_vert']
+        corner = co[loop_vert]
+        normal = np.cross(co[loop_vert[self['loop_next']]] - corner, co[loop_vert[self['loop_prev']]] - corner)
+        self.arrays[key] = (normal * self['FACE.normal'][self['loop_face']]).sum(axis=1) > 0.0
+
+
+    def build_loop_reference(self, key):
+        self.arrays[key] = self['loop_' + key.split('.', 1)[1]]
+
+
+    def build_face_loops(self, key):
+        total = self['loop_total']
+        offsets = np.zeros(len(total) + 1, dtype=np.int64)
+        np.cumsum(total, out=offsets[1:])
+        self.arrays['FACE.loops.offsets'] = offsets
+        self.arrays['FACE.loops.indices'] = np.repeat(self['loop_start'] - offsets[:-1], total) + np.arange(offsets[-1])
+
+
+    def build_face_offsets(self, key):
+        self.arrays[key] = self['FACE.loops.offsets']
+
+
+    def build_face_indices(self, key):
+        self.arrays[key] = self[{'FACE.verts.indices': 'loop_vert', 'FACE.edges.indices': 'loop_edge'}[key]][self['FACE.loops.indices']]
+
+
+    def build_edge_verts(self, key):
+        self.arrays['EDGE.verts.offsets'] = np.arange(0, 2 * len(self.me.edges) + 1, 2, dtype=np.int64)
+        self.arrays['EDGE.verts.indices'] = np.ascontiguousarray(self['edges'].ravel())
+
+
+    def build_links(self, key):
+        # (keys, values, key count) grouped into CSR
+        me = self.me
+        (domain, sequence) = key.split('.')[:2]
+        pairs = {
+            'VERT.link_edges': lambda: (self['edges'].ravel(), np.repeat(np.arange(len(me.edges)), 2), len(me.vertices)),
+            'VERT.link_faces': lambda: (self['loop_vert'], self['loop_face'], len(me.vertices)),
+            'VERT.link_loops': lambda: (self['loop_vert'], np.arange(len(me.loops)), len(me.vertices)),
+            'EDGE.link_faces': lambda: (self['loop_edge'], self['loop_face'], len(me.edges)),
+            'EDGE.link_loops': lambda: (self['loop_edge'], np.arange(len(me.loops)), len(me.edges)),
+        }[domain + '.' + sequence]()
+        (offsets, indices) = csr(*pairs)
+        self.arrays[domain + '.' + sequence + '.offsets'] = offsets
+        self.arrays[domain + '.' + sequence + '.indices'] = indices
+
+
+def get_kernel_directory():
+    return bpy.utils.user_resource('DATAFILES', path='power_nodes_kernels', create=True)
+
+
+def load_kernel(key, source):
+    # numba caches compiled functions next to their source file, a stable file keeps the cache across sessions
+    module_name = 'pn_kernel_' + key
+    file_path = os.path.join(get_kernel_directory(), module_name + '.py')
+    if not os.path.isfile(file_path):
+        with open(file_path, 'w') as kernel_file:
+            kernel_file.write(source)
+
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.kernel
+
+
+def kernel_attributes(attribute_layers=[]):
+    """ Attributes a kernel can read, by name, and their kinds """
+    attributes = {attr: (attribute_domain, data_type) for (attr, layer, attribute_domain, data_type) in attribute_layers if data_type in ATTRIBUTE_LAYOUT}
+    attribute_kinds = {}
+    for attr, (attribute_domain, data_type) in attributes.items():
+        (layout_attr, components, dtype) = ATTRIBUTE_LAYOUT[data_type]
+        attribute_kinds[attr] = 'VEC' + str(components) if components > 1 else {'INT': 'INT', 'BOOLEAN': 'BOOL'}.get(data_type, 'FLOAT')
+    return (attributes, attribute_kinds)
+
+
+def parse_kernel_expression(expression):
+    try:
+        return ast.parse(token_pattern.sub(lambda match: '_F_' + match.group(1) + '_', expression).strip(), mode='eval')
+    except SyntaxError:
+        return None
+
+
+def kernel_key(tree, kernel_domain, attribute_kinds={}):
+    # normalized expression, domain and input types identify the kernel
+    signature = ast.dump(tree) + kernel_domain + repr(sorted(attribute_kinds.items()))
+    return hashlib.sha1(signature.encode('utf-8')).hexdigest()[:16]
+
+
+def kernel_source(translator, tree):
+    """ Module source of the kernel, raises NotCompilable """
+    (lines, src, kind) = translator.value(tree.body)
+    if is_vector(kind):
+        (shape, dtype, store) = ('(n, ' + kind[3:] + ')', 'np.float64', 'out[i, :] = ')
+    else:
+        (shape, dtype, store) = ('n', OUTPUT_DTYPES[kind], 'out[i] = ')
+    body = '\n'.join(indent(indent(lines + [store + src])))
+    return KERNEL_TEMPLATE.format(args=', '.join(translator.arguments.values()), shape=shape, dtype=dtype, body=body)
+
+
+def gather_arguments(translator, obj, me, attributes, size):
+    """ Kernel arguments in the order the translator collected them """
+    topology = MeshTopology(me)
+    scene = bpy.context.scene
+    global_values = {
+        'FRAME': scene.frame_current,
+        'FSTART': scene.frame_start,
+        'FEND': scene.frame_end,
+        'FPS': scene.render.fps,
+        'FPS_BASE': float(scene.render.fps_base),
+        'LEN': size,
+        'LOC': np.array(obj.location, dtype=np.float64),
+        'ROT': np.array(obj.rotation_euler, dtype=np.float64),
+        'SCA': np.array(obj.scale, dtype=np.float64),
+    }
+
+    values = []
+    for argument_key in translator.arguments:
+        if argument_key in global_values:
+            values.append(global_values[argument_key])
+        elif argument_key.startswith('ATTR.'):
+            name = argument_key[5:]
+            (attribute_domain, data_type) = attributes[name]
+            values.append(np.ascontiguousarray(read_mesh_attribute(me, name, attribute_domain, data_type, size)))
+        else:
+            values.append(np.ascontiguousarray(topology[argument_key]))
+    return values
+
+
+def get_kernel(key, source):
+    if KERNELS.get(key) is None:
+        KERNELS[key] = load_kernel(key, source)
+    return KERNELS[key]
+
+
+def evaluate_expression_compiled(elements, expression, obj, me, bm, domain, attribute_layers=[]):
+    """ Evaluate an expression with a numba kernel over the mesh arrays, None when it has to run per element """
+    if domain not in KERNEL_DOMAINS or '`' in expression or '$(' in expression:
+        return None
+
+    # no elements, the mesh itself is evaluated
+    size = len(elements) if elements is not None else len(getattr(me, MESH_COLLECTIONS[domain]))
+    if not is_synced(me, bm, domain, size):
+        return None
+
+    kernel_domain = KERNEL_DOMAINS[domain]
+    (attributes, attribute_kinds) = kernel_attributes(attribute_layers)
+    tree = parse_kernel_expression(expression)
+    if tree is None:
+        return None
+
+    key = kernel_key(tree, kernel_domain, attribute_kinds)
+    if KERNELS.get(key, True) is None:
+        return None
+    if key not in KERNELS and size < KERNEL_MIN_ELEMENTS:
+        return None
+
+    try:
+        translator = Translator(kernel_domain, attribute_kinds)
+        source = kernel_source(translator, tree)
+        values = gather_arguments(translator, obj, me, attributes, size)
+        return get_kernel(key, source)(size, *values).tolist()
+    except (NotCompilable, NotVectorizable):
+        KERNELS[key] = None
+        return None
+    except Exception as e:
+        # typing errors, or errors the per element path raises again
+        print('Expression kernel failed, evaluating per element: ', str(e))
+        KERNELS[key] = None
+        return None
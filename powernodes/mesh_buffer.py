@@ -0,0 +1,174 @@
+import bpy
+import numpy as np
+
+from . cache import ATTRIBUTE_LAYOUT
+from . disk_cache import read_array
+
+
+# node outputs kept as buffers, keyed by (node tree name, node id)
+BUFFERS = {}
+
+# polygon fields stored with the FACE attributes
+FACE_FIELDS = {
+    'material_index': np.int32,
+    'use_smooth': np.bool_,
+}
+
+DOMAINS = ['POINT', 'EDGE', 'FACE', 'CORNER']
+
+
+def freeze(array):
+    # buffers are shared between nodes, operators replace arrays instead of writing into them
+    array.flags.writeable = False
+    return array
+
+
+class MeshBuffer:
+    """ Mesh geometry in contiguous numpy arrays, flows between nodes without bpy datablocks """
+
+    def __init__(self, name='', positions=None, edges=None, loops=None, loop_start=None, loop_total=None,
+                 attributes=None, matrix=None, materials=None, original=None, color=(1.0, 1.0, 1.0, 1.0)):
+        self.name = name
+        self.positions = freeze(np.zeros((0, 3), dtype=np.float32) if positions is None else positions)
+        self.edges = freeze(np.zeros((0, 2), dtype=np.int32) if edges is None else edges)
+        self.loops = freeze(np.zeros(0, dtype=np.int32) if loops is None else loops)
+        self.loop_start = freeze(np.zeros(0, dtype=np.int32) if loop_start is None else loop_start)
+        self.loop_total = freeze(np.zeros(0, dtype=np.int32) if loop_total is None else loop_total)
+        # {domain: {name: (data_type, array)}}, uv maps are CORNER attributes of type 'UV'
+        self.attributes = attributes if attributes is not None else {domain: {} for domain in DOMAINS}
+        self.matrix = freeze(np.identity(4, dtype=np.float32) if matrix is None else matrix)
+        self.materials = materials or []
+        self.original = original
+        self.color = tuple(color)
+
+
+    @classmethod
+    def from_object(cls, obj):
+        # evaluated geometry needs the depsgraph, leave those objects to the object path
+        if obj.type != 'MESH' or len(obj.modifiers) > 0 or obj.data.shape_keys:
+            return None
+
+        mesh = obj.data
+        attributes = {domain: {} for domain in DOMAINS}
+        for field, dtype in FACE_FIELDS.items():
+            attributes['FACE'][field] = (field, freeze(read_array(mesh.polygons, field, len(mesh.polygons), 1, dtype)))
+
+        for attribute in getattr(mesh, 'attributes', []):
+            if attribute.data_type not in ATTRIBUTE_LAYOUT or attribute.domain not in attributes or attribute.name in FACE_FIELDS:
+                continue
+            (attr, components, dtype) = ATTRIBUTE_LAYOUT[attribute.data_type]
+            data = read_array(attribute.data, attr, len(attribute.data), components, dtype)
+            attributes[attribute.domain][attribute.name] = (attribute.data_type, freeze(data.reshape(-1, components) if components > 1 else data))
+
+        for uv_layer in mesh.uv_layers:
+            if uv_layer.name not in attributes['CORNER']:
+                attributes['CORNER'][uv_layer.name] = ('UV', freeze(read_array(uv_layer.data, 'uv', len(uv_layer.data), 2).reshape(-1, 2)))
+
+        return cls(
+            name=obj.name,
+            positions=read_array(mesh.vertices, 'co', len(mesh.vertices), 3).reshape(-1, 3),
+            edges=read_array(mesh.edges, 'vertices', len(mesh.edges), 2, np.int32).reshape(-1, 2),
+            loops=read_array(mesh.loops, 'vertex_index', len(mesh.loops), 1, np.int32),
+            loop_start=read_array(mesh.polygons, 'loop_start', len(mesh.polygons), 1, np.int32),
+            loop_total=read_array(mesh.polygons, 'loop_total', len(mesh.polygons), 1, np.int32),
+            attributes=attributes,
+            matrix=np.array(obj.matrix_basis, dtype=np.float32),  # row major
+            materials=[material.name if material else None for material in mesh.materials],
+            original=obj.pn_original.name if obj.pn_original else obj.name,
+            color=obj.color,
+        )
+
+
+    def copy(self, **changes):
+        # shallow, unchanged arrays are shared with the source buffer
+        attributes = {domain: dict(layers) for domain, layers in self.attributes.items()}
+        buffer = MeshBuffer(self.name, self.positions, self.edges, self.loops, self.loop_start, self.loop_total,
+                            attributes, self.matrix, list(self.materials), self.original, self.color)
+        for name, value in changes.items():
+            setattr(buffer, name, freeze(value) if isinstance(value, np.ndarray) else value)
+        return buffer
+
+
+    def set_attribute(self, domain, name, data_type, array):
+        self.attributes[domain][name] = (data_type, freeze(array))
+
+
+    @property
+    def nbytes(self):
+        arrays = [self.positions, self.edges, self.loops, self.loop_start, self.loop_total]
+        arrays.extend(array for layers in self.attributes.values() for (data_type, array) in layers.values())
+        return sum(array.nbytes for array in arrays)
+
+
+    def to_mesh(self, name='EMPTY_MESH'):
+        return self.fill_mesh(bpy.data.meshes.new(name))
+
+
+    def fill_mesh(self, mesh):
+        # mesh has to be empty, recycled meshes are cleared by the pool
+        mesh.vertices.add(len(self.positions))
+        mesh.vertices.foreach_set('co', self.positions.ravel())
+        mesh.edges.add(len(self.edges))
+        mesh.edges.foreach_set('vertices', self.edges.ravel())
+        mesh.loops.add(len(self.loops))
+        mesh.loops.foreach_set('vertex_index', self.loops)
+        mesh.polygons.add(len(self.loop_start))
+        mesh.polygons.foreach_set('loop_start', self.loop_start)
+        mesh.polygons.foreach_set('loop_total', self.loop_total)
+
+        for domain, layers in self.attributes.items():
+            for attribute_name, (data_type, array) in layers.items():
+                if domain == 'FACE' and attribute_name in FACE_FIELDS:
+                    mesh.polygons.foreach_set(attribute_name, array)
+                elif data_type == 'UV':
+                    uv_layer = mesh.uv_layers.new(name=attribute_name)
+                    uv_layer.data.foreach_set('uv', array.ravel())
+                else:
+                    attribute = mesh.attributes.get(attribute_name) or mesh.attributes.new(attribute_name, data_type, domain)
+                    attribute.data.foreach_set(ATTRIBUTE_LAYOUT[data_type][0], array.ravel())
+
+        for material_name in self.materials:
+            mesh.materials.append(bpy.data.materials.get(material_name) if material_name else None)
+
+        # buffers carry no loop edges, existing edges keep their order and loops get linked to them
+        mesh.update(calc_edges=True)
+        return mesh
+
+
+    def to_object(self, name='', mesh=None):
+        obj = bpy.data.objects.new(name or self.name, self.fill_mesh(mesh) if mesh else self.to_mesh())
+        obj.matrix_basis = self.matrix.tolist()
+        obj.color = self.color
+        if self.original and self.original in bpy.data.objects:
+            obj.pn_original = bpy.data.objects[self.original]
+        return obj
+
+
+def buffers_from_objects(objects=[]):
+    buffers = [MeshBuffer.from_object(obj) for obj in objects]
+    return None if any(buffer is None for buffer in buffers) else buffers
+
+
+def buffer_key(node):
+    return (node.id_data.name, node.id)
+
+
+def get_node_buffers(node):
+    return BUFFERS.get(buffer_key(node))
+
+
+def set_node_buffers(node, buffers=[]):
+    BUFFERS[buffer_key(node)] = buffers
+
+
+def clear_node_buffers(node):
+    return BUFFERS.pop(buffer_key(node), None) is not None
+
+
+def get_tree_buffer_stats(ng=None):
+    buffers = [buffer for key, node_buffers in BUFFERS.items() if key[0] == ng.name for buffer in node_buffers]
+    return {'buffers': len(buffers), 'size': sum(buffer.nbytes for buffer in buffers)}
+
+
+def clear_all_buffers():
+    BUFFERS.clear()
@@ -4,7 +4,7 @@ from mathutils import Vector
 import nodeitems_utils
 
 from . base_node import BaseNode
-from . node_tree import PowerTree
+from . node_tree import PowerTree, next_nodes, mark_dirty
 from . utils.utils import context_override
 from . utils.node_utils import get_active_node_path, get_active_node_group
 
@@ -78,6 +78,12 @@ class PowerGroupNode(NodeCustomGroup, BaseNode):
         if self.node_tree:
             self.mirror_from_incoming()
             self.mirror_input_sockets_across()
+            # the group inputs changed, dirty whatever reads them inside
+            for node in self.node_tree.nodes:
+                if node.bl_idname == 'NodeGroupInput':
+                    for next_node in next_nodes(node):
+                        next_node.needs_processing = True
+                        mark_dirty(next_node)
             self.node_tree.process()
             self.mirror_output_sockets_across()
 
@@ -62,6 +62,7 @@ def register_dynamic_class(class_name, class_label, base_class, ops_type, module
         # methods
         'update_from_op_type': lambda self, socket, context: update_from_op_type(self, socket, context, module),
         'process': lambda self: process(self, module, operators),
+        'get_definition': lambda self: module['definition'].get(self.ops_type, {}),
     })
 
     DYNAMIC_CLASSES.append(DynamicClass)
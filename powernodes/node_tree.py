@@ -1,42 +1,411 @@
 import bpy
-from bpy.props import StringProperty, BoolProperty, FloatVectorProperty, IntProperty
+import re
+from bpy.props import StringProperty, BoolProperty, FloatVectorProperty, IntProperty, FloatProperty, EnumProperty
 from bpy.types import NodeTree, NodeSocket, NodeSocketStandard
 
+from . throttle import record_evaluation
+from . jobs import wait_for_jobs
+from . profiler import begin_evaluation, profile_scope, PROFILER_SORT_TYPE
+from . parse import extract_tokens
+from . session import has_stale_outputs, has_retained_input
+
+
+EXECUTION_MODE_TYPE = [
+    ("SYNC", "Sync", "Evaluate all nodes in the depsgraph handler", "", 0),
+    ("ASYNC", "Async", "Run heavy kernels on worker threads and commit the results later", "", 1),
+    ("PARALLEL", "Parallel", "Run kernels of independent branches concurrently and wait for each level, only nodes with a worker kernel(Boolean with a CSG solver) run in parallel", "", 2),
+]
+
 
 def should_ignore(node):
     return node.bl_idname in ['NodeGroupInput', 'NodeGroupOutput', 'NodeFrame', 'NodeReroute']
 
 
-def process_node(node=None, process_flag=False, display_flag=True):
-    if should_ignore(node):
+# per-update counters of the last evaluation, keyed by node tree name
+UPDATE_STATS = {}
+
+
+def get_update_stats(ng=None):
+    return UPDATE_STATS.get(ng.name, {}) if ng else {}
+
+
+def reset_update_stats(ng=None):
+    last = UPDATE_STATS.get(ng.name, {})
+    stats = {
+        'evaluation': last.get('evaluation', 0) + 1,
+        'trigger_nodes': 0,
+        'visited': 0,
+        'processed': 0,
+        'displayed': 0,
+        'pending': 0,
+        'deferred': 0,
+        'dirty_set': 0,
+        'levels': 0,
+        'kernel_time': 0.0,
+        'parallel_time': 0.0,
+        'speedup': 1.0,
+        'process_calls': {},
+        'max_node_runs': 0,
+        'clones': 0,
+        'clones_avoided': 0,
+        'objects_reused': 0,
+    }
+    UPDATE_STATS[ng.name] = stats
+    return stats
+
+
+def count_process_call(stats, node):
+    calls = stats['process_calls'].get(node.name, 0) + 1
+    stats['process_calls'][node.name] = calls
+    stats['processed'] += 1
+    stats['max_node_runs'] = max(stats['max_node_runs'], calls)
+
+
+def count_clone(ng=None, shared=False):
+    stats = UPDATE_STATS.get(ng.name)
+    if stats is None:
         return
+    stats['clones_avoided' if shared else 'clones'] += 1
+
+
+def count_reused_objects(ng=None, count=0):
+    stats = UPDATE_STATS.get(ng.name)
+    if stats is not None:
+        stats['objects_reused'] += count
+
+
+# persistent dirty sets keyed by node tree name, each holds the downstream closure of the changed nodes
+DIRTY_SETS = {}
+
+
+def get_dirty_set(ng=None):
+    if ng.name not in DIRTY_SETS:
+        DIRTY_SETS[ng.name] = set()
+    return DIRTY_SETS[ng.name]
+
+
+def mark_dirty(node):
+    dirty = get_dirty_set(node.id_data)
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        # downstream of a dirty node is already dirty
+        if node.name in dirty:
+            continue
+        dirty.add(node.name)
+        stack.extend(next_nodes(node))
+
+
+# frame dependent nodes keyed by node tree name, rebuilt when the tree, its animation or an expression changes
+FRAME_DEPENDENCIES = {}
+
+FRAME_TOKENS = ['$FRAME', '$FSTART', '$FEND']
+
+node_path_pattern = re.compile(r'^nodes\["((?:[^"\\]|\\.)*)"\]')
+
+
+def animated_node_name(data_path=''):
+    match = node_path_pattern.match(data_path)
+    return match.group(1).replace('\\"', '"') if match else None
+
+
+def get_dependency_signature(ng=None):
+    # cheap to compare every frame, changes when nodes, links or animation channels come, go or get rewired
+    structure = (tuple((node.name, node.mute) for node in ng.nodes), tuple((link.from_node.name, link.to_node.name) for link in ng.links))
+    animation_data = ng.animation_data
+    if animation_data is None:
+        return structure
+    action = animation_data.action
+    return structure + (action.name if action else None, len(action.fcurves) if action else 0, len(animation_data.drivers),
+                        tuple(strip.action.name for track in animation_data.nla_tracks for strip in track.strips if strip.action))
+
+
+def downstream_closure(node):
+    closure = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.name in closure:
+            continue
+        closure.add(node.name)
+        stack.extend(next_nodes(node))
+    return closure
+
+
+def build_frame_dependencies(ng=None):
+    # expressions reading the frame are always dirty on frame change, animated sockets only when their value moves
+    expression_nodes = set()
+    for node in ng.nodes:
+        if should_ignore(node):
+            continue
+        for socket in node.inputs:
+            if socket.bl_idname == 'ExpressionSocket' and any(token in FRAME_TOKENS for token in extract_tokens(socket.prop)):
+                expression_nodes.add(node.name)
+
+    fcurves = []
+    nla_nodes = set()
+    animation_data = ng.animation_data
+    if animation_data:
+        if animation_data.action:
+            fcurves.extend(('ACTION', fcurve.data_path, fcurve.array_index) for fcurve in animation_data.action.fcurves)
+        fcurves.extend(('DRIVER', fcurve.data_path, fcurve.array_index) for fcurve in animation_data.drivers)
+        for track in animation_data.nla_tracks:
+            for strip in track.strips:
+                if strip.action:
+                    nla_nodes.update(animated_node_name(fcurve.data_path) for fcurve in strip.action.fcurves)
+    fcurves = [(kind, data_path, index) for (kind, data_path, index) in fcurves if animated_node_name(data_path) in ng.nodes]
+    nla_nodes = set(name for name in nla_nodes if name in ng.nodes)
+
+    sources = expression_nodes | nla_nodes | set(animated_node_name(data_path) for (kind, data_path, index) in fcurves)
+    FRAME_DEPENDENCIES[ng.name] = {
+        'signature': get_dependency_signature(ng),
+        'expressions': expression_nodes | nla_nodes,
+        'fcurves': fcurves,
+        'closures': {name: downstream_closure(ng.nodes[name]) for name in sources},
+    }
+    return FRAME_DEPENDENCIES[ng.name]
+
+
+def get_frame_dependencies(ng=None):
+    dependencies = FRAME_DEPENDENCIES.get(ng.name)
+    if dependencies is None or dependencies['signature'] != get_dependency_signature(ng):
+        dependencies = build_frame_dependencies(ng)
+    return dependencies
+
+
+def invalidate_frame_dependencies(ng=None):
+    FRAME_DEPENDENCIES.pop(ng.name, None)
+
+
+def rebuild_dirty_set(ng=None):
+    DIRTY_SETS[ng.name] = set()
+    for node in ng.nodes:
+        if not should_ignore(node) and getattr(node, 'needs_processing', False):
+            mark_dirty(node)
+
+
+def next_nodes(node):
+    # follow links through reroutes, group and frame nodes stop the waterfall
+    nodes = []
+    for output in node.outputs:
+        for link in output.links:
+            to_node = link.to_node
+            if to_node.bl_idname == 'NodeReroute':
+                nodes.extend(next_nodes(to_node))
+            elif not should_ignore(to_node):
+                nodes.append(to_node)
+    return nodes
+
+
+def prev_nodes(node):
+    # upstream counterpart of next_nodes
+    nodes = []
+    for socket in node.inputs:
+        for link in socket.links:
+            from_node = link.from_node
+            if from_node.bl_idname == 'NodeReroute':
+                nodes.extend(prev_nodes(from_node))
+            elif not should_ignore(from_node):
+                nodes.append(from_node)
+    return nodes
+
+
+def pull_stale_sources(ng=None):
+    # chain nodes that handed their bmesh downstream never wrote their outputs,
+    # a dirty consumer without the session or a copy of it needs them evaluated again first
+    dirty = get_dirty_set(ng)
+    stack = [ng.nodes[name] for name in dirty if name in ng.nodes]
+    visited = set()
+    while stack:
+        node = stack.pop()
+        for source in prev_nodes(node):
+            if source.name in visited:
+                continue
+            visited.add(source.name)
+            if has_stale_outputs(source) and not has_retained_input(node, source):
+                source.needs_processing = True
+                mark_dirty(source)
+                stack.append(source)
+
+
+def sort_dirty_subgraph(trigger_nodes=[]):
+    # collect the downstream closure of the trigger nodes
+    nodes = {}
+    successors = {}
+    stack = [node for node in trigger_nodes if not should_ignore(node)]
+    while stack:
+        node = stack.pop()
+        if node.name in nodes:
+            continue
+        nodes[node.name] = node
+        downstream = next_nodes(node)
+        successors[node.name] = [next_node.name for next_node in downstream]
+        stack.extend(next_node for next_node in downstream if next_node.name not in nodes)
+
+    predecessors = {name: [] for name in nodes}
+    for name, names in successors.items():
+        for next_name in names:
+            if name not in predecessors[next_name]:
+                predecessors[next_name].append(name)
+
+    # Kahn's algorithm, ties are resolved in tree order to keep evaluation stable
+    tree_order = {name: index for index, name in enumerate(node.name for node in trigger_nodes[0].id_data.nodes)} if trigger_nodes else {}
+    in_degree = {name: len(names) for name, names in predecessors.items()}
+    ready = sorted([name for name, degree in in_degree.items() if degree == 0], key=lambda name: tree_order.get(name, 0))
+    ordered = []
+    while ready:
+        name = ready.pop(0)
+        ordered.append(name)
+        for next_name in successors[name]:
+            in_degree[next_name] -= 1
+            if in_degree[next_name] == 0:
+                ready.append(next_name)
+        ready.sort(key=lambda name: tree_order.get(name, 0))
+
+    # cycles should never happen in a node tree, keep the leftovers anyway
+    ordered.extend(name for name in nodes if name not in ordered)
+
+    return ([nodes[name] for name in ordered], predecessors)
+
+
+def sort_levels(ordered_nodes, predecessors):
+    # nodes on the same level don't depend on each other
+    levels = {}
+    for node in ordered_nodes:
+        levels[node.name] = max([levels[name] + 1 for name in predecessors[node.name] if name in levels], default=0)
+
+    groups = []
+    for node in ordered_nodes:
+        while len(groups) <= levels[node.name]:
+            groups.append([])
+        groups[levels[node.name]].append(node)
+    return groups
+
+
+def collect_pulled_nodes(ordered_nodes, predecessors):
+    # upstream closure of the sinks, everything else can wait
+    stack = [node.name for node in ordered_nodes if hasattr(node, 'is_pull_sink') and node.is_pull_sink()]
+    pulled = set()
+    while stack:
+        name = stack.pop()
+        if name in pulled:
+            continue
+        pulled.add(name)
+        stack.extend(predecessors.get(name, []))
+    return pulled
+
+
+def begin_node(ng, node, stats):
     # make sure node has state updated before processing
     node._update()
     node.needs_update = False
-
-    p_flag = process_flag
-    d_flag = display_flag
-    if node and hasattr(node, "process"):
-        if node.needs_processing or p_flag:
-            # mark all of them downstream
-            p_flag = True
+    stats['visited'] += 1
+    # clean from here on, display or a job commit can mark it dirty again for the next pass
+    get_dirty_set(ng).discard(node.name)
+
+
+def visit_node(ng, node, upstream, state):
+    if any(name in state['pending'] for name in upstream):
+        # upstream job still running, its commit marks this node dirty again
+        state['pending'].add(node.name)
+    # process once if dirty or if anything upstream was processed in this update
+    elif node.needs_processing or any(name in state['processed'] for name in upstream):
+        with profile_scope('process', ng.name, node.name, {'bl_idname': node.bl_idname}):
             node.process()
-        if node.needs_display:
-            # display only the node marked for display
-            d_flag = False
+        state['processed'].add(node.name)
+        count_process_call(state['stats'], node)
+
+
+def pull_node(ng, node, upstream, state):
+    # lazy evaluation, visit only the nodes something consumes
+    if node.name in state['pulled'] or any(name in state['pending'] for name in upstream):
+        visit_node(ng, node, upstream, state)
+    # nothing consumes this node yet, leave it dirty until it gets pulled
+    elif node.needs_processing or any(name in state['processed'] or name in state['deferred'] for name in upstream):
+        node.needs_processing = True
+        state['deferred'].add(node.name)
+
+
+def update_group(ng, group, predecessors, state, visit):
+    for node in group:
+        begin_node(ng, node, state['stats'])
+        if not hasattr(node, "process"):
+            continue
+
+        visit(ng, node, predecessors[node.name], state)
+        if node.is_computing:
+            state['pending'].add(node.name)
+
+
+def display_group(ng, group, predecessors, state):
+    display_blocked = state['display_blocked']
+    for node in group:
+        if not hasattr(node, "process"):
+            continue
+
+        # display only the first node marked for display on each path
+        display_flag = not any(name in display_blocked for name in predecessors[node.name])
+        if node.needs_display or not display_flag:
+            display_blocked.add(node.name)
+
         # display always after processing
-        node.display(node.needs_display and display_flag)
-        # if node.is_active:
-        #     return
-        next_nodes = [link.to_node for output in node.outputs for link in output.links]
-        for next_node in next_nodes:
-            # waterfall events
-            process_node(next_node, p_flag, d_flag)
+        with profile_scope('display', ng.name, node.name):
+            node.display(node.needs_display and display_flag)
+        if (node.needs_display and display_flag) or getattr(node, 'always_display', False):
+            state['stats']['displayed'] += 1
+
+
+def process_sequential(ng, ordered_nodes, predecessors, state, visit):
+    state['stats']['levels'] = len(ordered_nodes)
+    for node in ordered_nodes:
+        update_group(ng, [node], predecessors, state, visit)
+        display_group(ng, [node], predecessors, state)
+
+
+def process_levels(ng, ordered_nodes, predecessors, state, visit):
+    stats = state['stats']
+    groups = sort_levels(ordered_nodes, predecessors)
+    stats['levels'] = len(groups)
+    for group in groups:
+        update_group(ng, group, predecessors, state, visit)
+
+        # kernels of this level run concurrently, commit them before the next level
+        (kernel_time, parallel_time) = wait_for_jobs([node for node in group if node.name in state['pending']])
+        stats['kernel_time'] += kernel_time
+        stats['parallel_time'] += parallel_time
+        state['pending'].difference_update(node.name for node in group)
+
+        display_group(ng, group, predecessors, state)
 
 
 def process_tree(ng=None):
-    for node in ng.trigger_nodes:
-        process_node(node)
+    stats = reset_update_stats(ng)
+    begin_evaluation(ng)
+    stats['trigger_nodes'] = len(ng.trigger_nodes)
+    stats['dirty_set'] = len(get_dirty_set(ng))
+
+    (ordered_nodes, predecessors) = sort_dirty_subgraph(ng.trigger_nodes)
+
+    state = {'stats': stats, 'processed': set(), 'pending': set(), 'deferred': set(), 'display_blocked': set(), 'pulled': None}
+    visit = visit_node
+    if ng.use_lazy_evaluation:
+        state['pulled'] = collect_pulled_nodes(ordered_nodes, predecessors)
+        visit = pull_node
+
+    if ng.execution_mode == 'PARALLEL':
+        process_levels(ng, ordered_nodes, predecessors, state, visit)
+    else:
+        process_sequential(ng, ordered_nodes, predecessors, state, visit)
+
+    stats['pending'] = len(state['pending'])
+    stats['deferred'] = len(state['deferred'])
+
+    # deferred and waiting nodes stay dirty
+    dirty = get_dirty_set(ng)
+    dirty.update(state['deferred'])
+    dirty.update(state['pending'])
+    if stats['parallel_time'] > 0.0:
+        stats['speedup'] = stats['kernel_time'] / stats['parallel_time']
 
 
 class NodeTreeBase(object):
@@ -46,18 +415,39 @@ class NodeTreeBase(object):
 
     show_preview : BoolProperty(default=True)
 
+    use_cache : BoolProperty(name='Cache Results', description='Reuse node outputs when inputs and options did not change', default=True)
+    cache_budget : IntProperty(name='Cache Budget', description='Memory budget of the result cache in MB', default=256, min=0)
+    use_disk_cache : BoolProperty(name='Disk Cache', description='Store node results on disk so they can be restored after reopening the file', default=False)
+    disk_cache_budget : IntProperty(name='Disk Budget', description='Size limit of the disk cache in MB, least recently used entries are removed first, 0 is unlimited', default=2048, min=0)
+    cache_directory : StringProperty(name='Cache Directory', description='Disk cache location, the user data folder is used when empty', default='', subtype='DIR_PATH')
 
-    def build_update_list(self):
-        self.trigger_nodes = [node for node in self.nodes if not should_ignore(node) and (node.needs_processing or node.needs_display or node.it_displays)]
+    use_profiler : BoolProperty(name='Profiler', description='Record per node timings of each evaluation', default=False)
+    profiler_sort : EnumProperty(name='Sort', description='Profiler table order', items=PROFILER_SORT_TYPE, default='PROCESS')
+
+    use_lazy_evaluation : BoolProperty(name='Lazy Evaluation', description='Only compute nodes feeding the active node, pinned nodes, outputs and group outputs', default=False)
+
+    execution_mode : EnumProperty(name='Execution', description='How node operators are executed', items=EXECUTION_MODE_TYPE, default='SYNC')
+
+    update_interval : FloatProperty(name='Update Interval', description='Coalesce socket changes and evaluate at most once per interval (seconds), 0 evaluates immediately',
+                                    default=0.1, min=0.0, max=2.0)
+    use_interactive_quality : BoolProperty(name='Interactive Quality', description='Evaluate at reduced quality while values change and at full quality once they settle', default=True)
+    use_mesh_buffers : BoolProperty(name='Mesh Buffers', description='Pass geometry between array based nodes as numpy buffers, meshes are built only for display and object based nodes', default=True)
+    use_bmesh_sessions : BoolProperty(name='BMesh Sessions', description='Hand the live bmesh along chains of bmesh based nodes, meshes are written only at the chain end or for display', default=True)
+    use_modifier_fusion : BoolProperty(name='Modifier Fusion', description='Stack the modifiers of consecutive modifier based nodes and evaluate them once at the end of the run or for display',
+                                       default=True)
 
 
-        group_input_nodes = [node for node in self.nodes if node.bl_idname == 'NodeGroupInput']
-        for node in group_input_nodes:
-            for socket in node.inputs:
-                if socket.is_linked:
-                    other = socket.other
-                    other.node.needs_processing = True
-                    self.trigger_nodes.append(other.node)
+    def rebuild_dirty_set(self):
+        # dirty sets live in memory, recover them from the node flags after load and undo
+        rebuild_dirty_set(self)
+
+    def build_update_list(self):
+        pull_stale_sources(self)
+        dirty = get_dirty_set(self)
+        self.trigger_nodes = [self.nodes[name] for name in dirty if name in self.nodes and not should_ignore(self.nodes[name])]
+
+        # forget removed nodes
+        dirty.intersection_update(node.name for node in self.trigger_nodes)
 
 
     def remove_invalid_links(self):
@@ -74,6 +464,22 @@ class NodeTreeBase(object):
             if bpy.context.active_operator.bl_idname in ['NODE_OT_links_cut']: # 'NODE_OT_translate_attach'
                 for node in self.nodes:
                     node.needs_processing = True
+                rebuild_dirty_set(self)
+
+
+    def apply_fcurve_value(self, fcurve, evaluated_value):
+        # write the animated value into the socket, returns the socket when it changed
+        data_path_fixed = '.'.join(fcurve.data_path.split('.')[:-1])
+        target_id = self.path_resolve(data_path_fixed)
+
+        current_value = target_id['prop'][fcurve.array_index] if target_id.bl_rna.properties['prop'].array_length > 0 else target_id['prop']
+        if current_value == evaluated_value:
+            return None
+        if target_id.bl_rna.properties['prop'].array_length > 0:
+            target_id['prop'][fcurve.array_index] = evaluated_value
+        else:
+            target_id['prop'] = evaluated_value
+        return target_id
 
 
     def evaluate_drivers(self):
@@ -81,69 +487,39 @@ class NodeTreeBase(object):
             return
 
         for fcurve in self.animation_data.drivers:
-            data_path_fixed = '.'.join(fcurve.data_path.split('.')[:-1])
-            target_id = self.path_resolve(data_path_fixed)
-
-            current_value = target_id['prop'][fcurve.array_index] if target_id.bl_rna.properties['prop'].array_length > 0 else target_id['prop']
             evaluated_value = self.path_resolve(fcurve.driver.variables[0].targets[0].data_path)
-            # evalated_value = evaluated_id[fcurve.array_index] if evaluated_id.bl_rna.properties['prop'].array_length > 0 else evaluated_id
-            # evaluated = fcurve.evaluate(bpy.context.scene.frame_current)
-            if current_value != evaluated_value:
-                if target_id.bl_rna.properties['prop'].array_length > 0:
-                    target_id['prop'][fcurve.array_index] = evaluated_value
-                else:
-                    target_id['prop'] = evaluated_value
-                target_id.node.update_from_socket(target_id, bpy.context)
-
-            # print(fcurve.evaluate(bpy.context.scene.frame_current))
-            # fcurve.update()
+            socket = self.apply_fcurve_value(fcurve, evaluated_value)
+            if socket:
+                socket.node.update_from_socket(socket, bpy.context)
 
 
     def update_frame(self):
-        # handle injected nodes
-        if '_pn_node_hooks_' in self:
-            hooks = self['_pn_node_hooks_']
-            for hook, node_paths in hooks.items():
-                if hook == '$FRAME':
-                    for node_path in node_paths:
-                        node = eval(node_path)
-                        if node:
-                            node.needs_processing = True
-                            node._update()
-
-        if not self.animation_data:
+        # only nodes depending on the frame and their downstream get dirty
+        dependencies = get_frame_dependencies(self)
+        changed = set(dependencies['expressions'])
+
+        animation_data = self.animation_data
+        for (kind, data_path, index) in dependencies['fcurves']:
+            if kind == 'ACTION':
+                fcurve = animation_data.action.fcurves.find(data_path, index=index)
+                evaluated_value = fcurve.evaluate(bpy.context.scene.frame_current) if fcurve else None
+            else:
+                fcurve = animation_data.drivers.find(data_path, index=index)
+                evaluated_value = self.path_resolve(fcurve.driver.variables[0].targets[0].data_path) if fcurve else None
+            socket = self.apply_fcurve_value(fcurve, evaluated_value) if fcurve else None
+            if socket:
+                changed.add(socket.node.name)
+
+        if not changed:
             return
 
-        for fcurve in self.animation_data.action.fcurves:
-            data_path_fixed = '.'.join(fcurve.data_path.split('.')[:-1])
-            target_id = self.path_resolve(data_path_fixed)
-
-            current_value = target_id['prop'][fcurve.array_index] if target_id.bl_rna.properties['prop'].array_length > 0 else target_id['prop']
-            # evalated_value = evaluated_id[fcurve.array_index] if evaluated_id.bl_rna.properties['prop'].array_length > 0 else evaluated_id
-            # evaluated = self.path_resolve(fcurve.driver.variables[0].targets[0].data_path)
-            evaluated_value = fcurve.evaluate(bpy.context.scene.frame_current)
-            if current_value != evaluated_value:
-                if target_id.bl_rna.properties['prop'].array_length > 0:
-                    target_id['prop'][fcurve.array_index] = evaluated_value
-                else:
-                    target_id['prop'] = evaluated_value
-                target_id.node.update_from_socket(target_id, bpy.context)
-
-            # print(fcurve.evaluate(bpy.context.scene.frame_current))
-            # fcurve.update()
-            for keyframe in fcurve.keyframe_points:
-                pass
-
-        for track in self.animation_data.nla_tracks:
-            for strip in track.strips:
-                print(strip.action)
-                action=strip.action
-
-                for fcu in action.fcurves:
-                    print(fcu.data_path + " channel " + str(fcu.array_index))
-                    for keyframe in fcu.keyframe_points:
-                        print(keyframe.co)
+        dirty = get_dirty_set(self)
+        for name in changed:
+            node = self.nodes[name]
+            node.needs_processing = True
+            dirty.update(dependencies['closures'].get(name) or downstream_closure(node))
 
+        self.needs_update = True
         self.update_tag()
 
 
@@ -181,3 +557,4 @@ class PowerTree(NodeTree, NodeTreeBase):
             self.needs_update = False
             self.build_update_list()
             process_tree(self)
+            record_evaluation(self)
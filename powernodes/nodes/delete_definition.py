@@ -38,7 +38,8 @@ DELETE_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "DELETE", "items": DELETE_ITEMS },
         ],
-        "command": "delete_operator"
+        "command": "delete_operator",
+        "session": "BMESH"
     },
     "DISSOLVE": {
         "label": 'Dissolve geometry',
@@ -53,7 +54,8 @@ DELETE_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "DISSOLVE", "items": DELETE_ITEMS },
         ],
-        "command": "dissolve_operator"
+        "command": "dissolve_operator",
+        "session": "BMESH"
     },
 }
 
@@ -26,7 +26,8 @@ FILL_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "FILL", "items": FILL_ITEMS },
         ],
-        "command": "fill_operator"
+        "command": "fill_operator",
+        "session": "BMESH"
     },
 }
 
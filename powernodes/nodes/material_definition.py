@@ -18,7 +18,8 @@ MATERIAL_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "MATERIAL", "items": MATERIAL_ITEMS },
         ],
-        "command": "material_operator"
+        "command": "material_operator",
+        "writes": "ATTRIBUTES"
     },
 }
 
@@ -18,7 +18,8 @@ OUTPUT_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "OUTPUT", "items": OUTPUT_ITEMS },
         ],
-        "command": "output_operator"
+        "command": "output_operator",
+        "writes": "NOTHING"
     },
 }
 
@@ -20,6 +20,15 @@ class OutputNode(BaseNode):
         return True
 
 
+    def is_pull_sink(self):
+        return True
+
+
+    def is_cacheable(self):
+        # outputs link the incoming objects to collections
+        return False
+
+
     def display(self, display_flag=False):
         # super().display(display_flag)
 
@@ -77,6 +77,7 @@ BOOLEAN_SOLVER_TYPE = [
     ("FAST", "FAST", ""),
     ("EXACT", "EXACT", ""),
     ("CSG", "CSG(Experimental)", ""),
+    ("CSG_SOA", "CSG SoA(Experimental)", ""),
 ]
 
 
@@ -151,7 +152,9 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "PASS", "items": POWER_ITEMS },
         ],
-        "command": "passthrough_operator"
+        "command": "passthrough_operator",
+        "writes": "NOTHING",
+        "writes_when": {"join": "GEOMETRY"}
     },
     "TRANSFORM": {
         "label": 'Transform',
@@ -168,7 +171,10 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "TRANSFORM", "items": POWER_ITEMS },
         ],
-        "command": "transform_operator"
+        "command": "transform_operator",
+        "buffer_command": "transform_buffer_operator",
+        "writes": "TRANSFORM",
+        "writes_when": {"apply_transform": "GEOMETRY"}
     },
     "BEVEL": {
         "label": 'Bevel',
@@ -178,7 +184,7 @@ POWER_PROP_DEF = {
             { "name": "expression", "label": "Exp", "type": "Expression", "default": '', 'icon': 'EXPERIMENTAL' },
             { "name": "offset", "label": "Offset", "type": "Float", "default": 0.1 },
             { "name": "offset_type", "label": "Offset Type", "type": "Enum", "default": "OFFSET", "items": BEVEL_OFFSET_TYPE},
-            { "name": "segments", "label": "Segments", "type": "Int", "default": 1, 'min': 1, 'max': 100 },
+            { "name": "segments", "label": "Segments", "type": "Int", "default": 1, 'min': 1, 'max': 100, 'interactive': 1 },
             { "name": "profile", "label": "Profile", "type": "Float", "default": 0.5 },
             { "name": "miter_inner", "label": "Miter inner", "type": "Enum", "default": "SHARP", "items": BEVEL_MITER_INNER},
             { "name": "miter_outer", "label": "Miter outer", "type": "Enum", "default": "SHARP", "items": BEVEL_MITER_OUTER},
@@ -188,7 +194,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "BEVEL", "items": POWER_ITEMS },
         ],
-        "command": "bevel_operator"
+        "command": "bevel_operator",
+        "session": "BMESH"
     },
     "BOOLEAN": {
         "label": 'Boolean',
@@ -203,7 +210,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "BOOLEAN", "items": POWER_ITEMS },
         ],
-        "command": "boolean_operator"
+        "command": "boolean_operator",
+        "async": { "prepare": "boolean_async_prepare", "kernel": "boolean_async_kernel", "commit": "boolean_async_commit" }
     },
     "EXTRUDE": {
         "label": 'Extrude',
@@ -220,7 +228,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "EXTRUDE", "items": POWER_ITEMS },
         ],
-        "command": "extrude_operator"
+        "command": "extrude_operator",
+        "session": "BMESH"
     },
     "INSET": {
         "label": 'Inset',
@@ -240,7 +249,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "INSET", "items": POWER_ITEMS },
         ],
-        "command": "inset_operator"
+        "command": "inset_operator",
+        "session": "BMESH"
     },
     "ARRAY": {
         "label": 'Array',
@@ -292,7 +302,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "MIRROR", "items": POWER_ITEMS },
         ],
-        "command": "mirror_operator"
+        "command": "mirror_operator",
+        "session": "MODIFIER"
     },
     "WELD": {
         "label": 'Weld',
@@ -303,15 +314,16 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "WELD", "items": POWER_ITEMS },
         ],
-        "command": "weld_operator"
+        "command": "weld_operator",
+        "session": "BMESH"
     },
     "SUBDIV": {
         "label": 'Subdiv',
         "inputs":  [
             { "name": "input0", "label": "Input", "type": "InputStream" },
             { "name": "subdivision_type", "label": "Subdivision type", "type": "Enum", "default": 'CATMULL_CLARK', "items": SUBDIV_TYPE, "expand": True },
-            { "name": "levels", "label": "Levels", "type": "Int", "default": 1 },
-            { "name": "quality", "label": "Quality", "type": "Int", "default": 3 },
+            { "name": "levels", "label": "Levels", "type": "Int", "default": 1, 'interactive': 1 },
+            { "name": "quality", "label": "Quality", "type": "Int", "default": 3, 'interactive': 1 },
             { "name": "use_limit_surface", "label": "Use limit surface", "type": "Bool", "default": True },
             { "name": "uv_smooth", "label": "UV Smooth", "type": "Enum", "default": 'PRESERVE_CORNERS', "items": SUBDIV_UV_SMOOTH, },
             { "name": "boundary_smooth", "label": "Boundary Smooth", "type": "Enum", "default": 'ALL', "items": SUBDIV_BOUNDARY_SMOOTH, },
@@ -321,7 +333,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "SUBDIV", "items": POWER_ITEMS },
         ],
-        "command": "subdivide_operator"
+        "command": "subdivide_operator",
+        "session": "MODIFIER"
     },
     "TRIANGULATE": {
         "label": 'Triangulate',
@@ -335,7 +348,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "TRIANGULATE", "items": POWER_ITEMS },
         ],
-        "command": "triangulate_operator"
+        "command": "triangulate_operator",
+        "session": "MODIFIER"
     },
     "SOLIDIFY": {
         "label": 'Solidify',
@@ -350,7 +364,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "SOLIDIFY", "items": POWER_ITEMS },
         ],
-        "command": "solidify_operator"
+        "command": "solidify_operator",
+        "session": "MODIFIER"
     },
     "BISECT": {
         "label": 'Bisect',
@@ -374,7 +389,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "RESAMPLE", "items": POWER_ITEMS },
         ],
-        "command": "resample_operator"
+        "command": "resample_operator",
+        "session": "BMESH"
     },
     "SMOOTH": {
         "label": 'Smooth',
@@ -388,7 +404,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "SMOOTH", "items": POWER_ITEMS },
         ],
-        "command": "smooth_operator"
+        "command": "smooth_operator",
+        "session": "BMESH"
     },
     "EXPLODE": {
         "label": 'Explode',
@@ -399,7 +416,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "EXPLODE", "items": POWER_ITEMS },
         ],
-        "command": "explode_operator"
+        "command": "explode_operator",
+        "buffer_command": "explode_buffer_operator"
     },
     "SCREW": {
         "label": 'Screw',
@@ -418,7 +436,8 @@ POWER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "SCREW", "items": POWER_ITEMS },
         ],
-        "command": "screw_operator"
+        "command": "screw_operator",
+        "session": "MODIFIER"
     },
     "SKIN": {
         "label": 'Skin',
@@ -119,7 +119,8 @@ PRIMITIVE_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "EXTRACT", "items": PRIMITIVE_ITEMS },
         ],
-        "command": "create_mesh_from_selection"
+        "command": "create_mesh_from_selection",
+        "writes": "NOTHING"
     },
 }
 
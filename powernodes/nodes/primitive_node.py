@@ -6,9 +6,11 @@ from bpy.types import Node
 import math
 from mathutils.geometry import intersect_line_plane, intersect_point_line, intersect_line_line
 
-from .. ops import initialize_default_collections, link_to_collection, unlink_from_collection, clone_object, delete_object
+from .. ops import initialize_default_collections, link_to_collection, unlink_from_collection, delete_object
 
 from .. base_node import BaseNode
+from .. node_tree import mark_dirty
+from .. pool import recycle_outputs
 from .. utils.utils import random_color, change_viewport_shading, squarify_vector
 from .. sockets import init_node_sockets
 from .. handlers import get_rendering_flag
@@ -40,6 +42,7 @@ class PrimitiveNode(BaseNode):
         self.output_color = (col[0], col[1], col[3], 0.1)
 
         self.needs_processing = True
+        mark_dirty(self)
 
 
     def copy(self, node):
@@ -47,6 +50,7 @@ class PrimitiveNode(BaseNode):
         outputstream_socket = self.get_first_outputstream_socket()
         outputstream_socket.prop = '' # clear output
         self.needs_processing = True
+        mark_dirty(self)
 
 
     def is_input_node(self):
@@ -65,31 +69,33 @@ class PrimitiveNode(BaseNode):
         input_objects = self.get_items_from_stream_socket(inputstream_socket)
         op_inputs.append(input_objects)
 
-        # clone inputs
-        op_clone_inputs = []
-        for op_input in op_inputs:
-            input_clones = [clone_object(obj, name='CLONE_' + obj.name.replace('OUT_', '')) for obj in op_input]
-            op_clone_inputs.append(input_clones)
-
         options = self.get_options_from_inputs(self.inputs)
         options['ops_type'] = self.ops_type
 
         OPS_PROP_DEF = MODULE['definition']
+
+        # clone inputs
+        op_clone_inputs = self.clone_inputs(op_inputs, self.get_writes(OPS_PROP_DEF[self.ops_type], options))
         (objects, preview_data) = OPSCOPE[OPS_PROP_DEF[self.ops_type]['command']](*op_clone_inputs, options=options)
 
         output_objects = self.get_items_from_stream_socket(outputstream_socket)
         keep_output_objects = [obj for obj in output_objects if obj and not self.owns_object(obj)]
-        [delete_object(obj) for obj in output_objects if obj and self.owns_object(obj)]
+        previous_objects = [obj for obj in output_objects if obj and self.owns_object(obj)]
 
         for obj in objects:
             obj['_pn_node_tag_'] = self.id
-            obj.color = self.output_color
-            # shade_smooth_operator([obj])
 
         # delete clones
         for op_clone_input in op_clone_inputs:
             [delete_object(obj) for obj in op_clone_input if obj and not self.owns_object(obj)]
 
+        # keep the live primitive object while dragging, only its mesh changes
+        objects = recycle_outputs(self, previous_objects, objects)
+
+        for obj in objects:
+            obj.color = self.output_color
+            # shade_smooth_operator([obj])
+
         outputstream_keep_items = [obj.name for obj in keep_output_objects]
         self.set_items_to_stream_socket(outputstream_socket, outputstream_keep_items + objects)
 
@@ -27,7 +27,8 @@ SCATTER_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "RANDOM", "items": SCATTER_ITEMS },
         ],
-        "command": "scatter_operator"
+        "command": "scatter_operator",
+        "writes": "NOTHING"
     },
 }
 
@@ -34,7 +34,8 @@ SELECT_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "ANGLE", "items": SELECT_ITEMS },
         ],
-        "command": "select_by_angle"
+        "command": "select_by_angle",
+        "session": "BMESH"
     },
     "BOUNDARY": {
         "label": 'Select boundary',
@@ -45,7 +46,8 @@ SELECT_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "BOUNDARY", "items": SELECT_ITEMS },
         ],
-        "command": "select_by_boundary"
+        "command": "select_by_boundary",
+        "session": "BMESH"
     },
     "BOUNDING_BOX": {
         "label": 'Select bounds',
@@ -91,7 +93,8 @@ SELECT_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "EXPRESSION", "items": SELECT_ITEMS },
         ],
-        "command": "select_by_expression"
+        "command": "select_by_expression",
+        "session": "BMESH"
     },
     "NORMAL": {
         "label": 'Select by normal',
@@ -104,7 +107,8 @@ SELECT_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "NORMAL", "items": SELECT_ITEMS },
         ],
-        "command": "select_by_normal"
+        "command": "select_by_normal",
+        "session": "BMESH"
     },
     "CHECKERS": {
         "label": 'Select checkers',
@@ -119,7 +123,8 @@ SELECT_PROP_DEF = {
         "outputs": [
             { "name": "output", "label": "Output", "type": "OutputStream", "default": "CHECKERS", "items": SELECT_ITEMS },
         ],
-        "command": "select_checkers"
+        "command": "select_checkers",
+        "session": "BMESH"
     },
 }
 
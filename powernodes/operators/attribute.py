@@ -5,7 +5,7 @@ from mathutils.bvhtree import BVHTree
 from mathutils.noise import random, random_vector, random_unit_vector, seed_set
 import random
 
-from .. parse import attribute_create, attribute_get, evaluate_expression, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. parse import attribute_create, attribute_get, extract_custom_attribute_layers, evaluate_expression_foreach, evaluate_expression_mesh, write_attribute_values, TYPE_INITIAL_VALUE
 
 MAX_INT = 2147483647
 
@@ -109,6 +109,30 @@ def copy_attribute_op(inputstream0, inputstream1, options={}):
     return (inputstream0, None)
 
 
+def get_domain_elements(bm, domain):
+    if domain == 'VERTEX':
+        return bm.verts
+    if domain == 'EDGE':
+        return bm.edges
+    if domain == 'POLYGON':
+        return bm.faces
+    if domain == 'CORNER':
+        return [loop for face in bm.faces for loop in face.loops]
+    return []
+
+
+def write_attribute_expression(obj, me, attribute_name, domain, expression):
+    # False when the values have to be evaluated per element, the bmesh path reports the errors
+    try:
+        values = evaluate_expression_mesh(expression, obj, me, domain)
+        if values is None or not write_attribute_values(me, attribute_name, domain, values):
+            return False
+    except Exception:
+        return False
+    me.update()
+    return True
+
+
 def evaluate_attribute_expression_op(inputstream, options={}):
     domain = options['domain']
     attribute_name = options['attribute_name']
@@ -117,6 +141,10 @@ def evaluate_attribute_expression_op(inputstream, options={}):
     for obj in inputstream:
         me = obj.data
 
+        # custom attributes are written from the mesh arrays when the expression allows it, no bmesh needed
+        if attribute_get(me, attribute_name, domain) and write_attribute_expression(obj, me, attribute_name, domain, expression):
+            continue
+
         # Get a BMesh representation
         bm = bmesh.new()
         bm.from_mesh(me)
@@ -124,15 +152,7 @@ def evaluate_attribute_expression_op(inputstream, options={}):
         bm.edges.ensure_lookup_table()
         bm.faces.ensure_lookup_table()
 
-        elements = []
-        if domain == 'VERTEX':
-            elements = bm.verts
-        if domain == 'EDGE':
-            elements = bm.edges
-        if domain == 'POLYGON':
-            elements = bm.faces
-        if domain == 'CORNER':
-            elements = [loop for face in bm.faces for loop in face.loops]
+        elements = get_domain_elements(bm, domain)
 
         try:
             custom_attr_layer_items = extract_custom_attribute_layers([attribute_name], me, bm, domain)
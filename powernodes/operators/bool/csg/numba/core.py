@@ -4,7 +4,7 @@ from . geom import Polygon, BSPNode, Vertex, Vector, PolygonType, PolygonListTyp
 from functools import reduce
 
 import numba as nb
-from numba import jit, njit, objmode, generated_jit, types, typed
+from numba import jit, njit, objmode, types, typed
 from numba.experimental import jitclass
 from numba import int64, float32, float64
 
@@ -0,0 +1,580 @@
+import numpy as np
+from numba import njit
+
+from ..... utils.utils import timer_start, timer_end
+
+
+# Struct of arrays port of the BSP CSG in geom.py/core.py, nothing but numpy arrays inside njit
+#
+# store: (positions, poly_start, poly_count, poly_shared, poly_plane, poly_next, poly_verts, scratch, counts)
+#   positions float64[V, 3], polygons are spans poly_start:poly_start + poly_count of poly_verts
+#   planes are float64[P, 4] rows (nx, ny, nz, w), poly_next links the polygons of one list
+#   counts holds the used vertices, polygons and vertex indices and the largest polygon
+#
+# tree: (node_plane, node_has_plane, node_front, node_back, node_head, node_tail, node_count)
+#   BSP nodes of both operands, front/back are node indices, head/tail the polygon list of the node
+#
+# polygon lists are chains through poly_next, a polygon belongs to one list at a time
+# unlike the jitclass version everything is cached on disk, no warm up thread is needed
+
+EPSILON = 1.e-5
+
+COPLANAR = 0  # all the vertices are within EPSILON distance from plane
+FRONT = 1  # all the vertices are in front of the plane
+BACK = 2  # all the vertices are at the back of the plane
+SPANNING = 3  # some vertices are in front, some in the back
+
+NO_NODE = -1
+
+OPERATION_CODES = {'DIFFERENCE': 0, 'UNION': 1, 'INTERSECT': 2}
+
+
+@njit(cache=True, nogil=True)
+def grow_1d(array, size):
+    if size <= array.shape[0]:
+        return array
+    grown = np.empty(max(size, array.shape[0] * 2), dtype=array.dtype)
+    grown[:array.shape[0]] = array
+    return grown
+
+
+@njit(cache=True, nogil=True)
+def grow_2d(array, size):
+    if size <= array.shape[0]:
+        return array
+    grown = np.empty((max(size, array.shape[0] * 2), array.shape[1]), dtype=array.dtype)
+    grown[:array.shape[0]] = array
+    return grown
+
+
+@njit(cache=True, nogil=True)
+def reserve_store(store, vertices, polygons, indices):
+    (positions, poly_start, poly_count, poly_shared, poly_plane, poly_next, poly_verts, scratch, counts) = store
+    positions = grow_2d(positions, counts[0] + vertices)
+    poly_start = grow_1d(poly_start, counts[1] + polygons)
+    poly_count = grow_1d(poly_count, counts[1] + polygons)
+    poly_shared = grow_1d(poly_shared, counts[1] + polygons)
+    poly_plane = grow_2d(poly_plane, counts[1] + polygons)
+    poly_next = grow_1d(poly_next, counts[1] + polygons)
+    poly_verts = grow_1d(poly_verts, counts[2] + indices)
+    if scratch.shape[0] < counts[3]:
+        scratch = np.empty((counts[3] * 2, 2), dtype=np.int64)
+    return (positions, poly_start, poly_count, poly_shared, poly_plane, poly_next, poly_verts, scratch, counts)
+
+
+@njit(cache=True, nogil=True, inline='always')
+def has_split_room(store, polygons):
+    # a split adds at most one vertex per edge and two fragments of at most 2n vertices
+    counts = store[8]
+    return (counts[0] + polygons * counts[3] <= store[0].shape[0] and counts[1] + 2 * polygons <= store[1].shape[0]
+            and counts[2] + 4 * polygons * counts[3] <= store[6].shape[0] and counts[3] <= store[7].shape[0])
+
+
+@njit(cache=True, nogil=True)
+def reserve_split(store, polygons):
+    # room for splitting all of `polygons`, the clipping loops never grow the store themselves
+    counts = store[8]
+    return reserve_store(store, polygons * counts[3], 2 * polygons, 4 * polygons * counts[3])
+
+
+@njit(cache=True, nogil=True)
+def ensure_split_room(store, polygons):
+    if has_split_room(store, polygons):
+        return store
+    return reserve_split(store, polygons)
+
+
+@njit(cache=True, nogil=True)
+def reserve_nodes(tree, nodes):
+    (node_plane, node_has_plane, node_front, node_back, node_head, node_tail, node_count) = tree
+    size = node_count[0] + nodes
+    return (grow_2d(node_plane, size), grow_1d(node_has_plane, size), grow_1d(node_front, size), grow_1d(node_back, size),
+            grow_1d(node_head, size), grow_1d(node_tail, size), node_count)
+
+
+@njit(cache=True, nogil=True)
+def new_node(tree):
+    (node_plane, node_has_plane, node_front, node_back, node_head, node_tail, node_count) = tree
+    node = node_count[0]
+    node_count[0] += 1
+    node_has_plane[node] = False
+    node_front[node] = NO_NODE
+    node_back[node] = NO_NODE
+    node_head[node] = -1
+    node_tail[node] = -1
+    return node
+
+
+@njit(cache=True, nogil=True)
+def child_node(tree, children, node):
+    # front or back child of `node`, created on first use
+    if children[node] == NO_NODE:
+        children[node] = new_node(tree)
+    return children[node]
+
+
+@njit(cache=True, nogil=True)
+def push_chain(stack_nodes, stack_heads, size, node, head):
+    # returns the stacks, grown when full, and the new size
+    if size + 1 > stack_nodes.shape[0]:
+        stack_nodes = grow_1d(stack_nodes, size + 1)
+        stack_heads = grow_1d(stack_heads, size + 1)
+    stack_nodes[size] = node
+    stack_heads[size] = head
+    return (stack_nodes, stack_heads, size + 1)
+
+
+@njit(cache=True, nogil=True, inline='always')
+def chain_append(chain, poly_next, poly):
+    poly_next[poly] = -1
+    if chain[0] < 0:
+        chain[0] = poly
+    else:
+        poly_next[chain[1]] = poly
+    chain[1] = poly
+
+
+@njit(cache=True, nogil=True)
+def chain_extend(chain, poly_next, other):
+    if other[0] < 0:
+        return
+    if chain[0] < 0:
+        chain[0] = other[0]
+    else:
+        poly_next[chain[1]] = other[0]
+    chain[1] = other[1]
+
+
+@njit(cache=True, nogil=True)
+def chain_append_all(chain, poly_next, head):
+    poly = head
+    while poly >= 0:
+        next_poly = poly_next[poly]
+        chain_append(chain, poly_next, poly)
+        poly = next_poly
+
+
+@njit(cache=True, nogil=True)
+def chain_length(poly_next, head):
+    count = 0
+    poly = head
+    while poly >= 0:
+        count += 1
+        poly = poly_next[poly]
+    return count
+
+
+@njit(cache=True, nogil=True)
+def chain_to_array(poly_next, head, ids):
+    # ids is a scratch buffer, returned grown when the chain is longer
+    count = chain_length(poly_next, head)
+    ids = grow_1d(ids, count)
+    poly = head
+    for index in range(count):
+        ids[index] = poly
+        poly = poly_next[poly]
+    return (ids, count)
+
+
+@njit(cache=True, nogil=True)
+def add_polygon(store, start, count, shared, plane):
+    (positions, poly_start, poly_count, poly_shared, poly_plane, poly_next, poly_verts, scratch, counts) = store
+    poly = counts[1]
+    counts[1] += 1
+    poly_start[poly] = start
+    poly_count[poly] = count
+    poly_shared[poly] = shared
+    poly_plane[poly, :] = plane
+    poly_next[poly] = -1
+    counts[3] = max(counts[3], count)
+    return poly
+
+
+@njit(cache=True, nogil=True, inline='always')
+def classify_polygon(positions, poly_start, poly_count, poly_verts, poly, plane):
+    start = poly_start[poly]
+    polygon_type = 0
+    for i in range(poly_count[poly]):
+        p = poly_verts[start + i]
+        t = plane[0] * positions[p, 0] + plane[1] * positions[p, 1] + plane[2] * positions[p, 2] - plane[3]
+        if t < -EPSILON:
+            polygon_type |= BACK
+        elif t > EPSILON:
+            polygon_type |= FRONT
+    return polygon_type
+
+
+@njit(cache=True, nogil=True)
+def split_spanning(store, poly, plane, front, back):
+    # the store has room for the fragments, see reserve_split
+    (positions, poly_start, poly_count, poly_shared, poly_plane, poly_next, poly_verts, scratch, counts) = store
+    n = poly_count[poly]
+
+    start = poly_start[poly]
+    for i in range(n):
+        p = poly_verts[start + i]
+        t = plane[0] * positions[p, 0] + plane[1] * positions[p, 1] + plane[2] * positions[p, 2] - plane[3]
+        scratch[i, 0] = BACK if t < -EPSILON else (FRONT if t > EPSILON else COPLANAR)
+
+    # one intersection vertex per crossing edge, shared by both fragments
+    for i in range(n):
+        j = (i + 1) % n
+        scratch[i, 1] = -1
+        if (scratch[i, 0] | scratch[j, 0]) == SPANNING:
+            vi = poly_verts[start + i]
+            vj = poly_verts[start + j]
+            dx = positions[vj, 0] - positions[vi, 0]
+            dy = positions[vj, 1] - positions[vi, 1]
+            dz = positions[vj, 2] - positions[vi, 2]
+            t = (plane[3] - (plane[0] * positions[vi, 0] + plane[1] * positions[vi, 1] + plane[2] * positions[vi, 2])) / (plane[0] * dx + plane[1] * dy + plane[2] * dz)
+            v = counts[0]
+            counts[0] += 1
+            positions[v, 0] = positions[vi, 0] + dx * t
+            positions[v, 1] = positions[vi, 1] + dy * t
+            positions[v, 2] = positions[vi, 2] + dz * t
+            scratch[i, 1] = v
+
+    # fragments keep the plane of the split polygon
+    for side in (FRONT, BACK):
+        fragment_start = counts[2]
+        fragment_count = 0
+        for i in range(n):
+            if scratch[i, 0] != (BACK if side == FRONT else FRONT):
+                poly_verts[fragment_start + fragment_count] = poly_verts[start + i]
+                fragment_count += 1
+            if scratch[i, 1] >= 0:
+                poly_verts[fragment_start + fragment_count] = scratch[i, 1]
+                fragment_count += 1
+        if fragment_count >= 3:
+            counts[2] += fragment_count
+            fragment = add_polygon(store, fragment_start, fragment_count, poly_shared[poly], poly_plane[poly])
+            chain_append(front if side == FRONT else back, poly_next, fragment)
+
+
+@njit(cache=True, nogil=True, inline='always')
+def file_polygon(poly_plane, poly_next, poly, plane, polygon_type, coplanar_front, coplanar_back, front, back):
+    """
+    Append a polygon that doesn't span `plane` to the matching chain, same rules
+    as Plane.splitPolygon. Spanning polygons go through split_spanning instead.
+    """
+    if polygon_type == COPLANAR:
+        if plane[0] * poly_plane[poly, 0] + plane[1] * poly_plane[poly, 1] + plane[2] * poly_plane[poly, 2] > 0:
+            chain_append(coplanar_front, poly_next, poly)
+        else:
+            chain_append(coplanar_back, poly_next, poly)
+    elif polygon_type == FRONT:
+        chain_append(front, poly_next, poly)
+    else:
+        chain_append(back, poly_next, poly)
+
+
+@njit(cache=True, nogil=True, inline='always')
+def partition_polygon(store, poly, plane, coplanar_front, coplanar_back, front, back):
+    # the store has room for the fragments, see reserve_split
+    polygon_type = classify_polygon(store[0], store[1], store[2], store[6], poly, plane)
+    if polygon_type == SPANNING:
+        split_spanning(store, poly, plane, front, back)
+    else:
+        file_polygon(store[4], store[5], poly, plane, polygon_type, coplanar_front, coplanar_back, front, back)
+
+
+@njit(cache=True, nogil=True)
+def split_node(store, tree, node, ids, count, node_chain, front, back):
+    """
+    Give `node` the plane of the middle polygon of `ids` unless it has one and
+    sort the rest into the node, `front` and `back`.
+    """
+    (node_plane, node_has_plane, node_front, node_back, node_head, node_tail, node_count) = tree
+    poly_next = store[5]
+    cut = ids[count // 2]
+    if not node_has_plane[node]:
+        node_plane[node, :] = store[4][cut]
+        node_has_plane[node] = True
+    plane = node_plane[node].copy()
+
+    node_chain[0] = node_head[node]
+    node_chain[1] = node_tail[node]
+    chain_append(node_chain, poly_next, cut)
+    front[:] = -1
+    back[:] = -1
+    for index in range(count):
+        if ids[index] != cut:
+            # coplanar front and back polygons go into the node
+            partition_polygon(store, ids[index], plane, node_chain, node_chain, front, back)
+    node_head[node] = node_chain[0]
+    node_tail[node] = node_chain[1]
+
+
+@njit(cache=True, nogil=True)
+def build(store, tree, root, head):
+    """
+    Build a BSP tree out of the chain starting at `head`, same as BSPNode.build.
+    The middle polygon of each list is the splitter.
+    """
+    stack_nodes = np.empty(16, dtype=np.int64)
+    stack_heads = np.empty(16, dtype=np.int64)
+    stack_nodes[0] = root
+    stack_heads[0] = head
+    size = 1
+    ids = np.empty(16, dtype=np.int64)
+    front = np.empty(2, dtype=np.int64)
+    back = np.empty(2, dtype=np.int64)
+    node_chain = np.empty(2, dtype=np.int64)
+
+    while size > 0:
+        size -= 1
+        node = stack_nodes[size]
+        (ids, count) = chain_to_array(store[5], stack_heads[size], ids)
+        if count == 0:
+            continue
+        store = ensure_split_room(store, count)
+        split_node(store, tree, node, ids, count, node_chain, front, back)
+
+        tree = reserve_nodes(tree, 2)
+        if front[0] >= 0:
+            (stack_nodes, stack_heads, size) = push_chain(stack_nodes, stack_heads, size, child_node(tree, tree[2], node), front[0])
+        if back[0] >= 0:
+            (stack_nodes, stack_heads, size) = push_chain(stack_nodes, stack_heads, size, child_node(tree, tree[3], node), back[0])
+
+    return (store, tree)
+
+
+@njit(cache=True, nogil=True)
+def invert(store, tree, root):
+    """ Convert solid space to empty space and empty space to solid space. """
+    (positions, poly_start, poly_count, poly_shared, poly_plane, poly_next, poly_verts, scratch, counts) = store
+    (node_plane, node_has_plane, node_front, node_back, node_head, node_tail, node_count) = tree
+    stack = np.empty(max(node_count[0], 1), dtype=np.int64)
+    stack[0] = root
+    size = 1
+    while size > 0:
+        size -= 1
+        node = stack[size]
+
+        poly = node_head[node]
+        while poly >= 0:
+            start = poly_start[poly]
+            poly_verts[start:start + poly_count[poly]] = poly_verts[start:start + poly_count[poly]][::-1].copy()
+            poly_plane[poly, :] = -poly_plane[poly]
+            poly = poly_next[poly]
+        node_plane[node, :] = -node_plane[node]
+
+        (node_front[node], node_back[node]) = (node_back[node], node_front[node])
+        if node_front[node] != NO_NODE:
+            stack[size] = node_front[node]
+            size += 1
+        if node_back[node] != NO_NODE:
+            stack[size] = node_back[node]
+            size += 1
+
+
+@njit(cache=True, nogil=True)
+def clip_polygons(store, tree, root, head, result):
+    """ Remove the polygons of the chain inside the tree at `root`, the rest ends up in `result`. """
+    stack_nodes = np.empty(16, dtype=np.int64)
+    stack_heads = np.empty(16, dtype=np.int64)
+    stack_nodes[0] = root
+    stack_heads[0] = head
+    size = 1
+    front = np.empty(2, dtype=np.int64)
+    back = np.empty(2, dtype=np.int64)
+    (node_plane, node_has_plane, node_front, node_back, node_head, node_tail, node_count) = tree
+
+    while size > 0:
+        size -= 1
+        node = stack_nodes[size]
+        poly = stack_heads[size]
+        store = ensure_split_room(store, chain_length(store[5], poly))
+        if not node_has_plane[node]:
+            chain_append_all(result, store[5], poly)
+            continue
+
+        front[:] = -1
+        back[:] = -1
+        while poly >= 0:
+            next_poly = store[5][poly]
+            partition_polygon(store, poly, node_plane[node], front, back, front, back)
+            poly = next_poly
+
+        if front[0] >= 0:
+            if node_front[node] != NO_NODE:
+                (stack_nodes, stack_heads, size) = push_chain(stack_nodes, stack_heads, size, node_front[node], front[0])
+            else:
+                chain_extend(result, store[5], front)
+        # polygons behind a leaf are inside the solid
+        if back[0] >= 0 and node_back[node] != NO_NODE:
+            (stack_nodes, stack_heads, size) = push_chain(stack_nodes, stack_heads, size, node_back[node], back[0])
+
+    return store
+
+
+@njit(cache=True, nogil=True)
+def clip_to(store, tree, root, other):
+    """ Remove all polygons of the tree at `root` that are inside the tree at `other`. """
+    (node_plane, node_has_plane, node_front, node_back, node_head, node_tail, node_count) = tree
+    stack = np.empty(max(node_count[0], 1), dtype=np.int64)
+    stack[0] = root
+    size = 1
+    result = np.empty(2, dtype=np.int64)
+    while size > 0:
+        size -= 1
+        node = stack[size]
+
+        result[:] = -1
+        if node_head[node] >= 0:
+            store = clip_polygons(store, tree, other, node_head[node], result)
+        node_head[node] = result[0]
+        node_tail[node] = result[1]
+
+        if node_front[node] != NO_NODE:
+            stack[size] = node_front[node]
+            size += 1
+        if node_back[node] != NO_NODE:
+            stack[size] = node_back[node]
+            size += 1
+
+    return store
+
+
+@njit(cache=True, nogil=True)
+def all_polygons(store, tree, root):
+    """ Polygons of the tree at `root`, breadth first like BSPNode.allPolygons. """
+    (node_plane, node_has_plane, node_front, node_back, node_head, node_tail, node_count) = tree
+    queue = np.empty(max(node_count[0], 1), dtype=np.int64)
+    queue[0] = root
+    (first, last) = (0, 1)
+    ids = np.empty(16, dtype=np.int64)
+    count = 0
+    while first < last:
+        node = queue[first]
+        first += 1
+        poly = node_head[node]
+        while poly >= 0:
+            ids = grow_1d(ids, count + 1)
+            ids[count] = poly
+            count += 1
+            poly = store[5][poly]
+        if node_front[node] != NO_NODE:
+            queue[last] = node_front[node]
+            last += 1
+        if node_back[node] != NO_NODE:
+            queue[last] = node_back[node]
+            last += 1
+    return ids[:count].copy()
+
+
+@njit(cache=True, nogil=True)
+def link_chain(poly_next, ids):
+    for index in range(ids.shape[0] - 1):
+        poly_next[ids[index]] = ids[index + 1]
+    if ids.shape[0] > 0:
+        poly_next[ids[ids.shape[0] - 1]] = -1
+        return ids[0]
+    return -1
+
+
+@njit(cache=True, nogil=True)
+def load_polygons(store, offsets, positions, shared):
+    # one vertex per polygon corner, the plane comes from the first three corners
+    polygons = offsets.shape[0] - 1
+    store = reserve_store(store, positions.shape[0], polygons, positions.shape[0])
+    counts = store[8]
+    vertex_base = counts[0]
+    index_base = counts[2]
+    store[0][vertex_base:vertex_base + positions.shape[0]] = positions
+    for index in range(positions.shape[0]):
+        store[6][index_base + index] = vertex_base + index
+    counts[0] += positions.shape[0]
+    counts[2] += positions.shape[0]
+
+    chain = np.full(2, -1, dtype=np.int64)
+    plane = np.empty(4, dtype=np.float64)
+    for polygon in range(polygons):
+        start = offsets[polygon]
+        a = positions[start]
+        ab = positions[start + 1] - a
+        ac = positions[start + 2] - a
+        normal = np.array([ab[1] * ac[2] - ab[2] * ac[1], ab[2] * ac[0] - ab[0] * ac[2], ab[0] * ac[1] - ab[1] * ac[0]])
+        length = np.sqrt(normal[0] * normal[0] + normal[1] * normal[1] + normal[2] * normal[2])
+        if length > 0.0:
+            normal /= length
+        plane[:3] = normal
+        plane[3] = normal[0] * a[0] + normal[1] * a[1] + normal[2] * a[2]
+        poly = add_polygon(store, index_base + start, offsets[polygon + 1] - start, shared[polygon], plane)
+        chain_append(chain, store[5], poly)
+
+    return (store, chain[0])
+
+
+@njit(cache=True, nogil=True)
+def bool_csg_soa_native(offsets_a, positions_a, shared_a, offsets_b, positions_b, shared_b, operation):
+    vertices = positions_a.shape[0] + positions_b.shape[0]
+    polygons = offsets_a.shape[0] + offsets_b.shape[0]
+    store = (np.empty((vertices * 2, 3), dtype=np.float64), np.empty(polygons * 2, dtype=np.int64), np.empty(polygons * 2, dtype=np.int64),
+             np.empty(polygons * 2, dtype=np.int64), np.empty((polygons * 2, 4), dtype=np.float64), np.empty(polygons * 2, dtype=np.int64),
+             np.empty(vertices * 2, dtype=np.int64), np.empty((16, 2), dtype=np.int64), np.zeros(4, dtype=np.int64))
+    tree = (np.empty((polygons, 4), dtype=np.float64), np.empty(polygons, dtype=np.bool_), np.empty(polygons, dtype=np.int64),
+            np.empty(polygons, dtype=np.int64), np.empty(polygons, dtype=np.int64), np.empty(polygons, dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+    (store, head_a) = load_polygons(store, offsets_a, positions_a, shared_a)
+    (store, head_b) = load_polygons(store, offsets_b, positions_b, shared_b)
+
+    tree = reserve_nodes(tree, 2)
+    a = new_node(tree)
+    b = new_node(tree)
+    (store, tree) = build(store, tree, a, head_a)
+    (store, tree) = build(store, tree, b, head_b)
+
+    # same sequences as CSG.subtract, CSG.union and CSG.intersect
+    if operation == 0:
+        invert(store, tree, a)
+        store = clip_to(store, tree, a, b)
+        store = clip_to(store, tree, b, a)
+        invert(store, tree, b)
+        store = clip_to(store, tree, b, a)
+        invert(store, tree, b)
+    elif operation == 1:
+        store = clip_to(store, tree, a, b)
+        store = clip_to(store, tree, b, a)
+        invert(store, tree, b)
+        store = clip_to(store, tree, b, a)
+        invert(store, tree, b)
+    else:
+        invert(store, tree, a)
+        store = clip_to(store, tree, b, a)
+        invert(store, tree, b)
+        store = clip_to(store, tree, a, b)
+        store = clip_to(store, tree, b, a)
+
+    head = link_chain(store[5], all_polygons(store, tree, b))
+    (store, tree) = build(store, tree, a, head)
+    if operation != 1:
+        invert(store, tree, a)
+
+    # flatten the result, one vertex per polygon corner like the jitclass version
+    ids = all_polygons(store, tree, a)
+    (positions, poly_start, poly_count, poly_shared, poly_plane, poly_next, poly_verts, scratch, counts) = store
+    offsets = np.zeros(ids.shape[0] + 1, dtype=np.int64)
+    for index in range(ids.shape[0]):
+        offsets[index + 1] = offsets[index] + poly_count[ids[index]]
+    result_positions = np.empty((offsets[-1], 3), dtype=np.float64)
+    result_shared = np.empty(ids.shape[0], dtype=np.int64)
+    for index in range(ids.shape[0]):
+        poly = ids[index]
+        for corner in range(poly_count[poly]):
+            result_positions[offsets[index] + corner] = positions[poly_verts[poly_start[poly] + corner]]
+        result_shared[index] = poly_shared[poly]
+
+    return (offsets, result_positions, result_shared)
+
+
+def csg_soa_from_triangles(triangles, shared):
+    # triangle soup from mesh_to_csg_triangles as CSR polygons
+    return (np.arange(0, len(triangles) * 3 + 1, 3, dtype=np.int64), np.ascontiguousarray(triangles, dtype=np.float64).reshape(-1, 3), np.asarray(shared, dtype=np.int64))
+
+
+def bool_csg_soa(polygons_a, polygons_b, operation_type):
+    timer_start()
+    res = bool_csg_soa_native(*polygons_a, *polygons_b, OPERATION_CODES[operation_type])
+    timer_end('njit soa ')
+    return res
@@ -3,7 +3,7 @@ import bmesh
 from mathutils import Vector, Matrix
 
 from .. ops import origin_to_center, origin_to_bottom, transform_apply_object
-from .. parse import attribute_create, attribute_get, evaluate_expression, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. parse import attribute_create, attribute_get, extract_custom_attribute_layers, evaluate_expression_foreach, evaluate_expression_mesh, TYPE_INITIAL_VALUE
 
 
 def calc_transform_matrix(bound_box, target_pos, target_normal, align_type, normal_align):
@@ -28,6 +28,26 @@ def calc_transform_matrix(bound_box, target_pos, target_normal, align_type, norm
     return copy_mat
 
 
+def select_copy_targets(target_obj, select_type, expression):
+    me = target_obj.data
+    mesh_elements = {'VERT': me.vertices, 'EDGE': me.edges, 'FACE': me.polygons}[select_type]
+
+    try:
+        # a bmesh is only built when the expression reads more than the mesh arrays
+        values = evaluate_expression_mesh(expression, target_obj, me, select_type, default_ret=True)
+        if values is None:
+            target_bm = bmesh.new()
+            target_bm.from_mesh(me)
+            elements = {'VERT': target_bm.verts, 'EDGE': target_bm.edges, 'FACE': target_bm.faces}[select_type]
+            try:
+                values = evaluate_expression_foreach(elements, expression, target_obj, me, target_bm, select_type, default_ret=True)
+            finally:
+                target_bm.free()
+        mesh_elements.foreach_set('select', [bool(value) for value in values])
+    except Exception as e:
+        print('Failed to evaluate expression: ', str(e))
+
+
 def copy_operator(inputstream0, inputstream1, options={}):
     select_type = options['select_type']
     expression = options['expression']
@@ -40,27 +60,7 @@ def copy_operator(inputstream0, inputstream1, options={}):
         instances = []
         for target_obj in inputstream1:
             transform_apply_object([target_obj])
-
-            target_bm = bmesh.new()
-            target_bm.from_mesh(target_obj.data)
-
-            elements = []
-            if select_type == 'VERT':
-                elements = target_bm.verts
-                mesh_elements = target_obj.data.vertices
-            if select_type == 'EDGE':
-                elements = target_bm.edges
-                mesh_elements = target_obj.data.edges
-            if select_type == 'FACE':
-                elements = target_bm.faces
-                mesh_elements = target_obj.data.polygons
-
-            try:
-                values = evaluate_expression_foreach(elements, expression, target_obj, target_obj.data, target_bm, select_type, default_ret=True)
-                for elem, value in zip(mesh_elements, values): setattr(elem, 'select', bool(value))
-                # target_bm.select_flush(False)
-            except Exception as e:
-                print('Failed to evaluate expression: ', str(e))
+            select_copy_targets(target_obj, select_type, expression)
 
             for select_obj in inputstream0:
                 select_instances = []
@@ -81,34 +81,12 @@ def copy_operator(inputstream0, inputstream1, options={}):
 
                 instances.extend(select_instances)
 
-            target_bm.free()
-
         return (instances, None)
 
 
     for target_obj in inputstream1:
         transform_apply_object([target_obj])
-
-        target_bm = bmesh.new()
-        target_bm.from_mesh(target_obj.data)
-
-        elements = []
-        if select_type == 'VERT':
-            elements = target_bm.verts
-            mesh_elements = target_obj.data.vertices
-        if select_type == 'EDGE':
-            elements = target_bm.edges
-            mesh_elements = target_obj.data.edges
-        if select_type == 'FACE':
-            elements = target_bm.faces
-            mesh_elements = target_obj.data.polygons
-
-        try:
-            values = evaluate_expression_foreach(elements, expression, target_obj, target_obj.data, target_bm, select_type, default_ret=True)
-            for elem, value in zip(mesh_elements, values): setattr(elem, 'select', bool(value))
-            # target_bm.select_flush(False)
-        except Exception as e:
-            print('Failed to evaluate expression: ', str(e))
+        select_copy_targets(target_obj, select_type, expression)
 
 
         for select_obj in inputstream0:
@@ -189,7 +167,5 @@ def copy_operator(inputstream0, inputstream1, options={}):
             select_obj.data.update()
             bm.free()
 
-        target_bm.free()
-
 
     return (inputstream0, None)
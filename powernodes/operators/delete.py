@@ -1,7 +1,8 @@
 import bpy
 import bmesh
 
-from .. parse import attribute_create, attribute_get, evaluate_expression, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. parse import attribute_create, attribute_get, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. session import bmesh_begin, bmesh_end
 
 
 def delete_operator(inputstream, options={}):
@@ -11,8 +12,7 @@ def delete_operator(inputstream, options={}):
     for obj in inputstream:
         me = obj.data
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
 
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
@@ -40,9 +40,7 @@ def delete_operator(inputstream, options={}):
         bmesh.ops.delete(bm, geom=selected_elements, context=select_type)
 
         # Finish up, write the bmesh back to the mesh
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -57,8 +55,7 @@ def dissolve_operator(inputstream, options={}):
     for obj in inputstream:
         me = obj.data
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
 
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
@@ -87,8 +84,6 @@ def dissolve_operator(inputstream, options={}):
             bmesh.ops.dissolve_faces(bm, faces=selected_elements, use_verts=use_verts)
 
         # Finish up, write the bmesh back to the mesh
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
@@ -1,7 +1,8 @@
 import bpy
 import bmesh
 
-from .. parse import attribute_create, attribute_get, evaluate_expression, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. parse import attribute_create, attribute_get, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. session import bmesh_begin, bmesh_end
 
 
 def fill_operator(inputstream, options={}):
@@ -11,8 +12,7 @@ def fill_operator(inputstream, options={}):
     for obj in inputstream:
         me = obj.data
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
 
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
@@ -36,8 +36,6 @@ def fill_operator(inputstream, options={}):
         bmesh.ops.contextual_create(bm, geom=selected_elements) #, mat_nr, use_smooth)
 
         # Finish up, write the bmesh back to the mesh
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
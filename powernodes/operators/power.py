@@ -5,12 +5,14 @@ from mathutils import Vector, Matrix
 from math import radians, sqrt
 
 from .. ops import *
-from .. parse import attribute_create, attribute_get, evaluate_expression, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. parse import attribute_create, attribute_get, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
 from .. utils.utils import collinear, calc_bbox_center, matrix_make_positive, curve_length, timer_start, timer_end
+from .. session import bmesh_begin, bmesh_end, modifier_begin, modifier_end
 
 import numpy as np
 
 from . bool.csg.numba.core import bool_csg_mesh
+from . bool.csg.numba.soa import bool_csg_soa, csg_soa_from_triangles
 import numba as nb
 from numba import jit, cuda
 
@@ -70,6 +72,61 @@ def transform_operator(inputstream, options={}):
     return (inputstream, None)
 
 
+def transform_buffer_operator(inputstream, options={}):
+    apply_transform = options['apply_transform']
+    use_local_space = options['use_local_space']
+    use_relative = options['use_relative']
+    use_radians = options['use_radians']
+    scale = Vector(options['sca'])
+
+    rotation = options['rot']
+    if not use_radians:
+        rotation = [radians(rot) for rot in rotation]
+
+    buffers = []
+    for buffer in inputstream:
+        (loc, rot, sca) = Matrix(buffer.matrix.tolist()).decompose()
+        euler = rot.to_euler()
+
+        location = Vector(options['loc'])
+        if use_local_space:
+            location = location @ euler.to_matrix().inverted()
+
+        if use_relative:
+            loc += location
+            if use_local_space:
+                euler.rotate_axis("X", rotation[0])
+                euler.rotate_axis("Y", rotation[1])
+                euler.rotate_axis("Z", rotation[2])
+            else:
+                euler.x += rotation[0]
+                euler.y += rotation[1]
+                euler.z += rotation[2]
+            sca = Vector([s * t for s, t in zip(sca, scale)])
+        else:
+            loc = location
+            if use_local_space:
+                euler.rotate_axis("X", -euler.x + rotation[0])
+                euler.rotate_axis("Y", -euler.y + rotation[1])
+                euler.rotate_axis("Z", -euler.z + rotation[2])
+            else:
+                euler.x = rotation[0]
+                euler.y = rotation[1]
+                euler.z = rotation[2]
+            sca = scale
+
+        matrix = np.array(Matrix.Translation(loc) @ euler.to_matrix().to_4x4() @ Matrix.Diagonal(sca.to_4d()), dtype=np.float32)
+
+        if apply_transform:
+            # bake into the positions, the buffer keeps an identity matrix
+            positions = buffer.positions @ matrix[:3, :3].T + matrix[:3, 3]
+            buffers.append(buffer.copy(positions=positions.astype(np.float32), matrix=np.identity(4, dtype=np.float32)))
+        else:
+            buffers.append(buffer.copy(matrix=matrix))
+
+    return (buffers, None)
+
+
 def bool_csg(a, b, operation_type):
     polygons = None
     if operation_type == 'DIFFERENCE':
@@ -81,62 +138,68 @@ def bool_csg(a, b, operation_type):
     return polygons
 
 
-def bool_csg_numba(target_obj, cutter_obj, operation_type):
-    # start CSG
-    target_obj.data.calc_loop_triangles()
-    cutter_obj.data.calc_loop_triangles()
+def mesh_to_csg_triangles(mesh, shared_offset=0):
+    # triangle soup as numpy buffers, safe to hand over to a worker thread
+    mesh.calc_loop_triangles()
 
-    # connect_concave_bmesh_operator(target_obj)
-    # connect_concave_bmesh_operator(cutter_obj)
-    mesh = target_obj.data
-    mesh2 = cutter_obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    tri_verts = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', tri_verts)
+    shared = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+    mesh.loop_triangles.foreach_get('polygon_index', shared)
 
-    timer_start()
-    a_polygons = [{'vertices':[mesh.vertices[vert_idx].co[:] for vert_idx in loop_triangle.vertices], 'shared': loop_triangle.polygon_index} for loop_triangle in mesh.loop_triangles]
-    # a_polygons = [{'vertices':[mesh.vertices[mesh.loops[loop_idx].vertex_index].co[:] for loop_idx in p.loop_indices], 'shared': p.index, 'selected': (1 if p.select else 0)} for p in mesh.polygons]
-    timer_end('target load ')
+    triangles = co.astype(np.float64).reshape(-1, 3)[tri_verts].reshape(-1, 3, 3)
+    return (triangles, shared + shared_offset)
 
-    timer_start()
-    total_target_count = len(target_obj.data.polygons)
-    b_polygons = [{'vertices':[mesh2.vertices[vert_idx].co[:] for vert_idx in loop_triangle.vertices], 'shared': loop_triangle.polygon_index + total_target_count} for loop_triangle in mesh2.loop_triangles]
-    # b_polygons = [{'vertices':[mesh2.vertices[mesh2.loops[loop_idx].vertex_index].co[:] for loop_idx in p.loop_indices], 'shared': p.index + total_target_count, 'selected': (1 if p.select else 0)} for p in mesh2.polygons]
-    timer_end('cutter load ')
 
-    timer_start()
-    polygons = bool_csg_mesh(a_polygons, b_polygons, operation_type)
-    timer_end('bool op ')
+def csg_polygons_from_triangles(triangles, shared):
+    return [{'vertices': tri, 'shared': index} for tri, index in zip(triangles.tolist(), shared.tolist())]
 
-    timer_start()
 
+def csg_polygons_from_result(polygons):
+    return [{'vertices': [v[:3] for v in polygon], 'shared': int(polygon[0][3])} for polygon in polygons]
+
+
+def csg_result_to_mesh(target_obj, polygons):
     vertices = []
-    vnormals = []
     faces = []
-    normals = []
-    colors = []
     count = 0
     for polygon in polygons:
         indices = []
-        shared = 0
         for v in polygon:
-            pos = (v[0], v[1], v[2])
-            shared = int(v[3])
-            # if pos not in vertices:
-            vertices.append(pos)
-            index = count
-            indices.append(index)
+            vertices.append((v[0], v[1], v[2]))
+            indices.append(count)
             count += 1
         faces.append(indices)
-        # colors.append(shared)
-
-    timer_end('to poly ')
-
-    timer_start()
 
     csg_mesh = bpy.data.meshes.new("bool_new_mesh")
     csg_mesh.from_pydata(vertices, [], faces)
     for index, face in enumerate(csg_mesh.polygons): setattr(face, 'material_index', int(polygons[index][0][3]))
     csg_mesh.update()
 
+    replace_csg_mesh(target_obj, csg_mesh)
+
+
+def csg_arrays_to_mesh(target_obj, result):
+    # CSR result of the SoA solver, one vertex per polygon corner
+    (offsets, positions, shared) = result
+
+    csg_mesh = bpy.data.meshes.new("bool_new_mesh")
+    csg_mesh.vertices.add(len(positions))
+    csg_mesh.vertices.foreach_set('co', positions.astype(np.float32).ravel())
+    csg_mesh.loops.add(len(positions))
+    csg_mesh.loops.foreach_set('vertex_index', np.arange(len(positions), dtype=np.int32))
+    csg_mesh.polygons.add(len(shared))
+    csg_mesh.polygons.foreach_set('loop_start', offsets[:-1].astype(np.int32))
+    csg_mesh.polygons.foreach_set('loop_total', np.diff(offsets).astype(np.int32))
+    csg_mesh.polygons.foreach_set('material_index', shared.astype(np.int32))
+    csg_mesh.update(calc_edges=True)
+
+    replace_csg_mesh(target_obj, csg_mesh)
+
+
+def replace_csg_mesh(target_obj, csg_mesh):
     old_mesh = target_obj.data
     target_obj.data = csg_mesh
     target_obj.data.update()
@@ -145,10 +208,6 @@ def bool_csg_numba(target_obj, cutter_obj, operation_type):
     if old_mesh:
         bpy.data.meshes.remove(old_mesh)
 
-    timer_end('to bmesh ')
-
-    timer_start()
-
     # run clean up multiple times
     # weld_operator([target_obj], {'distance': 0.00001})
     fix_t_junction(target_obj, {'distance': 0.00001})
@@ -160,13 +219,61 @@ def bool_csg_numba(target_obj, cutter_obj, operation_type):
     dissolve_tess_edges(target_obj)
     limited_dissolve_bmesh_operator(target_obj)
 
-    timer_end('clean up ')
 
-    return
+def bool_csg_numba(target_obj, cutter_obj, operation_type):
+    # start CSG
+    timer_start()
+    (a_triangles, a_shared) = mesh_to_csg_triangles(target_obj.data)
+    (b_triangles, b_shared) = mesh_to_csg_triangles(cutter_obj.data, len(target_obj.data.polygons))
+    a_polygons = csg_polygons_from_triangles(a_triangles, a_shared)
+    b_polygons = csg_polygons_from_triangles(b_triangles, b_shared)
+    timer_end('load ')
+
+    timer_start()
+    polygons = bool_csg_mesh(a_polygons, b_polygons, operation_type)
+    timer_end('bool op ')
+
+    timer_start()
+    csg_result_to_mesh(target_obj, polygons)
+    timer_end('to mesh ')
 
     # # end CSG
 
 
+def bool_csg_numba_soa(target_obj, cutter_obj, operation_type):
+    timer_start()
+    a_polygons = csg_soa_from_triangles(*mesh_to_csg_triangles(target_obj.data))
+    b_polygons = csg_soa_from_triangles(*mesh_to_csg_triangles(cutter_obj.data, len(target_obj.data.polygons)))
+    timer_end('load ')
+
+    timer_start()
+    result = bool_csg_soa(a_polygons, b_polygons, operation_type)
+    timer_end('bool op ')
+
+    timer_start()
+    csg_arrays_to_mesh(target_obj, result)
+    timer_end('to mesh ')
+
+
+def boolean_prepare_operands(target_obj, cutter_obj, operation_type, fix_boolean):
+    if operation_type == 'SLICE':
+        operation_type = 'DIFFERENCE'
+        solidify_operator([cutter_obj], options={
+            'solidify_mode': 'EXTRUDE',
+            'thickness': 0.00001,
+            'offset': -1,
+            'use_rim': True,
+            'use_rim_only': False})
+
+    if fix_boolean:
+        # fix coplanar
+        transform_apply_object([cutter_obj])
+        sca = Matrix.Diagonal((1.00001, 1.00001, 1.00001)).to_4x4()
+        cutter_obj.data.transform(sca)
+
+    return operation_type
+
+
 def boolean_operator(inputstream0, inputstream1, options={}):
     solver = options['solver']
     operation_type = options['operation_type']
@@ -180,24 +287,14 @@ def boolean_operator(inputstream0, inputstream1, options={}):
             if len(target_obj.data.polygons) == 0 or len(cutter_obj.data.polygons) == 0:
                 continue
 
-            if operation_type == 'SLICE':
-                operation_type = 'DIFFERENCE'
-                solidify_operator([cutter_obj], options={
-                    'solidify_mode': 'EXTRUDE',
-                    'thickness': 0.00001,
-                    'offset': -1,
-                    'use_rim': True,
-                    'use_rim_only': False})
-
-            if fix_boolean:
-                # fix coplanar
-                transform_apply_object([cutter_obj])
-                sca = Matrix.Diagonal((1.00001, 1.00001, 1.00001)).to_4x4()
-                cutter_obj.data.transform(sca)
+            operation_type = boolean_prepare_operands(target_obj, cutter_obj, operation_type, fix_boolean)
 
             if solver == 'CSG':
                 transform_apply_object([target_obj, cutter_obj])
                 bool_csg_numba(target_obj, cutter_obj, operation_type)
+            elif solver == 'CSG_SOA':
+                transform_apply_object([target_obj, cutter_obj])
+                bool_csg_numba_soa(target_obj, cutter_obj, operation_type)
             else:
                 mod = target_obj.modifiers.new(name=operation_type + '_' + cutter_obj.name, type='BOOLEAN')
                 mod.solver = solver
@@ -227,6 +324,80 @@ def boolean_operator(inputstream0, inputstream1, options={}):
     return (inputstream0, None)
 
 
+# async boolean, only the CSG solvers run outside of blender
+def boolean_async_prepare(inputstream0, inputstream1, options={}):
+    solver = options['solver']
+    if solver not in ['CSG', 'CSG_SOA']:
+        return None
+
+    # the sync path cleans the mesh up after every cutter, which needs blender,
+    # several cutters run there so both modes give the same geometry
+    if len([cutter_obj for cutter_obj in inputstream1 if len(cutter_obj.data.polygons) > 0]) > 1:
+        return None
+
+    operation_type = options['operation_type']
+    fix_boolean = options['fix_boolean']
+
+    targets = []
+    for target_obj in inputstream0:
+        if len(target_obj.data.polygons) == 0:
+            continue
+        cutters = []
+        for cutter_obj in inputstream1:
+            if len(cutter_obj.data.polygons) == 0:
+                continue
+            operation_type = boolean_prepare_operands(target_obj, cutter_obj, operation_type, fix_boolean)
+            transform_apply_object([target_obj, cutter_obj])
+            cutters.append((mesh_to_csg_triangles(cutter_obj.data), operation_type))
+        # cutter indices start past the target polygons, not its triangles, as in the sync path
+        targets.append((target_obj.name, solver, mesh_to_csg_triangles(target_obj.data), len(target_obj.data.polygons), cutters))
+
+    return targets
+
+
+def boolean_async_kernel(targets):
+    results = {}
+    for (target_name, solver, (triangles, shared), polygon_count, cutters) in targets:
+        if solver == 'CSG_SOA':
+            results[target_name] = (solver, boolean_soa_kernel(triangles, shared, polygon_count, cutters))
+            continue
+        polygons = None
+        a_polygons = csg_polygons_from_triangles(triangles, shared)
+        for ((b_triangles, b_shared), operation_type) in cutters:
+            # cutter polygons are offset past the current target polygons
+            b_polygons = csg_polygons_from_triangles(b_triangles, b_shared + polygon_count)
+            polygons = bool_csg_mesh(a_polygons, b_polygons, operation_type)
+            a_polygons = csg_polygons_from_result(polygons)
+            polygon_count = len(a_polygons)
+        results[target_name] = (solver, polygons)
+    return results
+
+
+def boolean_soa_kernel(triangles, shared, polygon_count, cutters):
+    # results are CSR arrays, they feed the next cutter as they are
+    result = None
+    a_polygons = csg_soa_from_triangles(triangles, shared)
+    for ((b_triangles, b_shared), operation_type) in cutters:
+        b_polygons = csg_soa_from_triangles(b_triangles, b_shared + polygon_count)
+        result = bool_csg_soa(a_polygons, b_polygons, operation_type)
+        a_polygons = result
+        polygon_count = len(result[2])
+    return result
+
+
+def boolean_async_commit(inputstream0, inputstream1, results={}, options={}):
+    for target_obj in inputstream0:
+        (solver, result) = results.get(target_obj.name, (None, None))
+        if result is None:
+            continue
+        if solver == 'CSG_SOA':
+            csg_arrays_to_mesh(target_obj, result)
+        else:
+            csg_result_to_mesh(target_obj, result)
+
+    return (inputstream0, None)
+
+
 @cuda.jit
 def numba_push_cuda(a, val):
     arr_len = a.shape[0]
@@ -282,6 +453,22 @@ def explode_operator(objects=[], options={}):
 
     return (objects, None)
 
+
+def explode_buffer_operator(inputstream, options={}):
+    if len(inputstream) < 1:
+        return ([], None)
+
+    value = options['value']
+
+    # same push as the cuda kernel, every component moves along the normalized position
+    buffer = inputstream[0]
+    positions = buffer.positions
+    dist = np.linalg.norm(positions, axis=1, keepdims=True)
+    direction = np.divide(positions, dist, out=np.zeros_like(positions), where=dist > 0)
+    exploded = buffer.copy(positions=(positions + direction * value).astype(np.float32))
+
+    return ([exploded] + inputstream[1:], None)
+
 def bevel_operator(inputstream, options={}):
     mode = options['mode']
     expression = options['expression']
@@ -298,8 +485,7 @@ def bevel_operator(inputstream, options={}):
         me = obj.data
 
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
 
@@ -335,9 +521,7 @@ def bevel_operator(inputstream, options={}):
                                 material=-1)
 
         # Finish up, write the bmesh back to the mesh
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -355,8 +539,7 @@ def extrude_operator(inputstream, options={}):
         me = obj.data
 
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
 
         bm.normal_update()
 
@@ -459,9 +642,7 @@ def extrude_operator(inputstream, options={}):
                 # bmesh.ops.translate(bm, vec = rot_mat @ offset_displace, verts = face.verts )
 
         # Finish up, write the bmesh back to the mesh
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -482,8 +663,7 @@ def inset_operator(inputstream, options={}):
         me = obj.data
 
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
 
         bm.normal_update()
 
@@ -522,9 +702,7 @@ def inset_operator(inputstream, options={}):
                 use_outset=use_outset)
 
         # Finish up, write the bmesh back to the mesh
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -533,13 +711,9 @@ def weld_operator(inputstream, options={'distance': 0.00001}):
     distance = options['distance']
 
     for obj in inputstream:
-        me = obj.data
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
         bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=distance)
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -727,33 +901,17 @@ def mirror_operator(inputstream0, inputstream1, options={}):
     merge_threshold = options['merge_threshold']
 
     for target_obj in inputstream0:
-        mod = target_obj.modifiers.new(name='MIRROR' + '_' + target_obj.name, type='MIRROR')
-        mod.use_axis = use_axis
-        mod.use_bisect_axis = use_bisect_axis
-        mod.use_bisect_flip_axis = use_bisect_flip_axis
-        mod.use_clip = use_clip
-        mod.use_mirror_merge = use_mirror_merge
-        mod.merge_threshold = merge_threshold
-        if len(inputstream1) > 0:
-            mirror_object = inputstream1[0]
-            mod.mirror_object = mirror_object
-
-        # get a reference to the current obj.data
-        old_mesh = target_obj.data
-
-        (ctx, edp) = capture_context([target_obj])
-        object_eval = target_obj.evaluated_get(edp)
-        new_mesh_from_eval = bpy.data.meshes.new_from_object(object_eval, preserve_all_data_layers=True, depsgraph=edp)
-
-        # object will still have modifiers, remove them
-        target_obj.modifiers.clear()
-
-        # assign the new mesh to obj.data 
-        target_obj.data = new_mesh_from_eval
-
-        # remove the old mesh from the .blend
-        if old_mesh:
-            bpy.data.meshes.remove(old_mesh)
+        stack = modifier_begin(target_obj)
+        stack.append(('MIRROR', {
+            'use_axis': use_axis,
+            'use_bisect_axis': use_bisect_axis,
+            'use_bisect_flip_axis': use_bisect_flip_axis,
+            'use_clip': use_clip,
+            'use_mirror_merge': use_mirror_merge,
+            'merge_threshold': merge_threshold,
+            'mirror_object': inputstream1[0] if len(inputstream1) > 0 else None}))
+
+        modifier_end(target_obj, stack, inputstream1[:1])
 
     return (inputstream0, None)
 
@@ -769,33 +927,19 @@ def subdivide_operator(inputstream, options={}):
     use_custom_normals = options['use_custom_normals']
 
     for target_obj in inputstream:
-        mod = target_obj.modifiers.new(name='SUBSURF' + '_' + target_obj.name, type='SUBSURF')
-        mod.subdivision_type = subdivision_type
-        mod.levels = levels
-        # mod.render_levels = 2
-        mod.quality = quality
-        mod.use_limit_surface = use_limit_surface
-        mod.uv_smooth = uv_smooth
-        mod.boundary_smooth = boundary_smooth
-        mod.use_creases = use_creases
-        mod.use_custom_normals = use_custom_normals
-
-        # get a reference to the current obj.data
-        old_mesh = target_obj.data
-
-        (ctx, edp) = capture_context([target_obj])
-        object_eval = target_obj.evaluated_get(edp)
-        new_mesh_from_eval = bpy.data.meshes.new_from_object(object_eval, preserve_all_data_layers=True, depsgraph=edp)
-
-        # object will still have modifiers, remove them
-        target_obj.modifiers.clear()
-
-        # assign the new mesh to obj.data 
-        target_obj.data = new_mesh_from_eval
-
-        # remove the old mesh from the .blend
-        if old_mesh:
-            bpy.data.meshes.remove(old_mesh)
+        stack = modifier_begin(target_obj)
+        stack.append(('SUBSURF', {
+            'subdivision_type': subdivision_type,
+            'levels': levels,
+            # 'render_levels': 2,
+            'quality': quality,
+            'use_limit_surface': use_limit_surface,
+            'uv_smooth': uv_smooth,
+            'boundary_smooth': boundary_smooth,
+            'use_creases': use_creases,
+            'use_custom_normals': use_custom_normals}))
+
+        modifier_end(target_obj, stack)
 
     return (inputstream, None)
 
@@ -807,28 +951,14 @@ def triangulate_operator(inputstream, options={}):
     keep_custom_normals = options['keep_custom_normals']
 
     for target_obj in inputstream:
-        mod = target_obj.modifiers.new(name='TRIANGULATE' + '_' + target_obj.name, type='TRIANGULATE')
-        mod.quad_method = quad_method
-        mod.ngon_method = ngon_method
-        mod.min_vertices = min_vertices
-        mod.keep_custom_normals = keep_custom_normals
-
-        # get a reference to the current obj.data
-        old_mesh = target_obj.data
-
-        (ctx, edp) = capture_context([target_obj])
-        object_eval = target_obj.evaluated_get(edp)
-        new_mesh_from_eval = bpy.data.meshes.new_from_object(object_eval, preserve_all_data_layers=True, depsgraph=edp)
+        stack = modifier_begin(target_obj)
+        stack.append(('TRIANGULATE', {
+            'quad_method': quad_method,
+            'ngon_method': ngon_method,
+            'min_vertices': min_vertices,
+            'keep_custom_normals': keep_custom_normals}))
 
-        # object will still have modifiers, remove them
-        target_obj.modifiers.clear()
-
-        # assign the new mesh to obj.data 
-        target_obj.data = new_mesh_from_eval
-
-        # remove the old mesh from the .blend
-        if old_mesh:
-            bpy.data.meshes.remove(old_mesh)
+        modifier_end(target_obj, stack)
 
     return (inputstream, None)
 
@@ -840,29 +970,15 @@ def solidify_operator(inputstream, options={}):
     use_rim_only = options['use_rim_only']
 
     for target_obj in inputstream:
-        mod = target_obj.modifiers.new(name='SOLIDIFY' + '_' + target_obj.name, type='SOLIDIFY')
-        mod.solidify_mode = solidify_mode
-        mod.thickness = thickness
-        mod.offset = offset
-        mod.use_rim = use_rim
-        mod.use_rim_only = use_rim_only
+        stack = modifier_begin(target_obj)
+        stack.append(('SOLIDIFY', {
+            'solidify_mode': solidify_mode,
+            'thickness': thickness,
+            'offset': offset,
+            'use_rim': use_rim,
+            'use_rim_only': use_rim_only}))
 
-        # get a reference to the current obj.data
-        old_mesh = target_obj.data
-
-        (ctx, edp) = capture_context([target_obj])
-        object_eval = target_obj.evaluated_get(edp)
-        new_mesh_from_eval = bpy.data.meshes.new_from_object(object_eval, preserve_all_data_layers=True, depsgraph=edp)
-
-        # object will still have modifiers, remove them
-        target_obj.modifiers.clear()
-
-        # assign the new mesh to obj.data 
-        target_obj.data = new_mesh_from_eval
-
-        # remove the old mesh from the .blend
-        if old_mesh:
-            bpy.data.meshes.remove(old_mesh)
+        modifier_end(target_obj, stack)
 
     return (inputstream, None)
 
@@ -931,34 +1047,19 @@ def screw_operator(inputstream0, inputstream1, options={}):
         axis_object = inputstream1[0]
 
     for obj in inputstream0:
-        me = obj.data
-        mod = obj.modifiers.new(name='SCREW' + '_' + obj.name, type='SCREW')
-        mod.angle = math.radians(angle)
-        mod.screw_offset = screw_offset
-        mod.iterations = iterations
-        mod.axis = axis
-        mod.object = axis_object
-        mod.steps = steps
-        mod.use_object_screw_offset = use_object_screw_offset
-        mod.use_merge_vertices = use_merge_vertices
-        mod.merge_threshold = merge_threshold
-
-        # get a reference to the current obj.data
-        old_mesh = obj.data
-
-        (ctx, edp) = capture_context([obj])
-        object_eval = obj.evaluated_get(edp)
-        new_mesh_from_eval = bpy.data.meshes.new_from_object(object_eval, preserve_all_data_layers=True, depsgraph=edp)
-
-        # object will still have modifiers, remove them
-        obj.modifiers.clear()
-
-        # assign the new mesh to obj.data 
-        obj.data = new_mesh_from_eval
-
-        # remove the old mesh from the .blend
-        if old_mesh:
-            bpy.data.meshes.remove(old_mesh)
+        stack = modifier_begin(obj)
+        stack.append(('SCREW', {
+            'angle': math.radians(angle),
+            'screw_offset': screw_offset,
+            'iterations': iterations,
+            'axis': axis,
+            'object': axis_object,
+            'steps': steps,
+            'use_object_screw_offset': use_object_screw_offset,
+            'use_merge_vertices': use_merge_vertices,
+            'merge_threshold': merge_threshold}))
+
+        modifier_end(obj, stack, [axis_object] if axis_object else [])
 
     return (inputstream0, None)
 
@@ -1003,10 +1104,8 @@ def resample_operator(inputstream, options={}):
     length = options['length']
     
     for obj in inputstream:
-        me = obj.data
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
 
         edge_cuts = [(e, e.calc_length() / length) for e in bm.edges]
 
@@ -1018,9 +1117,7 @@ def resample_operator(inputstream, options={}):
         # # [bmesh.utils.edge_split(edge, edge.verts[0], fac) for edge, fac in edges]
 
         # Finish up, write the bmesh back to the mesh
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -1032,10 +1129,8 @@ def smooth_operator(inputstream, options={}):
     preserve_volume = options['preserve_volume']
     
     for obj in inputstream:
-        me = obj.data
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
 
         for idx in range(repeat):
             if smooth_type == 'SIMPLE':
@@ -1044,9 +1139,7 @@ def smooth_operator(inputstream, options={}):
                 bmesh.ops.smooth_laplacian_vert(bm, verts=bm.verts, lambda_factor=factor, lambda_border=0.01, preserve_volume=preserve_volume, use_x=True, use_y=True, use_z=True)
 
         # Finish up, write the bmesh back to the mesh
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
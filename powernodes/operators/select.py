@@ -2,8 +2,9 @@ import bpy
 import bmesh
 from math import degrees, radians
 
-from .. parse import attribute_create, attribute_get, evaluate_expression, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. parse import attribute_create, attribute_get, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
 from .. utils.utils import timer_start, timer_end
+from .. session import bmesh_begin, bmesh_end
 
 
 def select_by_angle(inputstream, options={}):
@@ -12,11 +13,8 @@ def select_by_angle(inputstream, options={}):
     max_angle = options['max_angle']
 
     for obj in inputstream:
-        me = obj.data
-
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
         bm.faces.ensure_lookup_table()
@@ -42,9 +40,7 @@ def select_by_angle(inputstream, options={}):
 
         # Finish up, write the bmesh back to the mesh
         bm.select_flush(False)
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -53,11 +49,8 @@ def select_by_boundary(inputstream, options={}):
     select_type = options['select_type']
 
     for obj in inputstream:
-        me = obj.data
-
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
         bm.faces.ensure_lookup_table()
@@ -78,9 +71,7 @@ def select_by_boundary(inputstream, options={}):
 
         # Finish up, write the bmesh back to the mesh
         bm.select_flush(False)
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -180,8 +171,7 @@ def select_by_expression(inputstream, options={}):
         me = obj.data
 
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
         bm.faces.ensure_lookup_table()
@@ -202,9 +192,7 @@ def select_by_expression(inputstream, options={}):
 
         # Finish up, write the bmesh back to the mesh
         bm.select_flush(False)
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -215,11 +203,8 @@ def select_by_normal(inputstream, options={}):
     angle_tolerance = radians(options['angle_tolerance'])
 
     for obj in inputstream:
-        me = obj.data
-
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
         bm.faces.ensure_lookup_table()
@@ -239,9 +224,7 @@ def select_by_normal(inputstream, options={}):
 
         # Finish up, write the bmesh back to the mesh
         bm.select_flush(False)
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
 
@@ -290,11 +273,8 @@ def select_checkers(inputstream, options={}):
     offset = options['offset']
 
     for obj in inputstream:
-        me = obj.data
-
         # Get a BMesh representation
-        bm = bmesh.new()
-        bm.from_mesh(me)
+        bm = bmesh_begin(obj)
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
         bm.faces.ensure_lookup_table()
@@ -366,8 +346,6 @@ def select_checkers(inputstream, options={}):
 
         # Finish up, write the bmesh back to the mesh
         bm.select_flush(False)
-        bm.to_mesh(me)
-        me.update()
-        bm.free()
+        bmesh_end(obj, bm)
 
     return (inputstream, None)
@@ -2,7 +2,7 @@ import bpy
 import bmesh
 import random
 
-from .. parse import attribute_create, attribute_get, evaluate_expression, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from .. parse import attribute_create, attribute_get, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
 
 
 def sort_by_xyz(inputstream, options={}):
@@ -9,7 +9,7 @@ from mathutils.noise import noise_vector, hetero_terrain, hybrid_multi_fractal,
 from math import radians, sqrt
 import random
 
-from . parse import attribute_create, attribute_get, evaluate_expression, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
+from . parse import attribute_create, attribute_get, extract_custom_attribute_layers, evaluate_expression_foreach, TYPE_INITIAL_VALUE
 from . utils.utils import calc_bbox_center, matrix_make_positive, curve_length, collinear, timer_start, timer_end
 
 from functools import reduce
@@ -66,6 +66,36 @@ def capture_context(objects=[]):
     return (ctx, edp)
 
 
+def apply_modifier_stack(obj=None, stack=[], depends=[]):
+    # one depsgraph evaluation and one new mesh for the whole stack
+    if not stack:
+        return obj
+
+    for (modifier_type, settings) in stack:
+        mod = obj.modifiers.new(name=modifier_type + '_' + obj.name, type=modifier_type)
+        for name, value in settings.items():
+            setattr(mod, name, value)
+
+    # get a reference to the current obj.data
+    old_mesh = obj.data
+
+    (ctx, edp) = capture_context([obj] + depends)
+    object_eval = obj.evaluated_get(edp)
+    new_mesh_from_eval = bpy.data.meshes.new_from_object(object_eval, preserve_all_data_layers=True, depsgraph=edp)
+
+    # object will still have modifiers, remove them
+    obj.modifiers.clear()
+
+    # assign the new mesh to obj.data
+    obj.data = new_mesh_from_eval
+
+    # the base mesh of a fused run is shared with the upstream outputs
+    if old_mesh and old_mesh.users == 0:
+        bpy.data.meshes.remove(old_mesh)
+
+    return obj
+
+
 def new_collection(collection='POWER_NODES'):
     if collection not in bpy.data.collections:
         new_col = bpy.data.collections.new(collection)
@@ -109,7 +139,7 @@ def new_object(name='OUTPUT'):
     return new_obj
 
 
-def clone_object(obj = None, name='OUTPUT'):
+def clone_object(obj = None, name='OUTPUT', depsgraph=None):
     # copy without selection and view layer overhead
     # new_obj = obj.copy()
     # new_obj.name = name
@@ -142,8 +172,8 @@ def clone_object(obj = None, name='OUTPUT'):
         # get a reference to the current obj.data
         old_mesh = new_obj.data
 
-        # Invoke new_from_object() for evaluated object.
-        (ctx, edp) = capture_context([obj])
+        # Invoke new_from_object() for evaluated object, batched clones pass their shared depsgraph
+        edp = depsgraph or capture_context([obj])[1]
         object_eval = obj.evaluated_get(edp)
         mesh_from_eval = bpy.data.meshes.new_from_object(object_eval, preserve_all_data_layers=True, depsgraph=edp)
 
@@ -173,6 +203,47 @@ def clone_object(obj = None, name='OUTPUT'):
     return new_obj
 
 
+def can_share_data(obj=None):
+    # without modifiers and shape keys the evaluated mesh is obj.data itself
+    return obj.type == 'MESH' and len(obj.modifiers) == 0 and not obj.data.shape_keys
+
+
+def clone_objects(objects=[], names=[]):
+    # plain meshes are copied directly, the rest share one depsgraph evaluation
+    clones = [None] * len(objects)
+    evaluated = []
+    for index, (obj, name) in enumerate(zip(objects, names)):
+        if can_share_data(obj):
+            clones[index] = shallow_clone_object(obj, name=name, copy_data=True)
+        else:
+            evaluated.append(index)
+
+    if evaluated:
+        (ctx, edp) = capture_context([objects[index] for index in evaluated])
+        for index in evaluated:
+            clones[index] = clone_object(objects[index], name=names[index], depsgraph=edp)
+
+    return clones
+
+
+def shallow_clone_object(obj=None, name='OUTPUT', copy_data=False):
+    # new object on the same mesh, or on a plain datablock copy, no depsgraph evaluation
+    new_obj = bpy.data.objects.new(name, obj.data.copy() if copy_data else obj.data)
+
+    if obj.pn_original:
+        new_obj.pn_original = obj.pn_original
+    else:
+        new_obj.pn_original = obj
+
+    new_obj.color = obj.color
+
+    new_obj.matrix_parent_inverse = obj.matrix_parent_inverse.copy()
+    new_obj.matrix_local = obj.matrix_local.copy()
+    new_obj.matrix_basis = obj.matrix_basis.copy()
+
+    return new_obj
+
+
 def clear_object(obj=None):
     if obj and obj.data:
         obj.data.clear_geometry()
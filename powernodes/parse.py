@@ -1,8 +1,15 @@
 import bpy
 import mathutils
 import re
+import ast
 import math
-from functools import reduce
+import numpy as np
+from functools import reduce, lru_cache
+
+from . cache import ATTRIBUTE_LAYOUT
+from . vectorize import evaluate_expression_vectorized, MESH_COLLECTIONS
+from . kernels import evaluate_expression_compiled
+from . profiler import register_cache
 
 MATH_NAMESPACE = {key: getattr(math, key) for key in dir(math) if '__' not in key}
 
@@ -56,6 +63,9 @@ FIELD_LIST = ['area', 'center', 'co', 'index', 'bevel_weight', 'is_boundary', 'i
 
 GLOBAL_ATTRIBUTES = ['CTX', 'IDX', 'FRAME', 'FSTART', 'FEND', 'FPS', 'FPS_BASE', 'LEN', 'LOC', 'ROT', 'SCA']
 
+# noise functions returning new values on every call
+VOLATILE_NAMES = ['random', 'random_unit_vector', 'random_vector', 'seed_set']
+
 
 DOMAIN_MAP = {
     # 'VERTEX': 'VERTEX', 'VERT': 'VERTEX', 'VERTS': 'VERTEX',
@@ -91,25 +101,39 @@ backticks_pattern = r'''(
         `.*?`  # backticks string `hello..`
     )'''
 
+range_regex = re.compile(range_pattern, re.VERBOSE)
+token_regex = re.compile(token_pattern, re.VERBOSE)
+token_func_regex = re.compile(token_func_pattern, re.VERBOSE)
+backticks_regex = re.compile(backticks_pattern, re.VERBOSE)
+
+# compiled expressions kept across operator calls, namespaces are rebuilt from the base per call
+EXPRESSION_CACHE_SIZE = 512
+
+BASE_NAMESPACE = {
+    '__builtins__': None,
+    '__name__': None,
+    '__file__': None,
+    }
+BASE_NAMESPACE.update(BUILTINS)
+BASE_NAMESPACE.update(MATH_NAMESPACE)
+BASE_NAMESPACE.update(NOISE_NAMESPACE)
+
 
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
 def extract_tokens(expression):
-    pattern = re.compile(token_pattern, re.VERBOSE)
-    return set(re.findall(pattern, expression))
+    return frozenset(token_regex.findall(expression))
 
 
 def extract_func_tokens(expression):
-    pattern = re.compile(token_func_pattern, re.VERBOSE)
-    return re.findall(pattern, expression)
+    return token_func_regex.findall(expression)
 
 
 def extract_backticks_pattern(expression):
-    pattern = re.compile(backticks_pattern, re.VERBOSE)
-    return re.findall(pattern, expression)
+    return backticks_regex.findall(expression)
 
 
 def extract_range(expression):
-    pattern = re.compile(range_pattern, re.VERBOSE)
-    return re.findall(pattern, expression)
+    return range_regex.findall(expression)
 
 
 def attribute_create(mesh, name, domain, data_type):
@@ -141,28 +165,19 @@ def extract_custom_attribute_layers(attributes, mesh, bmesh, domain):
     for attr in custom_attributes:
         attribute = attribute_get(mesh, attr, domain)
         if attribute:
-            bmesh_elements = getattr(bmesh, domain_map[attribute.domain])
-            attr_layer_item = getattr(bmesh_elements.layers, type_map[attribute.data_type]).get(attr)
+            # no layer handles without a bmesh, mesh only evaluation reads the attribute itself
+            attr_layer_item = None
+            if bmesh is not None:
+                bmesh_elements = getattr(bmesh, domain_map[attribute.domain])
+                attr_layer_item = getattr(bmesh_elements.layers, type_map[attribute.data_type]).get(attr)
             attribute_layers.append((attr, attr_layer_item, attribute.domain, attribute.data_type))
 
     return attribute_layers
 
 
-def compile_expression_func(expression, mesh, bmesh, domain):
-    evaluation_func = '''
-{_R_E_T_} = {expression}
-'''
-
-    namespace = {
-        '__builtins__': None,
-        '__name__': None,
-        '__file__': None,
-        }
-
-    namespace.update(BUILTINS)
-    namespace.update(MATH_NAMESPACE)
-    namespace.update(NOISE_NAMESPACE)
-
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def rewrite_expression(expression):
+    """ Expression with its $-tokens replaced by python names, and the attributes it references """
     tokens = extract_tokens(expression)
     attributes = [token.replace('$', '') for token in tokens]
     for token, attr in zip(tokens, attributes):
@@ -179,43 +194,178 @@ def compile_expression_func(expression, mesh, bmesh, domain):
             # custom attributes
             expression = expression.replace(token, '_self_[_' + attr + '_]')
 
-    # inject custom attributes into local scope
-    attribute_layers = extract_custom_attribute_layers(attributes, mesh, bmesh, domain)
+    return (expression, tuple(attributes))
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression_code(expression):
+    """ Code object building the expression function and the attributes it references, independent of the mesh """
+    evaluation_func = '''lambda _self_, _IDX_: (
+{expression}
+)'''
+
+    (expression, attributes) = rewrite_expression(expression)
+
+    func_to_eval = evaluation_func.format(expression=expression)
+
+    compiled_func = compile(func_to_eval, 'expression', 'eval')
+
+    return (compiled_func, attributes)
+
+
+def classify_name(analysis, node, parents={}):
+    # element fields, globals and custom attributes, by the name and how it is used
+    parent = parents.get(node)
+    if node.id == '_self_':
+        caller = parents.get(parent)
+        if isinstance(parent, ast.Attribute) and not (isinstance(caller, ast.Call) and caller.func is parent):
+            analysis['fields'].add(parent.attr)
+        elif not isinstance(parent, ast.Subscript):
+            # methods, sequences or the element passed along, only a bmesh answers those
+            analysis['elements'] = True
+    elif node.id.startswith('_') and node.id.endswith('_') and node.id[1:-1] in GLOBAL_ATTRIBUTES:
+        analysis['globals'].add(node.id[1:-1])
+    elif node.id.startswith('_') and node.id.endswith('_') and isinstance(parent, ast.Subscript):
+        analysis['attributes'].add(node.id[1:-1])
+    elif node.id in VOLATILE_NAMES:
+        analysis['volatile'] = True
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def analyze_expression(expression):
+    """ Element fields, custom attributes and globals an expression reads, whether it needs the elements themselves or random numbers """
+    analysis = {'fields': set(), 'attributes': set(), 'globals': set(), 'elements': False, 'volatile': False}
+    try:
+        tree = ast.parse(rewrite_expression(expression)[0].strip(), mode='eval')
+    except SyntaxError:
+        return {'fields': frozenset(), 'attributes': frozenset(), 'globals': frozenset(), 'elements': True, 'volatile': True}
+
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            classify_name(analysis, node, parents)
+
+    if analysis['fields'] - set(FIELD_LIST) or analysis['fields'] & set(['verts', 'edges', 'faces', 'vertices', 'key']):
+        # element references and sequences
+        analysis['elements'] = True
+    # shared by every caller through the cache, keep it read only
+    return {key: frozenset(value) if isinstance(value, set) else value for key, value in analysis.items()}
+
+
+register_cache('expression code', compile_expression_code)
+register_cache('expression tokens', extract_tokens)
+register_cache('expression analysis', analyze_expression)
+
+
+def compile_expression_func(expression, mesh, bmesh, domain, attribute_layers=None):
+    (compiled_func, attributes) = compile_expression_code(expression)
+    namespace = dict(BASE_NAMESPACE)
+
+    # inject custom attributes into local scope, the layer handles belong to this bmesh
+    if attribute_layers is None:
+        attribute_layers = extract_custom_attribute_layers(attributes, mesh, bmesh, domain)
     for attr, attr_layer_item, _, _ in attribute_layers:
         namespace['_' + attr + '_'] = attr_layer_item
 
-    func_to_eval = evaluation_func.format(_R_E_T_='_R_E_T_', expression=expression)
+    # globals are looked up on call, the namespace can still be filled in afterwards
+    return (eval(compiled_func, namespace), namespace)
+
+
+GLOBAL_GETTERS = {
+    'CTX': lambda obj, size: bpy.context,
+    'FRAME': lambda obj, size: bpy.context.scene.frame_current,
+    'FSTART': lambda obj, size: bpy.context.scene.frame_start,
+    'FEND': lambda obj, size: bpy.context.scene.frame_end,
+    'FPS': lambda obj, size: bpy.context.scene.render.fps,
+    'FPS_BASE': lambda obj, size: bpy.context.scene.render.fps_base,
+    'LEN': lambda obj, size: size,
+    'LOC': lambda obj, size: obj.location,
+    'ROT': lambda obj, size: obj.rotation_euler,
+    'SCA': lambda obj, size: obj.scale,
+}
+
 
-    compiled_func = compile(func_to_eval, 'expression', 'exec')
+# globals read from the scene, the others follow from the objects hashed into the cache key
+SCENE_GETTERS = {
+    'FRAME': lambda scene: scene.frame_current,
+    'FSTART': lambda scene: scene.frame_start,
+    'FEND': lambda scene: scene.frame_end,
+    'FPS': lambda scene: scene.render.fps,
+    'FPS_BASE': lambda scene: scene.render.fps_base,
+}
+
+
+def expression_context(expressions=[], scene=None):
+    """ Scene values the expressions read, None when they read the context or random numbers """
+    context = {}
+    for expression in expressions:
+        analysis = analyze_expression(expression)
+        if analysis['volatile'] or 'CTX' in analysis['globals']:
+            return None
+        context.update({name: SCENE_GETTERS[name](scene) for name in analysis['globals'] if name in SCENE_GETTERS})
+    return context
 
-    return (compiled_func, namespace)
 
+def evaluate_expression_per_element(elements, expression, obj, me, bm, domain, attribute_layers=None):
+    fexp, namespace = compile_expression_func(expression, me, bm, domain, attribute_layers)
+    # only the globals the expression reads
+    for name in analyze_expression(expression)['globals']:
+        if name in GLOBAL_GETTERS:
+            namespace['_' + name + '_'] = GLOBAL_GETTERS[name](obj, len(elements))
 
-def evaluate_expression(exp, global_scope, local_scope):
-    exec(exp, global_scope, local_scope)
-    return local_scope['_R_E_T_']
+    # single threaded on purpose, the GIL serializes python bytecode so chunked threads only add overhead
+    return list(map(fexp, elements, range(len(elements))))
 
 
 def evaluate_expression_foreach(elements, expression, obj, me, bm, domain, default_ret=0):
     if not expression:
         return [default_ret] * len(elements)
 
-    fexp, namespace = compile_expression_func(expression, me, bm, domain)
-    namespace['_CTX_'] = bpy.context
-    namespace['_FRAME_'] = bpy.context.scene.frame_current
-    namespace['_FSTART_'] = bpy.context.scene.frame_start
-    namespace['_FEND_'] = bpy.context.scene.frame_end
-    namespace['_FPS_'] = bpy.context.scene.render.fps
-    namespace['_FPS_BASE_'] = bpy.context.scene.render.fps_base
-    namespace['_LEN_'] = len(elements)
-    namespace['_LOC_'] = obj.location
-    namespace['_ROT_'] = obj.rotation_euler
-    namespace['_SCA_'] = obj.scale
-
-    values = [evaluate_expression(fexp, namespace, {'_self_': elem, '_IDX_': index}) for index, elem in enumerate(elements)]
+    # whole domain arrays first, then a compiled kernel, the per element path handles the rest
+    attributes = [token.replace('$', '') for token in extract_tokens(expression)]
+    attribute_layers = extract_custom_attribute_layers(attributes, me, bm, domain)
+    values = evaluate_expression_vectorized(elements, expression, obj, me, bm, DOMAIN_MAP.get(domain), attribute_layers)
+    if values is not None:
+        return values
+    values = evaluate_expression_compiled(elements, expression, obj, me, bm, DOMAIN_MAP.get(domain), attribute_layers)
+    if values is not None:
+        return values
+
+    return evaluate_expression_per_element(elements, expression, obj, me, bm, domain, attribute_layers)
+
+
+def evaluate_expression_mesh(expression, obj, me, domain, default_ret=0):
+    """ Evaluate an expression straight from the mesh arrays, None when it needs a bmesh """
+    mesh_domain = DOMAIN_MAP.get(domain)
+    if mesh_domain not in MESH_COLLECTIONS or me is None:
+        return None
+    if not expression:
+        return [default_ret] * len(getattr(me, MESH_COLLECTIONS[mesh_domain]))
+
+    # element methods and sequences are left to the compiled kernels, they read the mesh topology
+    analysis = analyze_expression(expression)
+    attribute_layers = extract_custom_attribute_layers(analysis['attributes'], me, None, domain)
+    values = None
+    if not analysis['elements']:
+        values = evaluate_expression_vectorized(None, expression, obj, me, None, mesh_domain, attribute_layers)
+    if values is None:
+        values = evaluate_expression_compiled(None, expression, obj, me, None, mesh_domain, attribute_layers)
     return values
 
 
+def write_attribute_values(me, name, domain, values):
+    """ Write values into a custom attribute without a bmesh, False when the attribute can't take them """
+    attribute = attribute_get(me, name, domain)
+    if attribute is None or attribute.data_type not in ATTRIBUTE_LAYOUT:
+        return False
+    (attr, components, dtype) = ATTRIBUTE_LAYOUT[attribute.data_type]
+    data = np.asarray(values, dtype=dtype)
+    if data.size != len(attribute.data) * components:
+        return False
+    attribute.data.foreach_set(attr, data.ravel())
+    return True
+
+
 def evaluate_stream_exp(expression, filter_rules=''):
     items = [item for item in expression.split()]
     return items
@@ -0,0 +1,90 @@
+import bpy
+
+
+# spare mesh names per node, keyed by (node tree name, node id)
+MESH_POOLS = {}
+
+# spare meshes kept per node, the rest is removed
+POOL_SIZE = 2
+
+
+def pool_key(node):
+    return (node.id_data.name, node.id)
+
+
+def acquire_mesh(node, name='EMPTY_MESH'):
+    # empty mesh from the free list, a new one when the list is dry
+    pool = MESH_POOLS.get(pool_key(node), [])
+    while pool:
+        mesh = bpy.data.meshes.get(pool.pop())
+        if mesh and mesh.users == 0:
+            return mesh
+    return bpy.data.meshes.new(name)
+
+
+def release_mesh(node, mesh=None):
+    if mesh is None or mesh.users > 0:
+        return
+    pool = MESH_POOLS.setdefault(pool_key(node), [])
+    if len(pool) < POOL_SIZE:
+        mesh.clear_geometry()
+        mesh.materials.clear()
+        pool.append(mesh.name)
+    else:
+        bpy.data.meshes.remove(mesh)
+
+
+def release_object(node, obj=None):
+    mesh = obj.data if obj.type == 'MESH' else None
+    bpy.data.objects.remove(obj, do_unlink=True)
+    release_mesh(node, mesh)
+
+
+def can_recycle(old_obj, obj):
+    # object level state beyond the matrices is not carried over
+    return old_obj.type == 'MESH' and obj.type == 'MESH' and len(old_obj.modifiers) == 0 and len(obj.modifiers) == 0
+
+
+def recycle_outputs(node, previous_objects=[], objects=[]):
+    # keep the previous output objects alive and move the new meshes into them
+    recycled = []
+    for index, obj in enumerate(objects):
+        old_obj = previous_objects[index] if index < len(previous_objects) else None
+        if old_obj is None or not can_recycle(old_obj, obj):
+            recycled.append(obj)
+            continue
+
+        old_mesh = old_obj.data
+        old_obj.data = obj.data
+        old_obj.matrix_parent_inverse = obj.matrix_parent_inverse.copy()
+        old_obj.matrix_basis = obj.matrix_basis.copy()
+        old_obj.pn_original = obj.pn_original
+        old_obj.vertex_groups.clear()
+        for vertex_group in obj.vertex_groups:
+            old_obj.vertex_groups.new(name=vertex_group.name)
+        for key in obj.keys():
+            old_obj[key] = obj[key]
+
+        bpy.data.objects.remove(obj, do_unlink=True)
+        release_mesh(node, old_mesh)
+        recycled.append(old_obj)
+
+    for old_obj in previous_objects[len(objects):]:
+        release_object(node, old_obj)
+    for old_obj in previous_objects[:len(objects)]:
+        if old_obj not in recycled:
+            release_object(node, old_obj)
+
+    return recycled
+
+
+def clear_node_pool(node):
+    for name in MESH_POOLS.pop(pool_key(node), []):
+        mesh = bpy.data.meshes.get(name)
+        if mesh and mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+
+
+def clear_all_pools():
+    # pooled meshes are orphans, they are not saved with the file
+    MESH_POOLS.clear()
@@ -0,0 +1,184 @@
+import time
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+# per node tree profiles, keyed by node tree name
+PROFILES = {}
+
+TRACE_EVENTS_LIMIT = 200000
+
+PHASES = ['cache', 'clone', 'operator', 'kernel', 'cleanup', 'preview', 'display']
+
+PROFILER_SORT_TYPE = [
+    ("NAME", "Name", "Sort by node name", "", 0),
+    ("PROCESS", "Total", "Sort by total process time", "", 1),
+    ("OPERATOR", "Operator", "Sort by operator time", "", 2),
+    ("CLONE", "Clone", "Sort by input clone time", "", 3),
+    ("CLEANUP", "Cleanup", "Sort by output bookkeeping time", "", 4),
+    ("PREVIEW", "Preview", "Sort by preview render time", "", 5),
+    ("DISPLAY", "Display", "Sort by display time", "", 6),
+    ("VERTS", "Verts", "Sort by output vertex count", "", 7),
+    ("FACES", "Faces", "Sort by output face count", "", 8),
+    ("CONVERSIONS_SKIPPED", "Skipped", "Sort by bmesh conversions skipped in chains", "", 9),
+]
+
+# lru caches whose hit rates show in the profiler, keyed by label
+CACHES = {}
+
+# scope stack per thread, entries are (name, tree name, node name)
+_LOCAL = threading.local()
+
+_ORIGIN = time.perf_counter()
+
+
+def get_scope_stack():
+    if not hasattr(_LOCAL, 'stack'):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+def get_profile(tree_name=''):
+    if tree_name not in PROFILES:
+        PROFILES[tree_name] = {
+            'enabled': False,
+            'evaluation': 0,
+            'nodes': {},
+            'events': deque(maxlen=TRACE_EVENTS_LIMIT),
+        }
+    return PROFILES[tree_name]
+
+
+def begin_evaluation(ng=None):
+    profile = get_profile(ng.name)
+    profile['enabled'] = ng.use_profiler
+    profile['evaluation'] += 1
+    return profile
+
+
+def reset_profile(tree_name=''):
+    PROFILES.pop(tree_name, None)
+
+
+def is_profiling(tree_name=''):
+    return tree_name in PROFILES and PROFILES[tree_name]['enabled']
+
+
+def new_node_stats(evaluation=0):
+    stats = {phase: 0.0 for phase in PHASES}
+    stats.update({'evaluation': evaluation, 'process': 0.0, 'calls': 0, 'verts': 0, 'faces': 0, 'conversions_skipped': 0})
+    return stats
+
+
+def get_node_stats(profile, node_name):
+    stats = profile['nodes'].get(node_name)
+    if stats is None or stats['evaluation'] != profile['evaluation']:
+        # keep one evaluation worth of numbers per node
+        stats = new_node_stats(profile['evaluation'])
+        profile['nodes'][node_name] = stats
+    return stats
+
+
+def record_event(profile, name, node_name, start, end, args=None):
+    event = {
+        'name': name,
+        'cat': 'node' if node_name else 'tree',
+        'ph': 'X',
+        'ts': (start - _ORIGIN) * 1000000,
+        'dur': (end - start) * 1000000,
+        'pid': 1,
+        'tid': threading.get_ident(),
+        'args': dict(args or {}, node=node_name, evaluation=profile['evaluation']),
+    }
+    profile['events'].append(event)
+
+    if node_name and (name in PHASES or name == 'process'):
+        stats = get_node_stats(profile, node_name)
+        stats[name] += end - start
+        if name == 'process':
+            stats['calls'] += 1
+
+
+@contextmanager
+def profile_scope(name, tree_name='', node_name=None, args=None):
+    # re-entrant, nested scopes are recorded as nested trace events
+    if not is_profiling(tree_name):
+        yield
+        return
+
+    stack = get_scope_stack()
+    stack.append((name, tree_name, node_name))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        stack.pop()
+        record_event(PROFILES[tree_name], name, node_name, start, end, args)
+
+
+def record_timer(message, start_ns, end_ns):
+    # timer_start/timer_end pairs inside an active scope end up in the trace as well
+    stack = get_scope_stack()
+    if not stack:
+        return
+    (scope_name, tree_name, node_name) = stack[-1]
+    if is_profiling(tree_name):
+        record_event(PROFILES[tree_name], message, None, start_ns / 1e9, end_ns / 1e9, {'scope': scope_name, 'parent': node_name})
+
+
+def record_mesh_counts(tree_name='', node_name='', objects=[]):
+    if not is_profiling(tree_name):
+        return
+    stats = get_node_stats(PROFILES[tree_name], node_name)
+    stats['verts'] = sum(len(obj.data.vertices) for obj in objects if obj.type == 'MESH')
+    stats['faces'] = sum(len(obj.data.polygons) for obj in objects if obj.type == 'MESH')
+
+
+def record_buffer_counts(tree_name='', node_name='', buffers=[]):
+    if not is_profiling(tree_name):
+        return
+    stats = get_node_stats(PROFILES[tree_name], node_name)
+    stats['verts'] = sum(len(buffer.positions) for buffer in buffers)
+    stats['faces'] = sum(len(buffer.loop_start) for buffer in buffers)
+
+
+def record_session_skips(tree_name='', node_name='', count=0):
+    # bmesh conversions saved by chain sessions, one per skipped from_mesh or to_mesh
+    if not is_profiling(tree_name) or count == 0:
+        return
+    get_node_stats(PROFILES[tree_name], node_name)['conversions_skipped'] += count
+
+
+def register_cache(label, cached_func):
+    CACHES[label] = cached_func
+
+
+def get_cache_stats():
+    stats = {}
+    for label, cached_func in CACHES.items():
+        info = cached_func.cache_info()
+        calls = info.hits + info.misses
+        stats[label] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'hit_rate': info.hits / calls if calls else 0.0}
+    return stats
+
+
+def get_sorted_node_stats(tree_name='', sort_type='PROCESS'):
+    profile = PROFILES.get(tree_name)
+    if not profile:
+        return []
+    rows = list(profile['nodes'].items())
+    if sort_type == 'NAME':
+        return sorted(rows, key=lambda row: row[0])
+    return sorted(rows, key=lambda row: row[1][sort_type.lower()], reverse=True)
+
+
+def write_chrome_trace(tree_name='', filepath=''):
+    profile = PROFILES.get(tree_name)
+    events = list(profile['events']) if profile else []
+    metadata = [{'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'Power Nodes: ' + tree_name}}]
+    with open(filepath, 'w') as trace_file:
+        json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, trace_file)
+    return len(events)
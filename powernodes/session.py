@@ -0,0 +1,192 @@
+import bpy
+import bmesh
+
+from . ops import apply_modifier_stack
+from . vectorize import detach_bmesh, release_bmesh
+
+
+# state left open by chain nodes, keyed by (node tree name, node id), values are (kind, [(object name, payload)])
+# BMESH sessions carry a live bmesh, MODIFIER sessions the modifier stack not evaluated yet
+NODE_SESSIONS = {}
+
+# nodes whose session was taken downstream, their output meshes were never written
+STALE_OUTPUTS = set()
+
+# copies of the payloads a chain node took from its source, keyed like NODE_SESSIONS, values are (source key, [(object name, payload)])
+# the source outputs stay stale, a consumer evaluated again on its own starts from the copy instead of running the source again
+RETAINED_INPUTS = {}
+
+# state of the running operator, primed payloads come from the upstream node
+OPERATOR_SESSION = {
+    'keep': False,
+    'primed': {},
+    'stashed': {},
+    'skipped': 0,
+}
+
+
+def session_key(node):
+    return (node.id_data.name, node.id)
+
+
+def write_bmesh(obj, bm):
+    me = obj.data
+    if me.users > 1:
+        # copy-on-write, never write into a mesh shared with another object
+        new_me = bpy.data.meshes.new(me.name)
+        for material in me.materials:
+            new_me.materials.append(material)
+        obj.data = new_me
+    bm.to_mesh(obj.data)
+    obj.data.update()
+    release_bmesh(bm)
+    bm.free()
+
+
+def write_payload(obj, payload):
+    if isinstance(payload, list):
+        apply_modifier_stack(obj, payload)
+    elif payload.is_valid:
+        write_bmesh(obj, payload)
+
+
+def free_payload(payload):
+    # modifier stacks are plain lists, only bmeshes hold memory
+    if isinstance(payload, bmesh.types.BMesh) and payload.is_valid:
+        release_bmesh(payload)
+        payload.free()
+
+
+def copy_payload(payload):
+    return list(payload) if isinstance(payload, list) else payload.copy()
+
+
+def bmesh_begin(obj):
+    # bmesh of the upstream chain node, or a fresh conversion
+    bm = OPERATOR_SESSION['primed'].pop(obj.name, (None, None))[1]
+    if bm is not None and bm.is_valid:
+        # edited upstream, expressions read the elements instead of the stale mesh
+        detach_bmesh(bm)
+        OPERATOR_SESSION['skipped'] += 1
+        return bm
+
+    bm = bmesh.new()
+    bm.from_mesh(obj.data)
+    return bm
+
+
+def bmesh_end(obj, bm):
+    if OPERATOR_SESSION['keep']:
+        # the next node in the chain picks it up, the mesh is left stale
+        OPERATOR_SESSION['stashed'][obj.name] = bm
+        OPERATOR_SESSION['skipped'] += 1
+        return
+    write_bmesh(obj, bm)
+
+
+def modifier_begin(obj):
+    # pending modifiers of the upstream run, the operator appends its own
+    return list(OPERATOR_SESSION['primed'].pop(obj.name, (None, []))[1])
+
+
+def modifier_end(obj, stack=[], depends=[]):
+    # modifiers referencing other objects are evaluated now, those objects are clones deleted after the node
+    if OPERATOR_SESSION['keep'] and not depends:
+        OPERATOR_SESSION['stashed'][obj.name] = stack
+        OPERATOR_SESSION['skipped'] += 1
+        return
+    apply_modifier_stack(obj, stack, depends)
+
+
+def begin_operator_session(keep=False, primed={}):
+    OPERATOR_SESSION['keep'] = keep
+    OPERATOR_SESSION['primed'] = dict(primed)
+    OPERATOR_SESSION['stashed'] = {}
+    OPERATOR_SESSION['skipped'] = 0
+
+
+def end_operator_session():
+    # payloads the operator never opened still have to reach their mesh
+    for name, (obj, payload) in OPERATOR_SESSION['primed'].items():
+        write_payload(obj, payload)
+    stashed = OPERATOR_SESSION['stashed']
+    skipped = OPERATOR_SESSION['skipped']
+    begin_operator_session()
+    return (stashed, skipped)
+
+
+def get_node_session(node):
+    return NODE_SESSIONS.get(session_key(node), (None, None))[1]
+
+
+def get_session_kind(node):
+    return NODE_SESSIONS.get(session_key(node), (None, None))[0]
+
+
+def set_node_session(node, entries=[], kind='BMESH'):
+    discard_node_session(node)
+    if entries:
+        NODE_SESSIONS[session_key(node)] = (kind, entries)
+
+
+def take_node_session(node):
+    (kind, entries) = NODE_SESSIONS.get(session_key(node), (None, None))
+    if kind == 'MODIFIER':
+        # stacks are copied, the node can still evaluate its own outputs on display
+        return [(name, list(stack)) for name, stack in entries]
+    STALE_OUTPUTS.add(session_key(node))
+    NODE_SESSIONS.pop(session_key(node), None)
+    return entries
+
+
+def has_stale_outputs(node):
+    return session_key(node) in STALE_OUTPUTS
+
+
+def flush_node_session(node):
+    # display boundary or a consumer outside the chain, write the meshes now
+    (kind, entries) = NODE_SESSIONS.pop(session_key(node), (None, []))
+    for name, payload in entries:
+        obj = bpy.data.objects.get(name)
+        if obj:
+            write_payload(obj, payload)
+        else:
+            free_payload(payload)
+
+
+def discard_node_session(node):
+    STALE_OUTPUTS.discard(session_key(node))
+    (kind, entries) = NODE_SESSIONS.pop(session_key(node), (None, []))
+    [free_payload(payload) for name, payload in entries]
+
+
+def retain_input(node, source, entries=[]):
+    discard_retained_input(node)
+    RETAINED_INPUTS[session_key(node)] = (session_key(source), [(name, copy_payload(payload)) for name, payload in entries])
+
+
+def has_retained_input(node, source):
+    # the copy is current as long as the source outputs stay stale, the source running again clears them
+    return RETAINED_INPUTS.get(session_key(node), (None, []))[0] == session_key(source) and has_stale_outputs(source)
+
+
+def get_retained_input(node, source):
+    # fresh copies, the retained ones serve the next evaluation as well
+    if not has_retained_input(node, source):
+        return None
+    return [(name, copy_payload(payload)) for name, payload in RETAINED_INPUTS[session_key(node)][1]]
+
+
+def discard_retained_input(node):
+    (source_key, entries) = RETAINED_INPUTS.pop(session_key(node), (None, []))
+    [free_payload(payload) for name, payload in entries]
+
+
+def clear_all_sessions():
+    for (kind, entries) in NODE_SESSIONS.values():
+        [free_payload(payload) for name, payload in entries]
+    for (source_key, entries) in RETAINED_INPUTS.values():
+        [free_payload(payload) for name, payload in entries]
+    NODE_SESSIONS.clear()
+    RETAINED_INPUTS.clear()
+    STALE_OUTPUTS.clear()
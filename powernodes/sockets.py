@@ -8,7 +8,7 @@ from bpy.types import PropertyGroup
 from bpy.types import NodeTree, NodeSocket, NodeSocketStandard, NodeSocketInterface
 
 from . definition import ENUM_GLOBALS
-from . parse import extract_tokens
+from . node_tree import invalidate_frame_dependencies
 from . utils.utils import matrix_flatten, ui_scale
 from . utils.node_utils import find_socket, collection_poll, object_poll
 from . ui.tree_view import OutlinerOperator, ICON_TYPE_MAP
@@ -192,7 +192,7 @@ def set_prop(self, value):
 def update_prop(self, context):
     # update node on socket changes
     try:
-        self.node.update_from_socket(self, context)
+        self.node.update_from_socket(self, context, deferred=True)
     except:
         pass
 
@@ -525,16 +525,8 @@ class ExpressionOperator(bpy.types.Operator):
 
 
 def update_expression(self, context):
-    tokens = extract_tokens(self.prop)
-    full_node_data_path = 'bpy.data.node_groups["' + self.node.id_data.name + '"].' + self.node.path_from_id()
-    if '$FRAME' in tokens:
-        if ('_pn_node_hooks_' not in self.node.id_data or
-            '$FRAME' not in self.node.id_data['_pn_node_hooks_']):
-            self.node.id_data['_pn_node_hooks_'] = {'$FRAME': [full_node_data_path]}
-        frame_hooks = self.node.id_data['_pn_node_hooks_']['$FRAME']
-        if full_node_data_path not in frame_hooks:
-            frame_hooks.append(full_node_data_path)
-            self.node.id_data['_pn_node_hooks_'] = {'$FRAME': frame_hooks}
+    # frame dependencies are derived from the expressions, rebuilt on the next frame change
+    invalidate_frame_dependencies(self.node.id_data)
 
     # update prop
     update_prop(self, context)
@@ -0,0 +1,126 @@
+import bpy
+import time
+
+
+# pending socket changes, keyed by node tree name
+PENDING_UPDATES = {}
+
+# interactive pass state and latency counters, keyed by node tree name
+THROTTLE_STATE = {}
+
+
+def get_throttle_state(ng=None):
+    if ng.name not in THROTTLE_STATE:
+        THROTTLE_STATE[ng.name] = {
+            'interactive': False,
+            'needs_final': False,
+            'changing': False,
+            'interactive_nodes': set(),
+            'pending_since': None,
+            'coalesced': 0,
+            'last_coalesced': 0,
+            'evaluations': 0,
+            'last_latency': 0.0,
+            'avg_latency': 0.0,
+            'max_latency': 0.0,
+        }
+    return THROTTLE_STATE[ng.name]
+
+
+def is_interactive_pass(ng=None):
+    return ng.name in THROTTLE_STATE and THROTTLE_STATE[ng.name]['interactive']
+
+
+def defer_update(node):
+    # merge socket changes and evaluate at most once per update interval
+    ng = node.id_data
+    if ng.update_interval <= 0.0:
+        return False
+
+    now = time.perf_counter()
+    pending = PENDING_UPDATES.setdefault(ng.name, {'nodes': set(), 'last_change': now})
+    pending['nodes'].add(node.name)
+    pending['last_change'] = now
+
+    state = get_throttle_state(ng)
+    state['coalesced'] += 1
+    if state['pending_since'] is None:
+        state['pending_since'] = now
+
+    if not bpy.app.timers.is_registered(flush_pending_updates):
+        bpy.app.timers.register(flush_pending_updates, first_interval=ng.update_interval)
+    return True
+
+
+def flush_pending_updates():
+    next_interval = None
+    tree_names = set(PENDING_UPDATES.keys()) | set(name for name, state in THROTTLE_STATE.items() if state['needs_final'] or state['changing'])
+    for tree_name in tree_names:
+        ng = bpy.data.node_groups.get(tree_name)
+        if ng is None:
+            PENDING_UPDATES.pop(tree_name, None)
+            THROTTLE_STATE.pop(tree_name, None)
+            continue
+
+        state = get_throttle_state(ng)
+        pending = PENDING_UPDATES.pop(tree_name, None)
+        if pending:
+            # changes that keep arriving interval after interval are evaluated at interactive quality,
+            # a lone change goes straight to full quality
+            interactive = ng.use_interactive_quality and state['changing']
+            state['changing'] = True
+            state['interactive'] = interactive
+            state['needs_final'] = state['needs_final'] or interactive
+            for node_name in pending['nodes']:
+                node = ng.nodes.get(node_name)
+                if node:
+                    node.needs_processing = True
+                    node._update()
+            next_interval = min(next_interval or ng.update_interval, ng.update_interval)
+            continue
+
+        # nothing changed during the last interval, the next change starts a new streak
+        state['changing'] = False
+        if state['needs_final']:
+            # run the full quality pass
+            state['interactive'] = False
+            state['needs_final'] = False
+            for node_name in state['interactive_nodes']:
+                node = ng.nodes.get(node_name)
+                if node:
+                    node.needs_processing = True
+                    node._update()
+            state['interactive_nodes'].clear()
+
+    return next_interval
+
+
+def mark_interactive(node):
+    get_throttle_state(node.id_data)['interactive_nodes'].add(node.name)
+
+
+def record_evaluation(ng=None):
+    state = get_throttle_state(ng)
+    if state['pending_since'] is None:
+        return
+
+    latency = time.perf_counter() - state['pending_since']
+    state['evaluations'] += 1
+    state['last_latency'] = latency
+    state['avg_latency'] += (latency - state['avg_latency']) / state['evaluations']
+    state['max_latency'] = max(state['max_latency'], latency)
+    state['last_coalesced'] = state['coalesced']
+    state['coalesced'] = 0
+    state['pending_since'] = None
+
+
+def reset_latency_stats(ng=None):
+    THROTTLE_STATE.pop(ng.name, None)
+
+
+def get_interactive_options(options={}, definition={}):
+    # clamp expensive inputs while dragging
+    for entry in definition.get('inputs', []):
+        if 'interactive' in entry and entry['name'] in options:
+            options[entry['name']] = min(options[entry['name']], entry['interactive'])
+    return options
@@ -0,0 +1,194 @@
+import bpy
+from bpy.props import StringProperty
+from bpy_extras.io_utils import ExportHelper
+
+from .. cache import clear_tree_cache, get_tree_cache_stats
+from .. disk_cache import clear_disk_cache
+from .. throttle import get_throttle_state, reset_latency_stats
+from .. node_tree import get_update_stats, get_dirty_set
+from .. mesh_buffer import get_tree_buffer_stats
+from .. profiler import get_sorted_node_stats, get_cache_stats, reset_profile, write_chrome_trace
+
+
+class ClearCacheOperator(bpy.types.Operator):
+    """ Drop all cached node results of the active tree, on disk too if enabled """
+    bl_idname = "node.power_clear_cache"
+    bl_label = "Clear Cache"
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data and context.space_data.node_tree and context.space_data.tree_type == "PowerTree"
+
+    def execute(self, context):
+        node_tree = context.space_data.node_tree
+        clear_tree_cache(node_tree)
+        if node_tree.use_disk_cache:
+            clear_disk_cache(node_tree)
+        return {'FINISHED'}
+
+
+class ResetLatencyOperator(bpy.types.Operator):
+    """ Reset the update latency counters of the active tree """
+    bl_idname = "node.power_reset_latency"
+    bl_label = "Reset Latency"
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data and context.space_data.node_tree and context.space_data.tree_type == "PowerTree"
+
+    def execute(self, context):
+        reset_latency_stats(context.space_data.node_tree)
+        return {'FINISHED'}
+
+
+class NODE_PT_power_tree(bpy.types.Panel):
+
+    bl_label = "Power Tree"
+    bl_idname = "NODE_PT_power_tree"
+    bl_space_type = "NODE_EDITOR"
+    bl_region_type = "UI"
+    bl_category = "Power Nodes"
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.tree_type == "PowerTree" and context.space_data.node_tree
+
+    def draw(self, context):
+        layout = self.layout
+        node_tree = context.space_data.node_tree
+
+        layout.prop(node_tree, "show_preview")
+        layout.label(text='Dirty nodes: ' + str(len(get_dirty_set(node_tree))))
+        update_stats = get_update_stats(node_tree)
+        if update_stats:
+            layout.label(text='Clones: ' + str(update_stats['clones']) + '  avoided: ' + str(update_stats['clones_avoided']) + '  reused: ' + str(update_stats['objects_reused']))
+        layout.prop(node_tree, "use_lazy_evaluation")
+        if node_tree.use_lazy_evaluation and get_update_stats(node_tree):
+            layout.label(text='Deferred nodes: ' + str(get_update_stats(node_tree)['deferred']))
+        layout.prop(node_tree, "execution_mode", expand=True)
+        if node_tree.execution_mode == 'PARALLEL':
+            update_stats = get_update_stats(node_tree)
+            if update_stats:
+                layout.label(text='Levels: {}  kernels: {:.0f} ms  wall: {:.0f} ms  speedup: {:.2f}x'.format(
+                    update_stats['levels'], update_stats['kernel_time'] * 1000, update_stats['parallel_time'] * 1000, update_stats['speedup']))
+
+        layout.prop(node_tree, "use_bmesh_sessions")
+        layout.prop(node_tree, "use_modifier_fusion")
+        row = layout.row()
+        row.prop(node_tree, "use_mesh_buffers")
+        buffer_stats = get_tree_buffer_stats(node_tree)
+        row.label(text=str(buffer_stats['buffers']) + ' buffers  (' + '{:.1f}'.format(buffer_stats['size'] / (1024 * 1024)) + ' MB)')
+
+        box = layout.box()
+        box.prop(node_tree, "use_cache")
+        col = box.column()
+        col.enabled = node_tree.use_cache
+        col.prop(node_tree, "cache_budget")
+        col.prop(node_tree, "use_disk_cache")
+        sub = col.column()
+        sub.enabled = node_tree.use_disk_cache
+        sub.prop(node_tree, "disk_cache_budget")
+        sub.prop(node_tree, "cache_directory", text='')
+
+        stats = get_tree_cache_stats(node_tree)
+        col.label(text='Entries: ' + str(stats['entries']) + '  (' + '{:.1f}'.format(stats['size'] / (1024 * 1024)) + ' MB)')
+        col.label(text='Hits: ' + str(stats['hits']) + '  misses: ' + str(stats['misses']))
+        col.operator(ClearCacheOperator.bl_idname, icon='TRASH')
+
+        box = layout.box()
+        box.prop(node_tree, "update_interval")
+        box.prop(node_tree, "use_interactive_quality")
+
+        state = get_throttle_state(node_tree)
+        col = box.column(align=True)
+        col.label(text='Latency last: {:.0f} ms  avg: {:.0f} ms  max: {:.0f} ms'.format(state['last_latency'] * 1000, state['avg_latency'] * 1000, state['max_latency'] * 1000))
+        col.label(text='Coalesced changes: ' + str(state['last_coalesced']) + '  evaluations: ' + str(state['evaluations']))
+        col.operator(ResetLatencyOperator.bl_idname, icon='FILE_REFRESH')
+
+
+class ResetProfileOperator(bpy.types.Operator):
+    """ Drop the recorded timings of the active tree """
+    bl_idname = "node.power_reset_profile"
+    bl_label = "Reset Profile"
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data and context.space_data.node_tree and context.space_data.tree_type == "PowerTree"
+
+    def execute(self, context):
+        reset_profile(context.space_data.node_tree.name)
+        return {'FINISHED'}
+
+
+class ExportTraceOperator(bpy.types.Operator, ExportHelper):
+    """ Export the recorded timings as Chrome trace events (chrome://tracing, Perfetto) """
+    bl_idname = "node.power_export_trace"
+    bl_label = "Export Trace"
+
+    filename_ext = ".json"
+
+    filter_glob: StringProperty(default="*.json", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data and context.space_data.node_tree and context.space_data.tree_type == "PowerTree"
+
+    def execute(self, context):
+        count = write_chrome_trace(context.space_data.node_tree.name, self.filepath)
+        self.report({'INFO'}, 'Exported ' + str(count) + ' trace events')
+        return {'FINISHED'}
+
+
+class NODE_PT_power_profiler(bpy.types.Panel):
+
+    bl_label = "Profiler"
+    bl_idname = "NODE_PT_power_profiler"
+    bl_space_type = "NODE_EDITOR"
+    bl_region_type = "UI"
+    bl_category = "Power Nodes"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    COLUMNS = [('process', 'Total'), ('operator', 'Op'), ('clone', 'Clone'), ('cleanup', 'Clean'), ('preview', 'Prev'), ('display', 'Disp')]
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.tree_type == "PowerTree" and context.space_data.node_tree
+
+    def draw_header(self, context):
+        self.layout.prop(context.space_data.node_tree, "use_profiler", text='')
+
+    def draw(self, context):
+        layout = self.layout
+        node_tree = context.space_data.node_tree
+        layout.enabled = node_tree.use_profiler
+
+        row = layout.row(align=True)
+        row.prop(node_tree, "profiler_sort", text='')
+        row.operator(ResetProfileOperator.bl_idname, text='', icon='FILE_REFRESH')
+        row.operator(ExportTraceOperator.bl_idname, text='', icon='EXPORT')
+
+        # hit rates are cumulative over the session
+        for label, stats in get_cache_stats().items():
+            layout.label(text='{}: {:.0%} hits, {} cached'.format(label.capitalize(), stats['hit_rate'], stats['size']))
+
+        rows = get_sorted_node_stats(node_tree.name, node_tree.profiler_sort)
+        if not rows:
+            layout.label(text='No evaluation recorded')
+            return
+
+        # times in ms
+        col = layout.column(align=True)
+        header = col.row(align=True)
+        header.label(text='Node')
+        for key, label in self.COLUMNS:
+            header.label(text=label)
+        header.label(text='Verts')
+        header.label(text='Skip')
+
+        for node_name, stats in rows[:50]:
+            row = col.row(align=True)
+            row.label(text=node_name)
+            for key, label in self.COLUMNS:
+                row.label(text='{:.1f}'.format(stats[key] * 1000))
+            row.label(text=str(stats['verts']))
+            row.label(text=str(stats['conversions_skipped']))
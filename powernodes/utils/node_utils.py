@@ -1,4 +1,5 @@
 import bpy
+import numpy as np
 
 
 def node_trees(name='PowerTree'):
@@ -50,13 +51,105 @@ def socket_for_object(obj=None, node_group={}):
     return None
 
 
-def node_for_object(obj=None, node_group={}):
-    socket = socket_for_object(obj=obj, node_group=node_group)
-    if socket:
-        if not socket.is_output:
-            return socket.node
+# reverse index from object pointer to the names of the nodes consuming it, keyed by node tree name
+OBJECT_INDEX = {}
 
-    return None
+
+def index_signature(node_group):
+    return (len(node_group.nodes), len(node_group.links))
+
+
+def snapshot_object(index, obj):
+    # each indexed object owns a slot in the transform snapshot table, slots of dropped objects are reused
+    pointer = obj.as_pointer()
+    if pointer in index['slots'] or not isinstance(obj, bpy.types.Object):
+        return
+    slot = index['free'].pop() if index['free'] else len(index['slots'])
+    if slot >= len(index['matrices']):
+        matrices = np.zeros((max(16, slot * 2), 4, 4), dtype=np.float32)
+        matrices[:slot] = index['matrices'][:slot]
+        index['matrices'] = matrices
+    index['matrices'][slot] = obj.matrix_world
+    index['slots'][pointer] = slot
+
+
+def index_node_objects(index, node):
+    for socket in node.inputs:
+        if socket.bl_idname != 'InputStreamSocket' or not socket.prop:
+            continue
+        for item in socket.prop:
+            if item.object:
+                names = index['objects'].setdefault(item.object.as_pointer(), [])
+                if node.name not in names:
+                    names.append(node.name)
+                snapshot_object(index, item.object)
+
+
+def rebuild_object_index(node_group={}):
+    index = {'signature': index_signature(node_group), 'objects': {}, 'slots': {}, 'free': [], 'matrices': np.zeros((0, 4, 4), dtype=np.float32)}
+    for node in node_group.nodes:
+        index_node_objects(index, node)
+    OBJECT_INDEX[node_group.name] = index
+    return index
+
+
+def get_object_index(node_group={}):
+    index = OBJECT_INDEX.get(node_group.name)
+    # nodes or links were added or removed behind our back
+    if index is None or index['signature'] != index_signature(node_group):
+        index = rebuild_object_index(node_group)
+    return index
+
+
+def update_object_index(node=None):
+    index = OBJECT_INDEX.get(node.id_data.name)
+    if index is None:
+        return
+    for pointer, names in list(index['objects'].items()):
+        if node.name in names:
+            names.remove(node.name)
+            if not names:
+                del index['objects'][pointer]
+    index_node_objects(index, node)
+
+    # objects no node consumes anymore give their snapshot slot back
+    for pointer in [pointer for pointer in index['slots'] if pointer not in index['objects']]:
+        index['free'].append(index['slots'].pop(pointer))
+
+
+def invalidate_object_index(node_group=None):
+    if node_group is None:
+        OBJECT_INDEX.clear()
+    else:
+        OBJECT_INDEX.pop(node_group.name, None)
+
+
+def moved_objects(objects=[], node_group={}):
+    # compare current transforms against the snapshot table in one go
+    index = get_object_index(node_group)
+    objects = [obj for obj in objects if obj.as_pointer() in index['slots']]
+    if not objects:
+        return set()
+
+    slots = np.array([index['slots'][obj.as_pointer()] for obj in objects], dtype=np.int64)
+    current = np.array([obj.matrix_world for obj in objects], dtype=np.float32)
+    changed = np.any(current != index['matrices'][slots], axis=(1, 2))
+    index['matrices'][slots] = current
+
+    return set(obj.as_pointer() for obj, is_changed in zip(objects, changed) if is_changed)
+
+
+def nodes_for_object(obj=None, node_group={}):
+    names = get_object_index(node_group)['objects'].get(obj.as_pointer(), [])
+    if any(name not in node_group.nodes for name in names):
+        # a node was renamed
+        names = rebuild_object_index(node_group)['objects'].get(obj.as_pointer(), [])
+    return [node_group.nodes[name] for name in names if name in node_group.nodes]
+
+
+def node_for_object(obj=None, node_group={}):
+    nodes = nodes_for_object(obj=obj, node_group=node_group)
+    return nodes[0] if nodes else None
 
 
 def object_poll(self, object):
@@ -5,21 +5,31 @@ from mathutils import Vector, Matrix
 import colorsys
 import time
 import pickle
+import threading
+
+from .. profiler import record_timer
+
+# start times per thread, timer_start/timer_end pairs can be nested
+TIMER_STACKS = threading.local()
 
-START_TIME = 0.0
 
 def timer_start():
-    global START_TIME
-    START_TIME = time.time_ns()
-    return START_TIME
+    if not hasattr(TIMER_STACKS, 'stack'):
+        TIMER_STACKS.stack = []
+    start_time = time.perf_counter_ns()
+    TIMER_STACKS.stack.append(start_time)
+    return start_time
 
 
 def timer_end(message=''):
-    timer_end = time.time_ns()
-    elapsed = (timer_end - START_TIME)
+    timer_end = time.perf_counter_ns()
+    stack = getattr(TIMER_STACKS, 'stack', [])
+    start_time = stack.pop() if stack else timer_end
+    elapsed = (timer_end - start_time)
     if message != '':
         print(message + str(elapsed / 1000000 ) + 'ms')
-    return (START_TIME, timer_end, elapsed)
+        record_timer(message.strip(), start_time, timer_end)
+    return (start_time, timer_end, elapsed)
 
 
 def serialize_to_string(data):
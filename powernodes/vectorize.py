@@ -0,0 +1,388 @@
+import bpy
+import ast
+import re
+import numpy as np
+
+from . cache import ATTRIBUTE_LAYOUT
+from . disk_cache import read_array
+
+
+# bmeshes that no longer mirror their mesh, session bmeshes handed along a chain
+DETACHED_BMESHES = set()
+
+MESH_COLLECTIONS = {'POINT': 'vertices', 'EDGE': 'edges', 'POLYGON': 'polygons', 'CORNER': 'loops'}
+
+# element fields read with foreach_get, (property, components, dtype) per mesh domain
+MESH_FIELDS = {
+    'POINT': {
+        'co': ('co', 3, np.float32),
+        'normal': ('normal', 3, np.float32),
+        'select': ('select', 1, np.bool_),
+        'hide': ('hide', 1, np.bool_),
+    },
+    'EDGE': {
+        'select': ('select', 1, np.bool_),
+        'hide': ('hide', 1, np.bool_),
+    },
+    'POLYGON': {
+        'normal': ('normal', 3, np.float32),
+        'center': ('center', 3, np.float32),
+        'area': ('area', 1, np.float32),
+        'select': ('select', 1, np.bool_),
+        'hide': ('hide', 1, np.bool_),
+        'material_index': ('material_index', 1, np.int32),
+    },
+    'CORNER': {},
+}
+
+# the same fields read from the elements of a detached bmesh
+ELEMENT_READERS = {
+    'co': lambda elem: elem.co[:],
+    'normal': lambda elem: elem.normal[:],
+    'center': lambda elem: elem.calc_center_median()[:],
+    'area': lambda elem: elem.calc_area(),
+    'select': lambda elem: elem.select,
+    'hide': lambda elem: elem.hide,
+    'material_index': lambda elem: elem.material_index,
+}
+
+VECTOR_FIELDS = ['co', 'normal', 'center']
+
+VECTOR_TYPES = ['FLOAT_VECTOR', 'FLOAT_COLOR', 'BYTE_COLOR', 'FLOAT2']
+
+COMPONENTS = {'x': 0, 'y': 1, 'z': 2, 'w': 3}
+
+
+def integer_safe(function):
+    # numpy wraps int64 around and adds bools as logical or, python promotes bools and grows ints instead
+    def apply(left, right):
+        (left, right) = (np.asarray(left), np.asarray(right))
+        left = left.astype(np.int64) if left.dtype == np.bool_ else left
+        right = right.astype(np.int64) if right.dtype == np.bool_ else right
+        result = function(left, right)
+        if np.issubdtype(result.dtype, np.integer) and np.any(np.abs(function(left.astype(np.float64), right.astype(np.float64))) >= 2.0 ** 63):
+            # leave it to the per element path, it has python ints
+            raise OverflowError('integer overflow')
+        return result
+    return apply
+
+
+# numpy equivalents of the expression functions, (function, arity)
+UFUNCS = {
+    'abs': (np.abs, 1),
+    'fabs': (np.fabs, 1),
+    'sqrt': (np.sqrt, 1),
+    'exp': (np.exp, 1),
+    'log': (np.log, 1),
+    'log2': (np.log2, 1),
+    'log10': (np.log10, 1),
+    'sin': (np.sin, 1),
+    'cos': (np.cos, 1),
+    'tan': (np.tan, 1),
+    'asin': (np.arcsin, 1),
+    'acos': (np.arccos, 1),
+    'atan': (np.arctan, 1),
+    'sinh': (np.sinh, 1),
+    'cosh': (np.cosh, 1),
+    'tanh': (np.tanh, 1),
+    'atan2': (np.arctan2, 2),
+    'hypot': (np.hypot, 2),
+    'fmod': (np.fmod, 2),
+    'copysign': (np.copysign, 2),
+    'pow': (integer_safe(np.power), 2),
+    'min': (np.minimum, 2),
+    'max': (np.maximum, 2),
+    'radians': (np.radians, 1),
+    'degrees': (np.degrees, 1),
+    'isnan': (np.isnan, 1),
+    'isinf': (np.isinf, 1),
+    'isfinite': (np.isfinite, 1),
+    # python returns ints here
+    'floor': (lambda value: np.floor(value).astype(np.int64), 1),
+    'ceil': (lambda value: np.ceil(value).astype(np.int64), 1),
+    'trunc': (lambda value: np.trunc(value).astype(np.int64), 1),
+    'round': (lambda value: np.round(value).astype(np.int64), 1),
+    'int': (lambda value: np.trunc(value).astype(np.int64), 1),
+    'float': (lambda value: np.asarray(value, dtype=np.float64), 1),
+    'bool': (lambda value: np.asarray(value, dtype=np.bool_), 1),
+}
+
+CONSTANTS = {'pi': np.pi, 'e': np.e, 'tau': 2.0 * np.pi, 'inf': np.inf, 'nan': np.nan}
+
+COMPARE_OPS = {
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+}
+
+# scalar operators that can overflow or see bools, the rest keep numpy's operators
+ARITHMETIC_OPS = {
+    ast.Add: integer_safe(np.add),
+    ast.Sub: integer_safe(np.subtract),
+    ast.Mult: integer_safe(np.multiply),
+    ast.Pow: integer_safe(np.power),
+}
+
+HELPERS = {
+    # python and/or return one of their operands
+    '_and_': lambda left, right: np.where(left, right, left),
+    '_or_': lambda left, right: np.where(left, left, right),
+    '_not_': np.logical_not,
+    '_where_': np.where,
+    '_component_': lambda value, index: value[..., index],
+    '_length_': lambda value: np.linalg.norm(value, axis=-1),
+    '_vscale_': lambda vector, scalar: vector * np.expand_dims(scalar, -1),
+    '_vdivide_': lambda vector, scalar: vector / np.expand_dims(scalar, -1),
+}
+
+token_pattern = re.compile(r"\$(\w+(?:[-']\w+)*)")
+
+
+class NotVectorizable(Exception):
+    pass
+
+
+def detach_bmesh(bm):
+    DETACHED_BMESHES.add(id(bm))
+
+
+def release_bmesh(bm):
+    DETACHED_BMESHES.discard(id(bm))
+
+
+def is_synced(me, bm, domain, size):
+    # the mesh mirrors the bmesh elements, unless an upstream node edited the bmesh
+    return id(bm) not in DETACHED_BMESHES and me is not None and len(getattr(me, MESH_COLLECTIONS[domain])) == size
+
+
+def call(name, args=[]):
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
+
+
+def lower_constant(node, kinds={}):
+    # python 3.7 parses numbers and booleans into Num and NameConstant
+    value = node.value if hasattr(node, 'value') else node.n
+    if isinstance(value, (bool, int, float)):
+        return (ast.Constant(value=value), 'SCALAR')
+    raise NotVectorizable('constant')
+
+
+def lower_name(node, kinds={}):
+    if node.id in kinds:
+        return (node, kinds[node.id])
+    if node.id in CONSTANTS:
+        return (ast.Constant(value=CONSTANTS[node.id]), 'SCALAR')
+    raise NotVectorizable(node.id)
+
+
+def lower_attribute(node, kinds={}):
+    (value, kind) = lower(node.value, kinds)
+    if kind != 'VECTOR':
+        raise NotVectorizable(node.attr)
+    if node.attr in COMPONENTS:
+        return (call('_component_', [value, ast.Constant(value=COMPONENTS[node.attr])]), 'SCALAR')
+    if node.attr == 'length':
+        return (call('_length_', [value]), 'SCALAR')
+    raise NotVectorizable(node.attr)
+
+
+def lower_subscript(node, kinds={}):
+    (value, kind) = lower(node.value, kinds)
+    (index, index_kind) = lower(node.slice.value if type(node.slice).__name__ == 'Index' else node.slice, {})
+    if kind != 'VECTOR' or not isinstance(index, ast.Constant) or not isinstance(index.value, int):
+        raise NotVectorizable('subscript')
+    return (call('_component_', [value, index]), 'SCALAR')
+
+
+def lower_unary(node, kinds={}):
+    (operand, kind) = lower(node.operand, kinds)
+    if isinstance(node.op, ast.Not):
+        if kind != 'SCALAR':
+            raise NotVectorizable('not')
+        return (call('_not_', [operand]), 'SCALAR')
+    if isinstance(node.op, (ast.USub, ast.UAdd)):
+        return (ast.UnaryOp(op=node.op, operand=operand), kind)
+    raise NotVectorizable('unary')
+
+
+def lower_binary(node, kinds={}):
+    (left, left_kind) = lower(node.left, kinds)
+    (right, right_kind) = lower(node.right, kinds)
+    if left_kind == right_kind == 'SCALAR':
+        if not isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)):
+            raise NotVectorizable('operator')
+        if type(node.op) in ARITHMETIC_OPS:
+            return (call('_' + type(node.op).__name__ + '_', [left, right]), 'SCALAR')
+        return (ast.BinOp(left=left, op=node.op, right=right), 'SCALAR')
+    # mirror mathutils, vectors only add up and scale
+    if left_kind == right_kind == 'VECTOR' and isinstance(node.op, (ast.Add, ast.Sub)):
+        return (ast.BinOp(left=left, op=node.op, right=right), 'VECTOR')
+    if isinstance(node.op, ast.Mult) and left_kind != right_kind:
+        (vector, scalar) = (left, right) if left_kind == 'VECTOR' else (right, left)
+        return (call('_vscale_', [vector, scalar]), 'VECTOR')
+    if isinstance(node.op, ast.Div) and right_kind == 'SCALAR':
+        return (call('_vdivide_', [left, right]), 'VECTOR')
+    raise NotVectorizable('vector operator')
+
+
+def lower_boolean(node, kinds={}):
+    values = [lower(value, kinds) for value in node.values]
+    if any(kind != 'SCALAR' for (value, kind) in values):
+        raise NotVectorizable('boolean')
+    helper = '_and_' if isinstance(node.op, ast.And) else '_or_'
+    result = values[0][0]
+    for (value, kind) in values[1:]:
+        result = call(helper, [result, value])
+    return (result, 'SCALAR')
+
+
+def lower_compare(node, kinds={}):
+    operands = [lower(operand, kinds) for operand in [node.left] + node.comparators]
+    if any(kind != 'SCALAR' for (operand, kind) in operands) or any(type(op) not in COMPARE_OPS for op in node.ops):
+        raise NotVectorizable('compare')
+    result = None
+    for index, op in enumerate(node.ops):
+        name = '_' + type(op).__name__ + '_'
+        comparison = call(name, [operands[index][0], operands[index + 1][0]])
+        result = comparison if result is None else call('_and_', [result, comparison])
+    return (result, 'SCALAR')
+
+
+def lower_if(node, kinds={}):
+    (test, test_kind) = lower(node.test, kinds)
+    (body, body_kind) = lower(node.body, kinds)
+    (orelse, orelse_kind) = lower(node.orelse, kinds)
+    if test_kind != 'SCALAR' or body_kind != 'SCALAR' or orelse_kind != 'SCALAR':
+        raise NotVectorizable('if')
+    return (call('_where_', [test, body, orelse]), 'SCALAR')
+
+
+def lower_call(node, kinds={}):
+    if not isinstance(node.func, ast.Name) or node.func.id not in UFUNCS or node.keywords:
+        raise NotVectorizable('call')
+    (function, arity) = UFUNCS[node.func.id]
+    args = [lower(arg, kinds) for arg in node.args]
+    if len(args) != arity or any(kind != 'SCALAR' for (arg, kind) in args):
+        raise NotVectorizable(node.func.id)
+    return (call('_' + node.func.id + '_', [arg for (arg, kind) in args]), 'SCALAR')
+
+
+# expression nodes lowered into numpy calls, by ast node type name
+LOWERINGS = {
+    'Constant': lower_constant,
+    'Num': lower_constant,
+    'NameConstant': lower_constant,
+    'Name': lower_name,
+    'Attribute': lower_attribute,
+    'Subscript': lower_subscript,
+    'UnaryOp': lower_unary,
+    'BinOp': lower_binary,
+    'BoolOp': lower_boolean,
+    'Compare': lower_compare,
+    'IfExp': lower_if,
+    'Call': lower_call,
+}
+
+
+def lower(node, kinds={}):
+    """ Rewrite an expression node into numpy calls, returns (node, kind) where kind is SCALAR or VECTOR """
+    if type(node).__name__ not in LOWERINGS:
+        raise NotVectorizable(type(node).__name__)
+    return LOWERINGS[type(node).__name__](node, kinds)
+
+
+def compile_vectorized(expression, kinds={}):
+    """ Compile an expression with $tokens replaced by _F_name_ into numpy code, returns (code, kind) """
+    tree = ast.parse(expression.strip(), mode='eval')
+    (body, kind) = lower(tree.body, kinds)
+    tree = ast.fix_missing_locations(ast.Expression(body=body))
+    return (compile(tree, 'expression', 'eval'), kind)
+
+
+def read_mesh_field(me, domain, field, size):
+    (attr, components, dtype) = MESH_FIELDS[domain][field]
+    data = read_array(getattr(me, MESH_COLLECTIONS[domain]), attr, size, components, dtype)
+    data = data.reshape(-1, components) if components > 1 else data
+    # python floats are doubles, keep comparisons exact
+    return data.astype(np.float64) if dtype == np.float32 else data
+
+
+def read_mesh_attribute(me, name, attribute_domain, data_type, size):
+    for attribute in me.attributes:
+        if attribute.name == name and attribute.domain == attribute_domain:
+            (attr, components, dtype) = ATTRIBUTE_LAYOUT[data_type]
+            data = read_array(attribute.data, attr, size, components, dtype)
+            data = data.reshape(-1, components) if components > 1 else data
+            return data.astype(np.float64) if dtype == np.float32 else data
+    raise NotVectorizable(name)
+
+
+def read_element_field(elements, field):
+    return np.array([ELEMENT_READERS[field](elem) for elem in elements], dtype=np.float64 if field in VECTOR_FIELDS + ['area'] else None)
+
+
+def read_element_attribute(elements, layer, data_type):
+    if data_type in VECTOR_TYPES:
+        return np.array([elem[layer][:] for elem in elements], dtype=np.float64)
+    return np.array([elem[layer] for elem in elements])
+
+
+def evaluate_expression_vectorized(elements, expression, obj, me, bm, domain, attribute_layers=[]):
+    """ Evaluate an expression once for the whole domain, None when it has to run per element """
+    if domain not in MESH_FIELDS or '`' in expression or '$(' in expression:
+        return None
+
+    # no elements, the mesh itself is evaluated
+    size = len(elements) if elements is not None else len(getattr(me, MESH_COLLECTIONS[domain]))
+    synced = is_synced(me, bm, domain, size)
+    layers = {attr: (layer, attribute_domain, data_type) for (attr, layer, attribute_domain, data_type) in attribute_layers}
+
+    scene = bpy.context.scene
+    global_values = {
+        'FRAME': scene.frame_current,
+        'FSTART': scene.frame_start,
+        'FEND': scene.frame_end,
+        'FPS': scene.render.fps,
+        'FPS_BASE': scene.render.fps_base,
+        'LEN': size,
+    }
+
+    try:
+        namespace = {'__builtins__': None}
+        kinds = {}
+        for name in set(token_pattern.findall(expression)):
+            variable = '_F_' + name + '_'
+            if name == 'IDX' or name == 'index':
+                value = np.arange(size) if synced or name == 'IDX' else np.array([elem.index for elem in elements], dtype=np.int64)
+            elif name in global_values:
+                value = global_values[name]
+            elif name in ['LOC', 'ROT', 'SCA']:
+                value = np.array({'LOC': obj.location, 'ROT': obj.rotation_euler, 'SCA': obj.scale}[name], dtype=np.float64)
+            elif name in MESH_FIELDS[domain]:
+                value = read_mesh_field(me, domain, name, size) if synced else read_element_field(elements, name)
+            elif name in layers and layers[name][2] in ATTRIBUTE_LAYOUT:
+                (layer, attribute_domain, data_type) = layers[name]
+                value = read_mesh_attribute(me, name, attribute_domain, data_type, size) if synced else read_element_attribute(elements, layer, data_type)
+            else:
+                return None
+            namespace[variable] = value
+            kinds[variable] = 'VECTOR' if np.ndim(value) == 2 or name in ['LOC', 'ROT', 'SCA'] else 'SCALAR'
+
+        (code, kind) = compile_vectorized(token_pattern.sub(lambda match: '_F_' + match.group(1) + '_', expression), kinds)
+
+        namespace.update(HELPERS)
+        namespace.update({'_' + type_.__name__ + '_': function for type_, function in COMPARE_OPS.items()})
+        namespace.update({'_' + type_.__name__ + '_': function for type_, function in ARITHMETIC_OPS.items()})
+        namespace.update({'_' + name + '_': function for name, (function, arity) in UFUNCS.items()})
+
+        # errors are left to the per element path, it raises them as before
+        with np.errstate(divide='raise', invalid='raise', over='raise'):
+            result = np.asarray(eval(code, namespace))
+
+        shape = (size,) if kind == 'SCALAR' else (size, result.shape[-1])
+        return np.broadcast_to(result, shape).tolist()
+    except (NotVectorizable, SyntaxError, ArithmeticError, ValueError, TypeError, IndexError, KeyError, AttributeError):
+        return None
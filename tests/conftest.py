@@ -0,0 +1,89 @@
+import os
+import sys
+import math
+import types
+import importlib.util
+
+
+# the repository root holds the powernodes package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Vector(tuple):
+    """ Enough of mathutils.Vector for expressions evaluated per element """
+
+    def __new__(cls, values=(0.0, 0.0, 0.0)):
+        return tuple.__new__(cls, [float(value) for value in values])
+
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    z = property(lambda self: self[2])
+    w = property(lambda self: self[3])
+    length = property(lambda self: math.sqrt(sum(value * value for value in self)))
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self, other))
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self, other))
+
+    def __mul__(self, other):
+        if isinstance(other, tuple):
+            return Vector(a * b for a, b in zip(self, other))
+        return Vector(a * other for a in self)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return Vector(a / other for a in self)
+
+    def __neg__(self):
+        return Vector(-a for a in self)
+
+    def __pos__(self):
+        return self
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self, other))
+
+
+def unavailable(name):
+    def call(*args, **kwargs):
+        raise RuntimeError(name + ' needs blender')
+    return call
+
+
+def placeholder(name, **attributes):
+    # names the tests don't provide are functions raising when called
+    def missing(attribute):
+        if attribute.startswith('__'):
+            raise AttributeError(attribute)
+        return unavailable(name + '.' + attribute)
+
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes, __getattr__=missing)
+    sys.modules[name] = module
+    return module
+
+
+def install_placeholders():
+    # the addon modules import blender at the top, the tests only exercise the parts running on numpy and numba
+    if importlib.util.find_spec('bpy') is None:
+        scene = types.SimpleNamespace(frame_current=1, frame_start=1, frame_end=250, render=types.SimpleNamespace(fps=24, fps_base=1.0))
+        context = types.SimpleNamespace(scene=scene, window_manager=types.SimpleNamespace(windows=[]))
+        bpy_types = placeholder('bpy.types', Object=type('Object', (), {}), ID=type('ID', (), {}))
+        bpy_utils = placeholder('bpy.utils', user_resource=lambda *args, **kwargs: '')
+        placeholder('bpy', context=context, types=bpy_types, utils=bpy_utils)
+        placeholder('bpy_extras', mesh_utils=placeholder('bpy_extras.mesh_utils'))
+
+    if importlib.util.find_spec('mathutils') is None:
+        noise = placeholder('mathutils.noise', random=lambda: 0.5, random_unit_vector=lambda size=3: Vector((1.0, 0.0, 0.0)),
+                            random_vector=lambda size=3: Vector((0.5, 0.5, 0.5)), seed_set=lambda seed: None)
+        shapes = {name: type(name, (tuple,), {}) for name in ['Matrix', 'Color', 'Euler', 'Quaternion']}
+        placeholder('mathutils', Vector=Vector, noise=noise, geometry=placeholder('mathutils.geometry'), bvhtree=placeholder('mathutils.bvhtree'), **shapes)
+
+    if importlib.util.find_spec('bmesh') is None:
+        placeholder('bmesh')
+
+
+install_placeholders()
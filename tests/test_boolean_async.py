@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from powernodes.operators.power import boolean_async_kernel
+
+from test_csg_soa import cube
+
+
+def quad_cube(center, size):
+    # triangles of a six quad cube, shared holds the quad of each triangle as mesh_to_csg_triangles does
+    triangles = cube(center, size)
+    return (triangles, np.tile(np.arange(6, dtype=np.int32), 2))
+
+
+def result_shared(solver, result):
+    if solver == 'CSG_SOA':
+        return list(result[2])
+    return [int(polygon[0][3]) for polygon in result]
+
+
+@pytest.mark.parametrize('solver', ['CSG', 'CSG_SOA'])
+def test_cutter_indices_follow_the_target_polygons(solver):
+    target = quad_cube(np.zeros(3), 1.0)
+    cutter = quad_cube(np.array([0.8, 0.7, 0.6]), 0.5)
+    results = boolean_async_kernel([('Target', solver, target, 6, [(cutter, 'DIFFERENCE')])])
+
+    shared = result_shared(solver, results['Target'][1])
+    # six target quads, the cutter quads come right after them
+    assert set(shared) <= set(range(12))
+    assert any(index >= 6 for index in shared)
+    assert any(index < 6 for index in shared)
+
+
+@pytest.mark.parametrize('solver', ['CSG', 'CSG_SOA'])
+def test_chained_cutters_follow_the_previous_result(solver):
+    target = quad_cube(np.zeros(3), 1.0)
+    first = quad_cube(np.array([0.8, 0.7, 0.6]), 0.5)
+    second = quad_cube(np.array([-0.8, -0.7, -0.6]), 0.5)
+
+    (solver, result) = boolean_async_kernel([('Target', solver, target, 6, [(first, 'DIFFERENCE')])])['Target']
+    count = len(result_shared(solver, result))
+    (solver, result) = boolean_async_kernel([('Target', solver, target, 6, [(first, 'DIFFERENCE'), (second, 'DIFFERENCE')])])['Target']
+
+    shared = result_shared(solver, result)
+    assert set(shared) <= set(range(count + 6))
+    assert any(index >= count for index in shared)
+
+
+def test_solvers_agree():
+    target = quad_cube(np.zeros(3), 1.0)
+    cutter = quad_cube(np.array([0.8, 0.7, 0.6]), 0.5)
+    (csg, soa) = [boolean_async_kernel([('Target', solver, target, 6, [(cutter, 'UNION')])])['Target'][1] for solver in ['CSG', 'CSG_SOA']]
+    assert result_shared('CSG', csg) == result_shared('CSG_SOA', soa)
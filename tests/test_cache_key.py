@@ -0,0 +1,85 @@
+import bpy
+import types
+
+from powernodes.cache import calc_cache_key
+from powernodes.parse import evaluate_expression_per_element, expression_context
+
+
+NODE = types.SimpleNamespace(bl_idname='AttributeNode')
+
+
+def scene(frame=1, fps=24):
+    return types.SimpleNamespace(frame_current=frame, frame_start=1, frame_end=250, render=types.SimpleNamespace(fps=fps, fps_base=1.0))
+
+
+def test_key_follows_options():
+    options = {'expression': '$co.x * 2', 'domain': 'POINT', 'factor': 0.5}
+    key = calc_cache_key(NODE, [], options, {})
+    assert key == calc_cache_key(NODE, [], dict(options), {})
+    assert key != calc_cache_key(NODE, [], dict(options, factor=0.25), {})
+    assert key != calc_cache_key(NODE, [], dict(options, domain='EDGE'), {})
+    assert key != calc_cache_key(types.SimpleNamespace(bl_idname='OtherNode'), [], options, {})
+
+
+def test_key_follows_source_key():
+    key = calc_cache_key(NODE, [], {}, {}, 'a')
+    assert key != calc_cache_key(NODE, [], {}, {}, 'b')
+    assert key != calc_cache_key(NODE, [], {}, {})
+
+
+def test_options_without_a_hash_have_no_key():
+    assert calc_cache_key(NODE, [], {'callback': object()}, {}) is None
+
+
+def test_context_holds_the_globals_read():
+    assert expression_context(['$co.x * $FRAME'], scene(3)) == {'FRAME': 3}
+    assert expression_context(['$co.x * 2', '$FPS + $FEND'], scene(3)) == {'FPS': 24, 'FEND': 250}
+    # element values come with the inputs, they are hashed there
+    assert expression_context(['$IDX + $LEN'], scene(3)) == {}
+
+
+def test_context_of_volatile_expressions():
+    assert expression_context(['random() * $co.x'], scene()) is None
+    assert expression_context(['$CTX.scene.frame_current'], scene()) is None
+    assert expression_context(['$co.x +'], scene()) is None
+
+
+def test_key_follows_frame_globals():
+    expression = '$co.z + $FRAME / $FPS'
+    (first, second) = (expression_context([expression], scene(1)), expression_context([expression], scene(2)))
+    assert calc_cache_key(NODE, [], {'expression': expression}, first) != calc_cache_key(NODE, [], {'expression': expression}, second)
+    assert calc_cache_key(NODE, [], {'expression': expression}, first) != calc_cache_key(NODE, [], {'expression': expression}, expression_context([expression], scene(1, 30)))
+
+    # the frame alone does not invalidate expressions that never read it
+    expression = '$co.z * 2'
+    (first, second) = (expression_context([expression], scene(1)), expression_context([expression], scene(2)))
+    assert calc_cache_key(NODE, [], {'expression': expression}, first) == calc_cache_key(NODE, [], {'expression': expression}, second)
+
+
+def run_expression_node(expression, elements, cache):
+    # the cached path of BaseNode.process, the key comes first and a hit skips the evaluation
+    options = {'expression': expression, 'domain': 'POINT'}
+    key = calc_cache_key(NODE, [], options, expression_context([expression], bpy.context.scene))
+    if key is not None and key in cache:
+        return cache[key]
+    values = evaluate_expression_per_element(elements, expression, None, None, None, 'POINT', [])
+    if key is not None:
+        cache[key] = values
+    return values
+
+
+def test_frame_expression_output_follows_the_frame(monkeypatch):
+    elements = [types.SimpleNamespace(index=index) for index in range(4)]
+    cache = {}
+
+    monkeypatch.setattr(bpy.context, 'scene', scene(1))
+    first = run_expression_node('$IDX + $FRAME * 10', elements, cache)
+    monkeypatch.setattr(bpy.context, 'scene', scene(2))
+    second = run_expression_node('$IDX + $FRAME * 10', elements, cache)
+    assert first == [10, 11, 12, 13]
+    assert second == [20, 21, 22, 23]
+
+    # back on the first frame the cached result is reused
+    monkeypatch.setattr(bpy.context, 'scene', scene(1))
+    assert run_expression_node('$IDX + $FRAME * 10', elements, cache) is first
+    assert len(cache) == 2
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from powernodes.operators.bool.csg.numba.core import bool_csg_mesh
+from powernodes.operators.bool.csg.numba.soa import bool_csg_soa, csg_soa_from_triangles
+
+
+def cube(center, size):
+    corners = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float64) * size + center
+    quads = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    return np.array([corners[[a, b, c]] for (a, b, c, d) in quads] + [corners[[a, c, d]] for (a, b, c, d) in quads])
+
+
+def sphere(center, radius, segments):
+    def point(i, j):
+        (theta, phi) = (np.pi * i / segments, np.pi * j / segments)
+        return center + radius * np.array([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)])
+
+    triangles = []
+    for i in range(segments):
+        for j in range(2 * segments):
+            (a, b, c, d) = (point(i, j), point(i + 1, j), point(i + 1, j + 1), point(i, j + 1))
+            if i > 0:
+                triangles.append([a, b, d])
+            if i < segments - 1:
+                triangles.append([b, c, d])
+    return np.array(triangles)
+
+
+def jitclass_polygons(triangles, shared):
+    return [{'vertices': [tuple(vertex) for vertex in triangle], 'shared': int(index)} for triangle, index in zip(triangles, shared)]
+
+
+OPERANDS = {
+    'sphere_cube': (sphere(np.zeros(3), 1.0, 8), cube(np.array([0.5, 0.2, 0.3]), 0.7)),
+    'cube_cube': (cube(np.zeros(3), 1.0), cube(np.array([0.6, 0.4, 0.5]), 0.8)),
+}
+
+
+@pytest.mark.parametrize('operation_type', ['DIFFERENCE', 'UNION', 'INTERSECT'])
+@pytest.mark.parametrize('operands', sorted(OPERANDS))
+def test_soa_matches_jitclass(operands, operation_type):
+    (target, cutter) = OPERANDS[operands]
+    (target_shared, cutter_shared) = (np.zeros(len(target), dtype=np.int64), np.arange(1, len(cutter) + 1, dtype=np.int64))
+
+    expected = bool_csg_mesh(jitclass_polygons(target, target_shared), jitclass_polygons(cutter, cutter_shared), operation_type)
+    (offsets, positions, shared) = bool_csg_soa(csg_soa_from_triangles(target, target_shared), csg_soa_from_triangles(cutter, cutter_shared), operation_type)
+
+    # same polygons in the same order
+    assert len(offsets) - 1 == len(expected)
+    for index, polygon in enumerate(expected):
+        polygon = np.array(polygon)
+        assert np.allclose(positions[offsets[index]:offsets[index + 1]], polygon[:, :3])
+        assert shared[index] == int(polygon[0, 3])
+
+
+def test_soa_empty_cutter():
+    target = cube(np.zeros(3), 1.0)
+    empty = (np.zeros(1, dtype=np.int64), np.zeros((0, 3)), np.zeros(0, dtype=np.int64))
+    (offsets, positions, shared) = bool_csg_soa(csg_soa_from_triangles(target, np.zeros(len(target), dtype=np.int64)), empty, 'DIFFERENCE')
+    assert len(offsets) - 1 == len(target)
@@ -0,0 +1,128 @@
+import types
+import numpy as np
+import pytest
+
+from mathutils import Vector
+from powernodes import kernels
+from powernodes.parse import evaluate_expression_per_element
+from powernodes.vectorize import evaluate_expression_vectorized
+
+
+class Collection(list):
+    """ Mesh collection answering foreach_get from per item fields """
+
+    def __init__(self, fields):
+        super().__init__(range(len(next(iter(fields.values())))))
+        self.fields = fields
+
+    def foreach_get(self, attr, buffer):
+        buffer[:] = np.asarray(self.fields[attr]).ravel()
+
+
+def cube_mesh():
+    rng = np.random.default_rng(0)
+    co = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float32) * rng.uniform(0.5, 2.0, 3).astype(np.float32)
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    edge_index = {}
+    (loop_vert, loop_edge) = ([], [])
+    for face in faces:
+        for corner, vert in enumerate(face):
+            edge = tuple(sorted((vert, face[(corner + 1) % len(face)])))
+            loop_vert.append(vert)
+            loop_edge.append(edge_index.setdefault(edge, len(edge_index)))
+    edges = sorted(edge_index, key=edge_index.get)
+
+    me = types.SimpleNamespace()
+    me.vertices = Collection({'co': co, 'normal': co / np.linalg.norm(co, axis=1)[:, None], 'select': rng.random(8) > 0.5, 'hide': rng.random(8) > 0.5})
+    me.edges = Collection({'vertices': np.array(edges), 'select': rng.random(len(edges)) > 0.5, 'hide': rng.random(len(edges)) > 0.5,
+                           'use_seam': rng.random(len(edges)) > 0.5})
+    centers = np.array([co[list(face)].mean(axis=0) for face in faces], dtype=np.float32)
+    me.polygons = Collection({'loop_start': np.arange(0, 24, 4), 'loop_total': np.full(6, 4), 'normal': centers / np.linalg.norm(centers, axis=1)[:, None],
+                              'center': centers, 'area': rng.uniform(1.0, 4.0, 6).astype(np.float32), 'select': rng.random(6) > 0.5,
+                              'hide': rng.random(6) > 0.5, 'use_smooth': rng.random(6) > 0.5, 'material_index': rng.integers(0, 3, 6)})
+    me.loops = Collection({'vertex_index': np.array(loop_vert), 'edge_index': np.array(loop_edge)})
+    me.attributes = []
+    return (me, faces)
+
+
+def mesh_elements(me, faces):
+    # bmesh like elements carrying the same values as the mesh arrays
+    verts = []
+    for index in range(len(me.vertices)):
+        fields = {name: values[index] for name, values in me.vertices.fields.items()}
+        verts.append(types.SimpleNamespace(index=index, co=Vector(fields['co']), normal=Vector(fields['normal']), select=bool(fields['select']), hide=bool(fields['hide'])))
+
+    polygons = []
+    for index, face in enumerate(faces):
+        fields = {name: values[index] for name, values in me.polygons.fields.items()}
+        area = float(fields['area'])
+        center = Vector(fields['center'])
+        polygons.append(types.SimpleNamespace(index=index, normal=Vector(fields['normal']), select=bool(fields['select']), hide=bool(fields['hide']),
+                                              material_index=int(fields['material_index']), verts=[verts[vert] for vert in face],
+                                              calc_area=lambda area=area: area, calc_center_median=lambda center=center: center))
+    return {'POINT': verts, 'POLYGON': polygons}
+
+
+EXPRESSIONS = {
+    'POINT': ['$co.x + 1', '$co.z * 2 - $co.y', '$IDX % 3 == 0 and $select', 'not $hide', 'sqrt(abs($co.x)) + floor($co.y)', 'max($co.x, $co.y)',
+              '$co * 2', '$co - $normal', '$co.length', '$co.x if $select else -$co.x', '0 < $co.x < 1.5', '$FRAME / $FPS_BASE + $LEN'],
+    'POLYGON': ['$material_index * 2 + $IDX', '$normal.z > 0 or $select', '-$normal', '$material_index == 1 and not $hide', 'atan2($normal.y, $normal.x)'],
+}
+
+KERNEL_EXPRESSIONS = {
+    'POINT': EXPRESSIONS['POINT'],
+    'POLYGON': EXPRESSIONS['POLYGON'] + ['$self.calc_area() * 2', 'len($self.verts)', 'sum(v.co.z for v in $self.verts)', 'reduce(lambda acc, v: max(acc, v.co.x), $self.verts, -10.0)',
+                'any(v.co.z > 0 for v in $self.verts if v.select)'],
+}
+
+OBJECT = types.SimpleNamespace(location=Vector((0.0, 0.0, 0.0)), rotation_euler=Vector((0.0, 0.0, 0.0)), scale=Vector((1.0, 1.0, 1.0)))
+
+
+def assert_same_values(values, expected):
+    assert len(values) == len(expected)
+    (values, expected) = (np.array([tuple(value) if isinstance(value, tuple) else value for value in values], dtype=np.float64),
+                          np.array([tuple(value) if isinstance(value, tuple) else value for value in expected], dtype=np.float64))
+    assert np.allclose(values, expected)
+
+
+@pytest.mark.parametrize('domain,expression', [(domain, expression) for domain, expressions in EXPRESSIONS.items() for expression in expressions])
+def test_vectorized_matches_per_element(domain, expression):
+    (me, faces) = cube_mesh()
+    elements = mesh_elements(me, faces)[domain]
+    expected = evaluate_expression_per_element(elements, expression, OBJECT, me, None, domain, [])
+
+    # the elements mirror the mesh, the values come from the mesh arrays
+    values = evaluate_expression_vectorized(elements, expression, OBJECT, me, None, domain, [])
+    assert values is not None
+    assert_same_values(values, expected)
+
+    # the elements themselves, e.g. after an upstream node edited the bmesh
+    values = evaluate_expression_vectorized(elements, expression, OBJECT, None, None, domain, [])
+    assert values is not None
+    assert_same_values(values, expected)
+
+
+@pytest.mark.parametrize('domain,expression', [(domain, expression) for domain, expressions in KERNEL_EXPRESSIONS.items() for expression in expressions])
+def test_compiled_matches_per_element(domain, expression, tmp_path, monkeypatch):
+    monkeypatch.setattr(kernels, 'get_kernel_directory', lambda: str(tmp_path))
+    monkeypatch.setattr(kernels, 'KERNEL_MIN_ELEMENTS', 0)
+    monkeypatch.setattr(kernels, 'KERNELS', {})
+
+    (me, faces) = cube_mesh()
+    elements = mesh_elements(me, faces)[domain]
+    expected = evaluate_expression_per_element(elements, expression, OBJECT, me, None, domain, [])
+
+    values = kernels.evaluate_expression_compiled(elements, expression, OBJECT, me, None, domain, [])
+    assert values is not None
+    assert_same_values(values, expected)
+
+
+def test_compiled_rejects_unknown_fields(tmp_path, monkeypatch):
+    monkeypatch.setattr(kernels, 'get_kernel_directory', lambda: str(tmp_path))
+    monkeypatch.setattr(kernels, 'KERNEL_MIN_ELEMENTS', 0)
+    monkeypatch.setattr(kernels, 'KERNELS', {})
+
+    (me, faces) = cube_mesh()
+    assert kernels.evaluate_expression_compiled(None, '$bogus + 1', OBJECT, me, None, 'POINT', []) is None
+    # rejected kernels are remembered
+    assert list(kernels.KERNELS.values()) == [None]
@@ -0,0 +1,86 @@
+import types
+import numpy as np
+import pytest
+
+from powernodes.mesh_buffer import MeshBuffer, buffers_from_objects
+
+
+class Collection:
+    """ Mesh collection backed by numpy arrays, foreach_get/set like bpy_prop_collection """
+
+    def __init__(self, **fields):
+        self.fields = {name: np.asarray(values) for name, values in fields.items()}
+        self.size = len(next(iter(self.fields.values()))) if fields else 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, count):
+        self.size += count
+
+    def foreach_get(self, attr, buffer):
+        buffer[:] = self.fields[attr].ravel()
+
+    def foreach_set(self, attr, buffer):
+        self.fields[attr] = np.array(buffer).ravel()
+
+
+def quad_mesh():
+    mesh = types.SimpleNamespace(shape_keys=None, attributes=[], uv_layers=[], materials=[])
+    mesh.vertices = Collection(co=np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0], [2, 1, 0]], dtype=np.float32))
+    mesh.edges = Collection(vertices=np.array([[0, 1], [1, 2], [2, 3], [3, 0], [1, 4], [4, 5], [5, 2]], dtype=np.int32))
+    mesh.loops = Collection(vertex_index=np.array([0, 1, 2, 3, 1, 4, 5, 2], dtype=np.int32))
+    mesh.polygons = Collection(loop_start=np.array([0, 4], dtype=np.int32), loop_total=np.array([4, 4], dtype=np.int32),
+                               material_index=np.array([0, 1], dtype=np.int32), use_smooth=np.array([False, True]))
+    return mesh
+
+
+def mesh_object(mesh, name='OUT_quads', modifiers=()):
+    matrix = np.identity(4, dtype=np.float32)
+    matrix[0, 3] = 2.0
+    return types.SimpleNamespace(name=name, type='MESH', data=mesh, modifiers=list(modifiers), matrix_basis=matrix.tolist(), pn_original=None, color=(1.0, 0.5, 0.5, 1.0))
+
+
+def test_buffer_reads_the_mesh_arrays():
+    buffer = MeshBuffer.from_object(mesh_object(quad_mesh()))
+    assert buffer.positions.shape == (6, 3)
+    assert buffer.edges.shape == (7, 2)
+    assert buffer.loops.tolist() == [0, 1, 2, 3, 1, 4, 5, 2]
+    assert buffer.loop_start.tolist() == [0, 4]
+    assert buffer.attributes['FACE']['material_index'][1].tolist() == [0, 1]
+    assert buffer.matrix[0, 3] == 2.0
+    assert buffer.original == 'OUT_quads'
+
+
+def test_buffer_arrays_are_shared_read_only():
+    buffer = MeshBuffer.from_object(mesh_object(quad_mesh()))
+    with pytest.raises(ValueError):
+        buffer.positions[0, 0] = 1.0
+
+    moved = buffer.copy(positions=buffer.positions + 1.0)
+    # unchanged arrays are shared, changed ones are frozen as well
+    assert moved.loops is buffer.loops
+    assert moved.attributes['FACE']['use_smooth'][1] is buffer.attributes['FACE']['use_smooth'][1]
+    assert not moved.positions.flags.writeable
+    assert np.allclose(moved.positions, buffer.positions + 1.0)
+
+    moved.set_attribute('POINT', 'weight', 'FLOAT', np.ones(6, dtype=np.float32))
+    assert 'weight' not in buffer.attributes['POINT']
+    assert moved.nbytes == buffer.nbytes + 6 * 4
+
+
+def test_objects_without_plain_geometry_have_no_buffers():
+    assert buffers_from_objects([mesh_object(quad_mesh()), mesh_object(quad_mesh(), modifiers=['SUBSURF'])]) is None
+    assert len(buffers_from_objects([mesh_object(quad_mesh()), mesh_object(quad_mesh())])) == 2
+
+
+def test_buffer_fills_an_empty_mesh():
+    buffer = MeshBuffer.from_object(mesh_object(quad_mesh()))
+    mesh = types.SimpleNamespace(vertices=Collection(), edges=Collection(), loops=Collection(), polygons=Collection(), attributes=[], uv_layers=[], materials=[],
+                                 shape_keys=None, update=lambda calc_edges=False: None)
+    buffer.fill_mesh(mesh)
+
+    filled = MeshBuffer.from_object(mesh_object(mesh))
+    for name in ['positions', 'edges', 'loops', 'loop_start', 'loop_total']:
+        assert np.array_equal(getattr(filled, name), getattr(buffer, name))
+    assert filled.attributes['FACE']['use_smooth'][1].tolist() == [False, True]